@@ -6,11 +6,11 @@
 
 import os
 import logging
+import click
 from typing import Optional
 from flask import Flask
 from flask_cors import CORS
-from sqlalchemy import create_engine, text
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy import text
 from logging.handlers import RotatingFileHandler
 from app.models.port_status import db
 from app.config import config
@@ -68,42 +68,36 @@ def create_app(config_name: str = None) -> Flask:
     # 设置日志系统
     setup_logging(app)
     
-    # 获取数据库配置
-    if config_name != 'testing':  # 测试环境使用内存数据库，不需要创建
-        db_config = config[config_name]
-        db_user = db_config.DB_USER
-        db_password = db_config.DB_PASSWORD
-        db_host = db_config.DB_HOST
-        db_name = db_config.DB_NAME
-        
-        # 确保数据库存在
-        db_url = f"mysql+pymysql://{db_user}:{db_password}@{db_host}"
-        logger.info(f"正在连接数据库 {db_host}...")
-        
-        try:
-            # 配置连接池
-            engine = create_engine(
-                db_url, 
-                pool_size=db_config.SQLALCHEMY_POOL_SIZE,
-                pool_timeout=db_config.SQLALCHEMY_POOL_TIMEOUT,
-                pool_recycle=db_config.SQLALCHEMY_POOL_RECYCLE,
-                max_overflow=db_config.SQLALCHEMY_MAX_OVERFLOW
-            )
-            with engine.connect() as conn:
-                logger.info(f"正在创建数据库 {db_name}...")
-                conn.execute(text(f"CREATE DATABASE IF NOT EXISTS {db_name} CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci"))
-                conn.commit()
-                logger.info(f"数据库 {db_name} 已准备好")
-        except SQLAlchemyError as e:
-            logger.error(f"数据库连接错误: {str(e)}")
-            logger.error(f"请检查数据库配置是否正确，用户名: {db_user}, 主机: {db_host}")
-            # 在开发环境抛出错误，方便调试
-            if config_name == 'development':
-                raise
-    
-    # 初始化数据库
+    # 初始化数据库，连接池配置应用到实际处理查询的引擎上
+    from app.db_pool import build_engine_options
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = build_engine_options(app.config)
     db.init_app(app)
     
+    # /metrics 导出本进程的数据库连接池统计
+    from app.metrics import register_db_pool_metrics
+    register_db_pool_metrics(app)
+    
+    # 读写分离：只读副本在 SQLALCHEMY_BINDS 中配置，这里设置读写一致窗口
+    from app.db_routing import init_db_routing
+    init_db_routing(app)
+    
+    # 空间索引随充电桩增删改增量更新
+    from app.models.port_status import ChargingStation
+    from app.geo_index import init_geo_index_events
+    init_geo_index_events(ChargingStation)
+    
+    # 空间索引和列式状态存储在进程处理第一个请求时构建，之后由后台线程维护
+    from app.index_maintenance import init_index_maintenance
+    init_index_maintenance(app)
+    
+    # 统计每个请求执行的SQL语句数量
+    from app.query_stats import init_query_stats
+    init_query_stats(app)
+    
+    # 请求耗时分解（Server-Timing 和慢请求日志）
+    from app.timing import init_request_timing
+    init_request_timing(app)
+    
     # 注册所有蓝图
     from app.blueprints import all_blueprints
     for blueprint in all_blueprints:
@@ -116,11 +110,24 @@ def create_app(config_name: str = None) -> Flask:
     # 注册命令
     register_commands(app)
     
+    # 预热缓存，避免冷启动后第一波请求同时回源
+    # 由服务入口（run.py、asgi.py）调用 warm_cache_on_start(app)，这里不预热
+    # 使 Celery 和 flask 命令行创建应用时不访问Redis和数据库
+    
     return app
 
 def register_commands(app):
     """注册CLI命令"""
     
+    @app.cli.command('bootstrap-db')
+    def bootstrap_db_command():
+        """创建数据库命令（部署时执行一次）"""
+        from app.bootstrap import ensure_database
+        if ensure_database(config[os.environ.get('FLASK_ENV', 'development')]):
+            logger.info("数据库引导成功")
+        else:
+            logger.error("数据库引导失败")
+    
     @app.cli.command('init-db')
     def init_db_command():
         """初始化数据库命令"""
@@ -130,6 +137,16 @@ def register_commands(app):
         else:
             logger.error("数据库初始化失败")
     
+    @app.cli.command('upgrade-db')
+    def upgrade_db_command():
+        """为已存在的表补充新增列命令（升级后执行一次，可重复执行）"""
+        from app.init_db import upgrade_schema
+        added = upgrade_schema()
+        if added:
+            logger.info(f"数据库结构已升级，新增列: {', '.join(added)}")
+        else:
+            logger.info("数据库结构已是最新")
+    
     @app.cli.command('test-connection')
     def test_connection_command():
         """测试数据库连接命令"""
@@ -155,3 +172,64 @@ def register_commands(app):
         from app.services.station_service import get_default_station
         station = get_default_station()
         logger.info(f"已创建默认充电桩: {station.station_id} - {station.name}")
+    
+    @app.cli.command('import-stations')
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--format', 'data_format', type=click.Choice(['csv', 'json']), default=None,
+                  help='导入格式，默认按文件扩展名判断')
+    def import_stations_command(path, data_format):
+        """从CSV或JSON文件批量导入充电桩和端口命令"""
+        from app.services.provisioning_service import parse_import_data, detect_format, provision_stations
+        with open(path, 'rb') as f:
+            data = f.read()
+        try:
+            stations = parse_import_data(data, data_format or detect_format(path))
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        result = provision_stations(stations)
+        logger.info(f"已导入充电桩: 新建 {result['created_stations']} 个，已存在 {result['existing_stations']} 个，"
+                    f"新建端口 {result['created_ports']} 个")
+    
+    @app.cli.command('run-poller')
+    def run_poller_command():
+        """启动本节点的共享内存状态轮询进程命令"""
+        import time
+        from app.shared_state import SharedFleetState
+        from app.services.station_service import sync_shared_state
+        writer = SharedFleetState(
+            app.config['SHARED_STATE_PATH'],
+            max_stations=app.config['SHARED_STATE_MAX_STATIONS'],
+            ports_per_station=app.config['SHARED_STATE_PORTS_PER_STATION'],
+            writable=True
+        ).open()
+        interval = app.config['SHARED_STATE_POLL_INTERVAL']
+        logger.info(f"共享状态轮询进程已启动，间隔 {interval} 秒")
+        try:
+            while True:
+                try:
+                    count = sync_shared_state(writer)
+                    logger.debug(f"已写入 {count} 个充电桩到共享状态段")
+                except Exception as e:
+                    logger.error(f"同步共享状态时出错: {str(e)}")
+                finally:
+                    db.session.remove()
+                time.sleep(interval)
+        finally:
+            writer.close()
+    
+    @app.cli.command('warm-cache')
+    @click.option('--source', type=click.Choice(['auto', 'snapshot', 'database']),
+                  default='auto', help='预热数据来源')
+    def warm_cache_command(source):
+        """预热缓存命令"""
+        from app.services.warmup_service import warm_cache
+        count = warm_cache(source)
+        logger.info(f"已预热 {count} 个充电桩的缓存")
+    
+    @app.cli.command('write-snapshot')
+    @click.option('--path', default=None, help='快照文件路径，默认使用配置')
+    def write_snapshot_command(path):
+        """写入缓存快照命令"""
+        from app.services.warmup_service import write_snapshot
+        count = write_snapshot(path)
+        logger.info(f"已写入 {count} 个充电桩的缓存快照")
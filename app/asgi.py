@@ -0,0 +1,159 @@
+"""
+充电桩监控系统 - ASGI服务模块
+
+这个模块提供异步服务模式：高频的只读API（/api/stations、/api/ports）由原生异步处理器响应，
+缓存未命中时上游请求以协程方式并发等待，不占用工作线程；其余请求通过 WsgiToAsgi
+交给原有的Flask应用处理。
+
+使用方式：
+    uvicorn asgi:app --workers 2
+"""
+
+import os
+import logging
+from typing import Dict, Any, Callable, Awaitable, Optional
+import httpx
+from asgiref.wsgi import WsgiToAsgi
+from flask import Flask
+from app import create_app
+from app.config import Config
+from app.compression import negotiate_encoding, parse_accept_encoding, compress_body
+from app.query_stats import track_queries, report_query_stats
+from app.timing import stage, request_timing_scope, finish_request_timing
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+class AsyncAPIApp:
+    """异步API的ASGI应用
+
+    Attributes:
+        flask_app: 原有的Flask应用
+    """
+
+    def __init__(self, flask_app: Flask):
+        self.flask_app = flask_app
+        self.wsgi_app = WsgiToAsgi(flask_app)
+        self.service = None
+        self.routes: Dict[str, Callable[[], Awaitable[Any]]] = {
+            '/api/stations': self.get_stations,
+            '/api/ports': self.get_ports
+        }
+
+    async def startup(self) -> None:
+        """创建进程内共享的异步HTTP客户端"""
+        from app.services.async_station_service import AsyncStationService
+        client = httpx.AsyncClient(
+            verify=False,
+            timeout=httpx.Timeout(Config.API_TIMEOUT, connect=3),
+            limits=httpx.Limits(max_connections=Config.CONNECTION_POOL_SIZE,
+                                max_keepalive_connections=Config.CONNECTION_POOL_SIZE)
+        )
+        self.service = AsyncStationService(self.flask_app, client)
+        logger.info("异步API服务已启动")
+
+    async def shutdown(self) -> None:
+        """关闭异步HTTP客户端"""
+        if self.service is not None:
+            await self.service.client.aclose()
+            self.service = None
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+
+        # 只有不带查询参数的GET请求走异步处理器，分页、筛选等仍由Flask处理
+        handler = self.routes.get(scope.get('path')) if scope['type'] == 'http' else None
+        if handler is None or scope['method'] != 'GET' or scope.get('query_string'):
+            await self.wsgi_app(scope, receive, send)
+            return
+
+        if self.service is None:
+            await self.startup()
+        # 与 Flask 的请求钩子一致地统计SQL语句和阶段耗时，线程池中执行的同步代码继承这里设置的上下文变量
+        with track_queries() as query_stats, request_timing_scope() as timing:
+            status, body, versioned = await handler()
+        report_query_stats('request', scope['path'], query_stats, Config.SQL_QUERY_WARN_THRESHOLD)
+        headers = [(b'content-type', b'application/json')]
+        if timing is not None:
+            server_timing = finish_request_timing(timing, scope['method'], scope['path'], '', status)
+            if server_timing is not None:
+                headers.append((b'server-timing', server_timing.encode('latin-1')))
+        if Config.COMPRESSION_ENABLED and status == 200:
+            # 与 Flask 的 compress_response 一致：按 Accept-Encoding 压缩，带版本号的响应复用压缩结果
+            headers.append((b'vary', b'Accept-Encoding'))
+            encoding = negotiate_encoding(parse_accept_encoding(self._header(scope, b'accept-encoding')))
+            if encoding is not None and len(body) >= Config.COMPRESSION_MIN_SIZE:
+                key, version = versioned or (None, None)
+                body = compress_body(body, encoding, key, version)
+                headers.append((b'content-encoding', encoding.encode('ascii')))
+        headers.append((b'content-length', str(len(body)).encode('ascii')))
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': body})
+
+    @staticmethod
+    def _header(scope, name: bytes) -> Optional[str]:
+        """读取请求头，同名请求头以逗号拼接"""
+        values = [value.decode('latin-1') for key, value in scope.get('headers', []) if key.lower() == name]
+        return ', '.join(values) if values else None
+
+    async def _lifespan(self, receive, send) -> None:
+        """处理ASGI生命周期事件"""
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await self.startup()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def _json(self, data: Dict[str, Any]) -> bytes:
+        """使用Flask应用的JSON配置序列化，保持与同步接口一致的输出"""
+        return self.flask_app.json.dumps(data).encode('utf-8')
+
+    async def get_stations(self):
+        """获取所有充电桩状态的API
+
+        共享内存或Celery刷新模式下刷新不会等待上游，直接返回物化充电桩列表；
+        否则仍由异步服务并发刷新过期的充电桩。
+        """
+        try:
+            if Config.FLEET_VIEW_ENABLED and (Config.SHARED_STATE_ENABLED or Config.ENABLE_ASYNC):
+                from app.services.station_service import get_stations_listing
+                with stage('fleet_view'):
+                    version, body = await self.service.run_sync(get_stations_listing)
+                return 200, body, ('stations', version)
+            stations_data = await self.service.get_all_active_stations()
+            with stage('serialize'):
+                return 200, self._json({'stations': stations_data}), None
+        except Exception as e:
+            return 500, self._json({'error': str(e), 'stations': []}), None
+
+    async def get_ports(self):
+        """获取默认充电桩的端口状态API"""
+        try:
+            ports = await self.service.get_default_ports()
+            with stage('serialize'):
+                return 200, self._json({'ports': ports}), None
+        except Exception as e:
+            return 500, self._json({'error': str(e), 'ports': []}), None
+
+def create_asgi_app(config_name: str = None) -> AsyncAPIApp:
+    """创建ASGI应用
+
+    Args:
+        config_name: 配置名称，如 'development', 'production', 'testing'
+
+    Returns:
+        AsyncAPIApp: ASGI应用实例
+    """
+    if config_name is None:
+        config_name = os.environ.get('FLASK_ENV', 'development')
+    flask_app = create_app(config_name)
+    # 作为服务启动时预热缓存
+    from app.services.warmup_service import warm_cache_on_start
+    warm_cache_on_start(flask_app)
+    return AsyncAPIApp(flask_app)
@@ -6,6 +6,7 @@
 
 from app.blueprints.main import main_bp
 from app.blueprints.api import api_bp
+from app.blueprints.metrics import metrics_bp
 
 # 导出所有蓝图，方便应用初始化时注册
-all_blueprints = [main_bp, api_bp] 
\ No newline at end of file
+all_blueprints = [main_bp, api_bp, metrics_bp] 
\ No newline at end of file
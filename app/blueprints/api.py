@@ -4,13 +4,20 @@
 这个模块负责提供RESTful API接口。
 """
 
-from typing import Dict, List, Tuple, Union
-from flask import Blueprint, jsonify
-from app.services.station_service import get_default_station, update_station_status, get_all_active_stations
+from typing import Dict, List, Optional, Tuple, Union
+from flask import Blueprint, jsonify, request, current_app
+from app.config import Config
+from app.services.station_service import get_default_station, update_station_status, get_all_active_stations, get_fleet_summary, find_nearest_stations, get_stations_page, get_station_by_id, get_stations_listing
+from app.services.provisioning_service import parse_import_data, detect_format, provision_stations
+from app.timing import stage
+from app.compression import compress_response, set_response_version
 
 # 创建蓝图
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
+# 按 Accept-Encoding 压缩JSON响应
+api_bp.after_request(compress_response)
+
 @api_bp.route('/ports')
 def get_ports() -> Tuple[Dict[str, Union[List, str]], int]:
     """获取默认充电桩的端口状态API"""
@@ -21,11 +28,140 @@ def get_ports() -> Tuple[Dict[str, Union[List, str]], int]:
     except Exception as e:
         return jsonify({'error': str(e), 'ports': []}), 500
 
+# 分页参数上限
+MAX_PAGE_SIZE = 500
+
+def _get_int_arg(name: str, minimum: Optional[int] = None) -> Optional[int]:
+    """读取整数查询参数
+    
+    Args:
+        name: 参数名
+        minimum: 允许的最小值
+        
+    Returns:
+        Optional[int]: 参数值，未提供时返回None
+        
+    Raises:
+        ValueError: 参数不是整数或小于最小值
+    """
+    value = request.args.get(name)
+    if value is None:
+        return None
+    try:
+        number = int(value)
+    except ValueError:
+        raise ValueError(f"参数 {name} 必须是整数: {value}")
+    if minimum is not None and number < minimum:
+        raise ValueError(f"参数 {name} 不能小于 {minimum}: {value}")
+    return number
+
 @api_bp.route('/stations')
 def get_stations() -> Tuple[Dict[str, Union[List, str]], int]:
-    """获取所有充电桩状态的API"""
+    """获取所有充电桩状态的API
+    
+    支持可选的游标分页（limit、cursor）和筛选（status、min_free、prefix），
+    未提供任何参数时返回全部充电桩，启用物化列表时直接返回预编码的响应体。
+    """
+    try:
+        if not any(key in request.args for key in ('limit', 'cursor', 'status', 'min_free', 'prefix')):
+            if Config.FLEET_VIEW_ENABLED:
+                with stage('fleet_view'):
+                    version, body = get_stations_listing()
+                set_response_version('stations', version)
+                return current_app.response_class(body, mimetype='application/json'), 200
+            stations_data = get_all_active_stations()
+            with stage('serialize'):
+                return jsonify({'stations': stations_data}), 200
+        
+        try:
+            limit = _get_int_arg('limit')
+            if limit is not None:
+                limit = min(max(limit, 1), MAX_PAGE_SIZE)
+            page = get_stations_page(
+                limit=limit,
+                cursor=request.args.get('cursor'),
+                status=request.args.get('status'),
+                min_free=_get_int_arg('min_free', minimum=0),
+                prefix=request.args.get('prefix')
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e), 'stations': []}), 400
+        with stage('serialize'):
+            return jsonify(page), 200
+    except Exception as e:
+        return jsonify({'error': str(e), 'stations': []}), 500 
+
+@api_bp.route('/stations/import', methods=['POST'])
+def import_stations() -> Tuple[Dict[str, Union[Dict, str]], int]:
+    """批量导入充电桩和端口的API
+    
+    接受上传的文件（表单字段 file）或请求体，格式由 format 参数、文件扩展名或 Content-Type 决定（csv/json）。
+    """
+    try:
+        upload = request.files.get('file')
+        if upload is not None:
+            data = upload.read()
+            data_format = request.args.get('format') or detect_format(upload.filename, upload.mimetype)
+        else:
+            data = request.get_data()
+            data_format = request.args.get('format') or detect_format(content_type=request.mimetype)
+        try:
+            stations = parse_import_data(data, data_format)
+        except ValueError as e:
+            return jsonify({'error': str(e), 'result': {}}), 400
+        return jsonify({'result': provision_stations(stations)}), 200
+    except Exception as e:
+        return jsonify({'error': str(e), 'result': {}}), 500
+
+@api_bp.route('/stations/<station_id>')
+def get_station(station_id: str) -> Tuple[Dict[str, Union[List, str]], int]:
+    """获取特定充电桩状态的API"""
     try:
-        stations_data = get_all_active_stations()
+        station_data = get_station_by_id(station_id)
+        if station_data is None:
+            return jsonify({'error': f'充电桩 {station_id} 不存在', 'station': None}), 404
+        with stage('serialize'):
+            return jsonify({'station': station_data}), 200
+    except Exception as e:
+        return jsonify({'error': str(e), 'station': None}), 500
+
+@api_bp.route('/summary')
+def get_summary() -> Tuple[Dict[str, Union[List, str]], int]:
+    """获取全部充电桩汇总统计的API"""
+    try:
+        return jsonify({'summary': get_fleet_summary()}), 200
+    except Exception as e:
+        return jsonify({'error': str(e), 'summary': {}}), 500
+
+
+@api_bp.route('/stations/nearest')
+def get_nearest_stations() -> Tuple[Dict[str, Union[List, str]], int]:
+    """获取附近有空闲端口的充电桩API"""
+    try:
+        latitude = request.args.get('lat', type=float)
+        longitude = request.args.get('lon', type=float)
+        if latitude is None or longitude is None:
+            return jsonify({'error': '缺少或无效的经纬度参数', 'stations': []}), 400
+        k = min(max(request.args.get('k', 5, type=int), 1), 50)
+        min_free = max(request.args.get('min_free', 1, type=int), 0)
+        stations_data = find_nearest_stations(latitude, longitude, k, min_free)
         return jsonify({'stations': stations_data}), 200
     except Exception as e:
-        return jsonify({'error': str(e), 'stations': []}), 500 
\ No newline at end of file
+        return jsonify({'error': str(e), 'stations': []}), 500
+
+@api_bp.route('/pool')
+def get_pool() -> Tuple[Dict[str, Union[List, str]], int]:
+    """获取当前进程数据库连接池（以及原生Redis缓存连接池）统计的API"""
+    try:
+        from app.models.port_status import db
+        from app.db_pool import get_pool_stats
+        from app.cache import cache
+        from app.redis_backend import NativeRedisCache
+        pools = {str(bind_key or 'default'): get_pool_stats(engine)
+                 for bind_key, engine in db.engines.items()}
+        result = {'pools': pools}
+        if isinstance(cache.cache, NativeRedisCache):
+            result['cache_pool'] = cache.cache.pool_stats()
+        return jsonify(result), 200
+    except Exception as e:
+        return jsonify({'error': str(e), 'pools': {}}), 500
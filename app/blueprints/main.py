@@ -4,18 +4,56 @@
 这个模块负责主页面的渲染和展示。
 """
 
-from flask import Blueprint, render_template
-from app.services.station_service import get_all_active_stations
+from flask import Blueprint, Response, render_template, get_template_attribute, current_app
+from markupsafe import Markup
+from app.config import Config
+from app.services.station_service import get_all_active_stations, get_stations_listing
+from app.fleet_view import fleet_view
+from app.fragment_cache import station_card_cache
+from app.compression import compress_response, set_response_version
+from app.timing import stage
 
 # 创建蓝图
 main_bp = Blueprint('main', __name__)
+main_bp.after_request(compress_response)
+
+def render_index_page() -> Response:
+    """渲染带充电桩卡片的主页
+
+    启用物化列表时复用未变化充电桩的已渲染片段，列表未变化时直接返回上次渲染的页面；
+    否则逐个渲染所有充电桩。
+
+    Returns:
+        Response: 主页响应
+    """
+    station_card = get_template_attribute('_station_card.html', 'station_card')
+    if not Config.FLEET_VIEW_ENABLED:
+        stations_data = get_all_active_stations()
+        with stage('render'):
+            station_cards = Markup('\n'.join(str(station_card(station)) for station in stations_data))
+            return current_app.response_class(render_template('index.html', station_cards=station_cards),
+                                              mimetype='text/html')
+
+    # 与 /api/stations 共用物化列表，按相同的节奏同步和刷新
+    with stage('fleet_view'):
+        get_stations_listing()
+    with stage('render'):
+        version, page = station_card_cache.render(
+            fleet_view, station_card,
+            lambda station_cards: render_template('index.html', station_cards=station_cards))
+    set_response_version('index', version)
+    return current_app.response_class(page, mimetype='text/html')
 
 @main_bp.route('/')
-def index() -> str:
-    """渲染主页，显示所有充电桩的状态"""
+def index() -> Response:
+    """渲染主页，显示所有充电桩的状态
+
+    INDEX_RENDER_MODE 为 shell 时只返回页面骨架，充电桩数据由前端从 /api/stations 加载。
+    """
+    if Config.INDEX_RENDER_MODE == 'shell':
+        set_response_version('index', 'shell')
+        return render_template('index.html', station_cards=None)
     try:
-        # 获取所有激活的充电桩
-        stations_data = get_all_active_stations()
-        return render_template('index.html', stations=stations_data)
+        return render_index_page()
     except Exception as e:
-        return render_template('index.html', stations=[], error=str(e)) 
\ No newline at end of file
+        return render_template('index.html', station_cards=None, error=str(e))
@@ -0,0 +1,17 @@
+"""
+充电桩监控系统 - 指标蓝图模块
+
+这个模块负责提供Prometheus格式的 /metrics 接口。
+"""
+
+from flask import Blueprint, Response
+from prometheus_client import CONTENT_TYPE_LATEST
+from app.metrics import render_metrics
+
+# 创建蓝图
+metrics_bp = Blueprint('metrics', __name__)
+
+@metrics_bp.route('/metrics')
+def metrics() -> Response:
+    """导出指标，多进程部署时汇总所有工作进程的数据"""
+    return Response(render_metrics(), mimetype=CONTENT_TYPE_LATEST)
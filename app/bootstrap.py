@@ -0,0 +1,43 @@
+"""
+充电桩监控系统 - 数据库引导模块
+
+这个模块负责一次性的数据库引导工作（创建数据库），由部署流程显式执行，
+不再在每次创建应用时执行，使Web和Celery工作进程启动时不依赖MySQL。
+"""
+
+import logging
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import SQLAlchemyError
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+def ensure_database(db_config) -> bool:
+    """确保数据库存在，不存在则创建
+
+    Args:
+        db_config: 配置类，需要包含 DB_USER、DB_PASSWORD、DB_HOST、DB_NAME
+
+    Returns:
+        bool: 数据库是否已准备好
+    """
+    db_url = f"mysql+pymysql://{db_config.DB_USER}:{db_config.DB_PASSWORD}@{db_config.DB_HOST}"
+    logger.info(f"正在连接数据库 {db_config.DB_HOST}...")
+
+    engine = create_engine(db_url, pool_pre_ping=True)
+    try:
+        with engine.connect() as conn:
+            logger.info(f"正在创建数据库 {db_config.DB_NAME}...")
+            conn.execute(text(
+                f"CREATE DATABASE IF NOT EXISTS {db_config.DB_NAME} "
+                f"CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci"
+            ))
+            conn.commit()
+            logger.info(f"数据库 {db_config.DB_NAME} 已准备好")
+        return True
+    except SQLAlchemyError as e:
+        logger.error(f"数据库连接错误: {str(e)}")
+        logger.error(f"请检查数据库配置是否正确，用户名: {db_config.DB_USER}, 主机: {db_config.DB_HOST}")
+        return False
+    finally:
+        engine.dispose()
@@ -6,11 +6,15 @@
 
 import os
 import json
+import time
+import threading
 import logging
-from typing import Dict, Any, Optional, Union, List
-from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, Union, List, Iterable
 from flask_caching import Cache
+from flask_caching.backends import SimpleCache
 from app.config import Config
+from app.metrics import CACHE_REQUESTS
+from app.redis_backend import NativeRedisCache
 
 # 配置日志
 logger = logging.getLogger(__name__)
@@ -28,12 +32,16 @@ def init_cache(app):
         # 测试环境或指定SimpleCache时使用简单字典缓存
         config = {
             'CACHE_TYPE': 'SimpleCache',
-            'CACHE_DEFAULT_TIMEOUT': Config.CACHE_TIMEOUT
+            'CACHE_DEFAULT_TIMEOUT': Config.CACHE_TIMEOUT,
+            'CACHE_THRESHOLD': Config.CACHE_THRESHOLD
         }
     else:
-        # 生产环境使用Redis缓存
+        # 生产环境使用Redis缓存，默认使用自行管理连接池的原生客户端
+        cache_type = cache_type or 'RedisCache'
+        if cache_type == 'RedisCache' and Config.REDIS_NATIVE_CLIENT:
+            cache_type = 'app.redis_backend.NativeRedisCache'
         config = {
-            'CACHE_TYPE': cache_type or 'RedisCache',
+            'CACHE_TYPE': cache_type,
             'CACHE_REDIS_HOST': Config.REDIS_HOST,
             'CACHE_REDIS_PORT': Config.REDIS_PORT,
             'CACHE_REDIS_PASSWORD': Config.REDIS_PASSWORD,
@@ -47,6 +55,94 @@ def init_cache(app):
     logger.info(f"缓存已初始化，类型: {config['CACHE_TYPE']}")
     return cache
 
+# 命名空间版本号：充电桩相关的缓存键中包含全局版本号和充电桩系列（ID前两位）的版本号，
+# 失效全部或某个系列只需把对应版本号原子加1，旧版本的键不再被读取，按各自的有效期自然过期
+NAMESPACE_ALL = 'ns:all'
+
+# 进程内缓存的命名空间版本号：命名空间 -> (版本号, 读取时间)
+_namespace_versions: Dict[str, tuple] = {}
+_namespace_lock = threading.Lock()
+
+def station_series(station_id: str) -> str:
+    """充电桩所属的系列（ID前两位），与 STATION_PORT_CONFIG 的系列配置一致"""
+    return station_id[:2]
+
+def _series_namespace(series: str) -> str:
+    return f"ns:series:{series}"
+
+def _get_namespace_versions(namespaces: Iterable[str]) -> Dict[str, int]:
+    """获取命名空间版本号
+    
+    进程内缓存 Config.CACHE_NAMESPACE_TTL 秒，过期的命名空间通过一次 get_many 读取，
+    因此其他进程的失效最多延迟这么久才在本进程生效。
+    """
+    now = time.monotonic()
+    versions, missing = {}, []
+    with _namespace_lock:
+        for namespace in namespaces:
+            entry = _namespace_versions.get(namespace)
+            if entry is not None and now - entry[1] < Config.CACHE_NAMESPACE_TTL:
+                versions[namespace] = entry[0]
+            else:
+                missing.append(namespace)
+    if missing:
+        values = cache.get_many(*missing)
+        with _namespace_lock:
+            for namespace, value in zip(missing, values):
+                versions[namespace] = int(value) if value is not None else 0
+                _namespace_versions[namespace] = (versions[namespace], now)
+    return versions
+
+def _station_keys(kind: str, station_ids: List[str]) -> List[str]:
+    """生成带命名空间版本号的缓存键，格式为 {kind}:{全局版本}.{系列版本}:{充电桩ID}
+    
+    Args:
+        kind: 键类型，如 station、fault
+        station_ids: 充电桩ID列表
+        
+    Returns:
+        List[str]: 与 station_ids 顺序一致的缓存键
+    """
+    series_namespaces = [_series_namespace(station_series(station_id)) for station_id in station_ids]
+    versions = _get_namespace_versions({NAMESPACE_ALL, *series_namespaces})
+    generation = versions[NAMESPACE_ALL]
+    return [f"{kind}:{generation}.{versions[namespace]}:{station_id}"
+            for station_id, namespace in zip(station_ids, series_namespaces)]
+
+def _station_key(kind: str, station_id: str) -> str:
+    return _station_keys(kind, [station_id])[0]
+
+def _bump_namespace(namespace: str) -> Optional[int]:
+    """把命名空间版本号原子加1，并立即更新本进程缓存的版本号"""
+    version = cache.cache.inc(namespace)
+    if version is not None:
+        with _namespace_lock:
+            _namespace_versions[namespace] = (int(version), time.monotonic())
+    return version
+
+def _native_backend() -> Optional[NativeRedisCache]:
+    """当前使用原生Redis后端时返回该后端，否则返回None"""
+    backend = cache.cache
+    return backend if isinstance(backend, NativeRedisCache) else None
+
+def claim_warmup() -> bool:
+    """争取执行启动预热的权利
+    
+    使用 add（键不存在时才写入）保证共享缓存在有效期内只被一个进程预热。
+    
+    Returns:
+        bool: 当前进程是否应当执行预热
+    """
+    try:
+        return bool(cache.add('warmup:claimed', 1, timeout=Config.CACHE_SNAPSHOT_MAX_AGE))
+    except Exception as e:
+        logger.error(f"检查缓存预热标记时出错: {str(e)}")
+        return False
+
+# 充电桩状态的键类型。状态的时效完全由键的有效期（Config.CACHE_TIMEOUT）表示，键存在即有效；
+# 值中不再嵌入时间戳，使用新的键类型使旧格式的值不会被读取，随有效期自然过期
+STATUS_KEY = 'status'
+
 def set_station_status(station_id: str, status_data: Dict[str, Any]) -> bool:
     """存储充电桩状态到缓存
     
@@ -58,19 +154,61 @@ def set_station_status(station_id: str, status_data: Dict[str, Any]) -> bool:
         bool: 是否成功缓存
     """
     try:
-        # 添加时间戳
-        cache_data = {
-            'timestamp': datetime.now().isoformat(),
-            'data': status_data
-        }
-        # 将数据存入缓存
-        cache.set(f"station:{station_id}", json.dumps(cache_data))
+        cache.set(_station_key(STATUS_KEY, station_id), json.dumps(status_data), timeout=Config.CACHE_TIMEOUT)
         logger.debug(f"充电桩 {station_id} 状态已缓存")
         return True
     except Exception as e:
         logger.error(f"缓存充电桩 {station_id} 状态时出错: {str(e)}")
         return False
 
+def set_station_statuses(statuses: Dict[str, Dict[str, Any]]) -> int:
+    """批量存储多个充电桩状态到缓存
+
+    Redis缓存下通过一次pipeline写入所有键，用于冷启动时的缓存预热。
+
+    Args:
+        statuses: 充电桩ID到状态数据的映射
+
+    Returns:
+        int: 成功缓存的充电桩数量
+    """
+    if not statuses:
+        return 0
+    try:
+        station_ids = list(statuses)
+        mapping = {
+            key: json.dumps(statuses[station_id])
+            for station_id, key in zip(station_ids, _station_keys(STATUS_KEY, station_ids))
+        }
+        cache.set_many(mapping, timeout=Config.CACHE_TIMEOUT)
+        logger.debug(f"已批量缓存 {len(mapping)} 个充电桩状态")
+        return len(mapping)
+    except Exception as e:
+        logger.error(f"批量缓存充电桩状态时出错: {str(e)}")
+        return 0
+
+def get_station_statuses(station_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """批量从缓存获取多个充电桩状态
+
+    Args:
+        station_ids: 充电桩ID列表
+
+    Returns:
+        Dict[str, Dict[str, Any]]: 充电桩ID到状态数据的映射，未缓存或已过期的充电桩不包含在内
+    """
+    if not station_ids:
+        return {}
+    try:
+        values = cache.get_many(*_station_keys(STATUS_KEY, station_ids))
+        statuses = {}
+        for station_id, cached_data in zip(station_ids, values):
+            if cached_data:
+                statuses[station_id] = json.loads(cached_data)
+        return statuses
+    except Exception as e:
+        logger.error(f"批量获取充电桩缓存状态时出错: {str(e)}")
+        return {}
+
 def get_station_status(station_id: str) -> Optional[Dict[str, Any]]:
     """从缓存获取充电桩状态
     
@@ -78,71 +216,219 @@ def get_station_status(station_id: str) -> Optional[Dict[str, Any]]:
         station_id: 充电桩ID
         
     Returns:
-        Optional[Dict[str, Any]]: 充电桩状态数据，如果不存在则返回None
+        Optional[Dict[str, Any]]: 充电桩状态数据，如果不存在或已过期则返回None
     """
     try:
-        # 从缓存获取数据
-        cached_data = cache.get(f"station:{station_id}")
+        cached_data = cache.get(_station_key(STATUS_KEY, station_id))
         if cached_data:
-            # 解析缓存数据
-            data = json.loads(cached_data)
+            CACHE_REQUESTS.labels('hit').inc()
             logger.debug(f"从缓存获取到充电桩 {station_id} 状态")
-            
-            # 验证缓存是否有效
-            if is_cache_valid(station_id, data):
-                return data['data']
-            else:
-                logger.debug(f"充电桩 {station_id} 缓存已过期")
-                return None
+            return json.loads(cached_data)
                 
+        CACHE_REQUESTS.labels('miss').inc()
         logger.debug(f"缓存中未找到充电桩 {station_id} 状态")
         return None
     except Exception as e:
         logger.error(f"获取充电桩 {station_id} 缓存状态时出错: {str(e)}")
         return None
 
-def is_cache_valid(station_id: str, cached_data: Optional[Dict[str, Any]] = None) -> bool:
-    """检查缓存是否有效
+def set_station_faults(station_id: str, faulty_ports: List[int]) -> bool:
+    """缓存充电桩的故障端口
+    
+    故障变化很少，使用比端口状态更长的有效期 Config.FAULT_CACHE_TIMEOUT，过期后由缓存自动删除。
     
     Args:
         station_id: 充电桩ID
-        cached_data: 已经获取的缓存数据，如果为None则会从缓存中获取
+        faulty_ports: 故障端口号列表
         
     Returns:
-        bool: 缓存是否有效
+        bool: 是否成功缓存
+    """
+    try:
+        cache.set(_station_key('fault', station_id), json.dumps(faulty_ports), timeout=Config.FAULT_CACHE_TIMEOUT)
+        return True
+    except Exception as e:
+        logger.error(f"缓存充电桩 {station_id} 故障端口时出错: {str(e)}")
+        return False
+
+def get_station_faults(station_id: str) -> Optional[List[int]]:
+    """从缓存获取充电桩的故障端口
+    
+    Args:
+        station_id: 充电桩ID
+        
+    Returns:
+        Optional[List[int]]: 故障端口号列表，未缓存或已过期时返回None
     """
     try:
-        # 如果没有提供缓存数据，则从缓存获取
-        if cached_data is None:
-            cached_data_str = cache.get(f"station:{station_id}")
-            if not cached_data_str:
-                return False
-            cached_data = json.loads(cached_data_str)
+        cached_data = cache.get(_station_key('fault', station_id))
+        return json.loads(cached_data) if cached_data else None
+    except Exception as e:
+        logger.error(f"获取充电桩 {station_id} 故障端口缓存时出错: {str(e)}")
+        return None
+
+# 原子递增版本号并以新版本号为键写入变更记录，一次往返完成
+_RECORD_CHANGE_SCRIPT = """
+local version = redis.call('INCR', KEYS[1])
+redis.call('SET', ARGV[1] .. version, ARGV[2], 'EX', tonumber(ARGV[3]))
+return version
+"""
+
+def record_fleet_change(station_id: str) -> Optional[int]:
+    """记录一次充电桩状态变更，供其他进程增量同步物化列表
+    
+    共享版本号原子加1，变更记录以新版本号为键保存 Config.FLEET_VIEW_MAX_AGE 秒。
+    使用原生Redis后端时两步在一个Lua脚本中完成。
+    
+    Args:
+        station_id: 充电桩ID
         
-        # 获取缓存时间戳和当前时间
-        timestamp_str = cached_data.get('timestamp')
-        if not timestamp_str:
-            return False
-            
-        cache_time = datetime.fromisoformat(timestamp_str)
-        current_time = datetime.now()
+    Returns:
+        Optional[int]: 变更后的共享版本号，出错时返回None
+    """
+    try:
+        backend = _native_backend()
+        if backend is not None:
+            script = backend.script(_RECORD_CHANGE_SCRIPT)
+            return int(script(keys=[backend.full_key('fleet_view:version')],
+                              args=[backend.full_key('fleet_view:change:'), backend.dump_value(station_id),
+                                    Config.FLEET_VIEW_MAX_AGE]))
+        version = cache.cache.inc('fleet_view:version')
+        if version is not None:
+            cache.set(f"fleet_view:change:{version}", station_id, timeout=Config.FLEET_VIEW_MAX_AGE)
+        return version
+    except Exception as e:
+        logger.error(f"记录充电桩 {station_id} 变更时出错: {str(e)}")
+        return None
+
+def get_fleet_version() -> Optional[int]:
+    """获取物化列表的共享版本号
+    
+    Returns:
+        Optional[int]: 共享版本号，尚无变更或出错时返回None
+    """
+    try:
+        version = cache.get('fleet_view:version')
+        return int(version) if version is not None else None
+    except Exception as e:
+        logger.error(f"获取物化列表版本号时出错: {str(e)}")
+        return None
+
+def get_fleet_changes(first: int, last: int) -> List[Optional[str]]:
+    """批量获取一段版本号范围内的变更记录
+    
+    Args:
+        first: 起始版本号（含）
+        last: 结束版本号（含）
         
-        # 检查缓存是否过期
-        cache_valid = (current_time - cache_time) < timedelta(seconds=Config.CACHE_TIMEOUT)
+    Returns:
+        List[Optional[str]]: 每个版本号对应的充电桩ID，记录缺失（尚未写入或已过期）时为None
+    """
+    if last < first:
+        return []
+    try:
+        return list(cache.get_many(*[f"fleet_view:change:{version}" for version in range(first, last + 1)]))
+    except Exception as e:
+        logger.error(f"获取物化列表变更记录时出错: {str(e)}")
+        return [None] * (last - first + 1)
+
+# 主库写入提交标记，键的有效期即读写一致窗口，所有进程共享
+RECENT_WRITE_KEY = 'db:recent_write'
+
+def mark_recent_write(window: float) -> bool:
+    """记录一次主库写入提交，之后 window 秒内所有进程的副本读取都改读主库
+    
+    Args:
+        window: 读写一致窗口（秒）
         
-        if not cache_valid:
-            logger.debug(f"充电桩 {station_id} 缓存已过期，已经过去 {(current_time - cache_time).total_seconds()} 秒")
+    Returns:
+        bool: 是否成功记录
+    """
+    try:
+        backend = _native_backend()
+        if backend is not None:
+            backend.client.set(backend.full_key(RECENT_WRITE_KEY), 1, px=max(int(window * 1000), 1))
+        else:
+            cache.set(RECENT_WRITE_KEY, time.time() + window, timeout=max(int(window + 0.999), 1))
+        return True
+    except Exception as e:
+        logger.error(f"记录主库写入时出错: {str(e)}")
+        return False
+
+def get_recent_write_remaining() -> Optional[float]:
+    """获取最近一次主库写入提交后读写一致窗口的剩余时间
+    
+    使用原生Redis后端时只需一次 PTTL，窗口由缓存服务端的键有效期决定。
+    
+    Returns:
+        Optional[float]: 剩余秒数，不在窗口内时为0，读取出错时返回None
+    """
+    try:
+        backend = _native_backend()
+        if backend is not None:
+            remaining = backend.client.pttl(backend.full_key(RECENT_WRITE_KEY))
+            return remaining / 1000 if remaining > 0 else 0.0
+        deadline = cache.get(RECENT_WRITE_KEY)
+        return max(deadline - time.time(), 0.0) if deadline else 0.0
+    except Exception as e:
+        logger.error(f"读取主库写入标记时出错: {str(e)}")
+        return None
+
+def is_cache_valid(station_id: str) -> bool:
+    """检查缓存是否有效
+    
+    键存在即有效，只需一次 EXISTS，不读取和解析缓存值；
+    过期由缓存服务端的键有效期决定，不受Web和Worker主机之间时钟偏差影响。
+    
+    Args:
+        station_id: 充电桩ID
         
-        return cache_valid
+    Returns:
+        bool: 缓存是否有效
+    """
+    try:
+        return bool(cache.has(_station_key(STATUS_KEY, station_id)))
     except Exception as e:
         logger.error(f"检查缓存有效性时出错: {str(e)}")
         return False
 
-def invalidate_cache(station_id: str = None) -> bool:
+def get_stale_station_ids(station_ids: List[str]) -> List[str]:
+    """批量找出缓存无效（不存在或已过期）的充电桩
+    
+    使用原生Redis后端时所有 EXISTS 在一次 pipeline 往返中完成。
+    
+    Args:
+        station_ids: 充电桩ID列表
+        
+    Returns:
+        List[str]: 需要刷新的充电桩ID，顺序与输入一致；检查出错时返回全部充电桩
+    """
+    if not station_ids:
+        return []
+    try:
+        keys = _station_keys(STATUS_KEY, station_ids)
+        backend = _native_backend()
+        if backend is not None:
+            pipe = backend.pipeline()
+            for key in keys:
+                pipe.exists(backend.full_key(key))
+            exists = pipe.execute()
+        else:
+            exists = [cache.has(key) for key in keys]
+        return [station_id for station_id, found in zip(station_ids, exists) if not found]
+    except Exception as e:
+        logger.error(f"批量检查缓存有效性时出错: {str(e)}")
+        return list(station_ids)
+
+def invalidate_cache(station_id: str = None, series: str = None) -> bool:
     """使缓存失效
     
+    失效全部或一个系列时只把命名空间版本号原子加1，不扫描、不删除任何键：
+    此后的读写都使用新版本号的键，旧键按各自的有效期过期。
+    
     Args:
-        station_id: 特定充电桩ID，为None时清空所有缓存
+        station_id: 特定充电桩ID，删除该充电桩的状态和故障缓存
+        series: 充电桩系列（ID前两位），使该系列所有充电桩的缓存失效
         
     Returns:
         bool: 操作是否成功
@@ -150,12 +436,14 @@ def invalidate_cache(station_id: str = None) -> bool:
     try:
         if station_id:
             # 清除特定充电桩的缓存
-            cache.delete(f"station:{station_id}")
+            cache.delete_many(_station_key(STATUS_KEY, station_id), _station_key('fault', station_id))
             logger.debug(f"已清除充电桩 {station_id} 的缓存")
+        elif series:
+            version = _bump_namespace(_series_namespace(series))
+            logger.debug(f"已使 {series} 系列充电桩的缓存失效，版本号: {version}")
         else:
-            # 清除所有缓存
-            cache.clear()
-            logger.debug("已清除所有缓存")
+            version = _bump_namespace(NAMESPACE_ALL)
+            logger.debug(f"已使所有充电桩的缓存失效，版本号: {version}")
         return True
     except Exception as e:
         logger.error(f"清除缓存时出错: {str(e)}")
@@ -168,23 +456,36 @@ def get_cached_stations() -> List[str]:
         List[str]: 已缓存的充电桩ID列表
     """
     try:
+        # 只有当前全局版本号的键可能有效
+        generation = _get_namespace_versions([NAMESPACE_ALL])[NAMESPACE_ALL]
+        prefix = f"{STATUS_KEY}:"
+        
         # 根据缓存类型选择不同的方式获取所有键
-        if Config.FLASK_ENV == 'testing' or cache.config.get('CACHE_TYPE') == 'SimpleCache':
+        backend = _native_backend()
+        if backend is not None:
+            # Redis缓存使用SCAN增量匹配键，不阻塞Redis
+            keys = backend.scan_keys(f"{prefix}{generation}.*")
+        elif isinstance(cache.cache, SimpleCache):
             # 字典缓存直接遍历键
-            keys = cache._cache.keys()
+            keys = list(cache.cache._cache.keys())
         else:
-            # Redis缓存使用匹配模式获取键
-            keys = cache._read_client.keys(f"{cache.config.get('CACHE_KEY_PREFIX', '')}station:*") 
+            # 未启用原生客户端时通过 Flask-Caching 的Redis客户端扫描
+            key_prefix = cache.cache._get_prefix()
+            keys = (key.decode('utf-8')[len(key_prefix):] for key in cache.cache._read_client.scan_iter(
+                match=f"{key_prefix}{prefix}{generation}.*", count=1000))
         
-        # 从键中提取充电桩ID
-        station_ids = []
-        prefix = f"{cache.config.get('CACHE_KEY_PREFIX', '')}station:"
+        # 从键中提取充电桩ID，只保留当前命名空间版本的键
+        found_keys, candidates = set(), {}
         for key in keys:
-            if isinstance(key, bytes):
-                key = key.decode('utf-8')
             if key.startswith(prefix):
-                station_id = key[len(prefix):]
-                station_ids.append(station_id)
+                _, _, station_id = key[len(prefix):].partition(':')
+                if station_id:
+                    found_keys.add(key)
+                    candidates[station_id] = None
+        
+        candidates = list(candidates)
+        station_ids = [station_id for station_id, key in zip(candidates, _station_keys(STATUS_KEY, candidates))
+                       if key in found_keys]
                 
         return station_ids
     except Exception as e:
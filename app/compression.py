@@ -0,0 +1,141 @@
+"""
+充电桩监控系统 - 响应压缩模块
+
+这个模块按 Accept-Encoding 协商 brotli 或 gzip 压缩API的JSON响应和主页HTML。
+带版本号的响应（如物化充电桩列表、主页）的压缩结果按版本缓存，内容变化后才重新压缩；
+brotli 为可选依赖，未安装时只使用 gzip。
+"""
+
+import gzip
+import threading
+import logging
+from typing import Dict, List, Optional, Tuple, Hashable
+from flask import g, request, Response
+from werkzeug.datastructures import Accept
+from werkzeug.http import parse_accept_header
+from app.config import Config
+from app.metrics import COMPRESSION_REQUESTS
+from app.timing import stage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 需要压缩的响应类型
+COMPRESSIBLE_MIMETYPES = {'application/json', 'text/html'}
+
+def available_encodings() -> List[str]:
+    """服务端支持的编码，按优先顺序排列"""
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+def negotiate_encoding(accept_encodings: Accept) -> Optional[str]:
+    """根据客户端的 Accept-Encoding 选择编码
+
+    Args:
+        accept_encodings: 解析后的 Accept-Encoding
+
+    Returns:
+        Optional[str]: 'br'、'gzip'，客户端都不接受时返回None
+    """
+    return accept_encodings.best_match(available_encodings())
+
+def parse_accept_encoding(header: Optional[str]) -> Accept:
+    """解析 Accept-Encoding 请求头（供不经过Flask请求对象的ASGI处理器使用）"""
+    return parse_accept_header(header or '')
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """按指定编码压缩
+
+    Args:
+        body: 原始响应体
+        encoding: 'br' 或 'gzip'
+
+    Returns:
+        bytes: 压缩后的响应体
+    """
+    if encoding == 'br':
+        return brotli.compress(body, quality=Config.COMPRESSION_BROTLI_QUALITY)
+    # 固定 mtime，同样的内容得到同样的压缩结果
+    return gzip.compress(body, compresslevel=Config.COMPRESSION_GZIP_LEVEL, mtime=0)
+
+class CompressionCache:
+    """按 (响应键, 编码) 保存最近一个版本的压缩结果"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[Hashable, str], Tuple[Hashable, bytes]] = {}
+
+    def get(self, key: Hashable, version: Hashable, encoding: str, body: bytes) -> bytes:
+        """获取压缩结果，版本变化时重新压缩
+
+        Args:
+            key: 响应键，如 'stations'
+            version: 响应内容的版本号
+            encoding: 编码
+            body: 该版本的原始响应体
+
+        Returns:
+            bytes: 压缩后的响应体
+        """
+        with self._lock:
+            entry = self._entries.get((key, encoding))
+        if entry is not None and entry[0] == version:
+            COMPRESSION_REQUESTS.labels(encoding, 'cached').inc()
+            return entry[1]
+
+        data = compress(body, encoding)
+        COMPRESSION_REQUESTS.labels(encoding, 'compressed').inc()
+        with self._lock:
+            self._entries[(key, encoding)] = (version, data)
+        return data
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+
+# 当前进程的压缩结果缓存
+compression_cache = CompressionCache()
+
+def compress_body(body: bytes, encoding: str, key: Optional[Hashable] = None,
+                  version: Optional[Hashable] = None) -> bytes:
+    """压缩响应体，提供了响应键和版本号时复用缓存的压缩结果"""
+    if key is not None and version is not None:
+        return compression_cache.get(key, version, encoding, body)
+    COMPRESSION_REQUESTS.labels(encoding, 'compressed').inc()
+    return compress(body, encoding)
+
+def set_response_version(key: Hashable, version: Hashable) -> None:
+    """声明当前响应体对应的版本，压缩时按版本复用结果"""
+    g.compression_version = (key, version)
+
+def compress_response(response: Response) -> Response:
+    """after_request 钩子：按 Accept-Encoding 压缩JSON和HTML响应
+
+    Args:
+        response: 响应对象
+
+    Returns:
+        Response: 原响应或压缩后的响应
+    """
+    if (not Config.COMPRESSION_ENABLED or response.status_code != 200 or response.direct_passthrough
+            or 'Content-Encoding' in response.headers or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+    body = response.get_data()
+    if len(body) < Config.COMPRESSION_MIN_SIZE:
+        return response
+
+    key, version = g.pop('compression_version', (None, None))
+    with stage('compress'):
+        response.set_data(compress_body(body, encoding, key, version))
+    response.headers['Content-Encoding'] = encoding
+    return response
@@ -32,6 +32,13 @@ class Config:
     SQLALCHEMY_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 30))
     SQLALCHEMY_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 3600))
     SQLALCHEMY_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 20))
+    SQLALCHEMY_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'true').lower() == 'true'  # 借出连接前检测连接是否可用
+    SQLALCHEMY_ENGINE_OPTIONS = {}  # 显式的引擎参数，优先于上面的连接池配置
+    
+    # 只读副本配置（逗号分隔的数据库地址，留空则所有查询都走主库）
+    REPLICA_DATABASE_URLS = [url.strip() for url in os.environ.get('REPLICA_DATABASE_URLS', '').split(',') if url.strip()]
+    SQLALCHEMY_BINDS = {f"replica_{index}": url for index, url in enumerate(REPLICA_DATABASE_URLS)}
+    READ_YOUR_WRITES_WINDOW = float(os.environ.get('READ_YOUR_WRITES_WINDOW', 5))  # 写入提交后继续读主库的时间（秒）
     
     # API配置
     API_SECRET_KEY = os.environ.get('API_SECRET_KEY')
@@ -39,16 +46,41 @@ class Config:
     API_APPCOMMID = os.environ.get('API_APPCOMMID', 'MCB_INSTANCE_WECHAT_APP')
     API_TOKEN = os.environ.get('API_TOKEN')
     API_TIMEOUT = int(os.environ.get('API_TIMEOUT', 5))  # API请求超时时间（秒）
+    UPSTREAM_ADAPTIVE_TIMEOUT = os.environ.get('UPSTREAM_ADAPTIVE_TIMEOUT', 'true').lower() == 'true'  # 根据观测延迟计算超时
+    UPSTREAM_HEDGE_ENABLED = os.environ.get('UPSTREAM_HEDGE_ENABLED', 'true').lower() == 'true'  # 是否发送对冲请求
+    UPSTREAM_HEDGE_BUDGET = float(os.environ.get('UPSTREAM_HEDGE_BUDGET', 0.05))  # 对冲请求占普通请求的最大比例
+    UPSTREAM_HEDGE_MIN_DELAY = float(os.environ.get('UPSTREAM_HEDGE_MIN_DELAY', 0.05))  # 发送对冲请求前的最短等待（秒）
+    UPSTREAM_LATENCY_WINDOW = int(os.environ.get('UPSTREAM_LATENCY_WINDOW', 500))  # 计算延迟分位数的样本窗口
+    UPSTREAM_BASE_URL = os.environ.get('UPSTREAM_BASE_URL', 'https://app.mamcharge.com').rstrip('/')  # 上游接口地址，压测时可指向本地模拟服务
+    UPSTREAM_FAULT_BASE_URL = os.environ.get('UPSTREAM_FAULT_BASE_URL', 'https://mobile.mamcharge.com').rstrip('/')  # 设备故障接口地址
+    FAULT_STATUS_ENABLED = os.environ.get('FAULT_STATUS_ENABLED', 'true').lower() == 'true'  # 是否查询端口故障
     
     # 缓存配置
     CACHE_TIMEOUT = int(os.environ.get('CACHE_TIMEOUT', 30))  # 缓存过期时间（秒）
     CACHE_TYPE = os.environ.get('CACHE_TYPE', 'RedisCache')  # 缓存类型
+    FAULT_CACHE_TIMEOUT = int(os.environ.get('FAULT_CACHE_TIMEOUT', 600))  # 端口故障缓存过期时间（秒）
+    CACHE_THRESHOLD = int(os.environ.get('CACHE_THRESHOLD', 100000))  # SimpleCache最多保存的键数量，超出后会淘汰
+    CACHE_NAMESPACE_TTL = float(os.environ.get('CACHE_NAMESPACE_TTL', 1.0))  # 缓存命名空间版本号在进程内的缓存时间（秒），其他进程的失效最多延迟这么久生效，0表示每次读取
+    CACHE_WARMUP_ON_START = os.environ.get('CACHE_WARMUP_ON_START', 'true').lower() == 'true'  # 启动时预热缓存
+    CACHE_SNAPSHOT_PATH = os.environ.get(
+        'CACHE_SNAPSHOT_PATH',
+        os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'instance', 'cache_snapshot.json.gz')
+    )  # 缓存快照文件路径
+    CACHE_SNAPSHOT_MAX_AGE = int(os.environ.get('CACHE_SNAPSHOT_MAX_AGE', 600))  # 快照最长可用时间（秒）
+    CACHE_SNAPSHOT_INTERVAL = int(os.environ.get('CACHE_SNAPSHOT_INTERVAL', 60))  # 快照写入间隔（秒）
     
     # Redis配置
     REDIS_HOST = os.environ.get('REDIS_HOST', 'localhost')
     REDIS_PORT = int(os.environ.get('REDIS_PORT', 6379))
     REDIS_PASSWORD = os.environ.get('REDIS_PASSWORD', '')
     REDIS_DB = int(os.environ.get('REDIS_DB', 0))
+    REDIS_NATIVE_CLIENT = os.environ.get('REDIS_NATIVE_CLIENT', 'true').lower() == 'true'  # 缓存是否使用自行管理连接池的原生Redis客户端
+    REDIS_POOL_SIZE = int(os.environ.get('REDIS_POOL_SIZE', 50))  # 每个进程的Redis连接池大小
+    REDIS_POOL_TIMEOUT = float(os.environ.get('REDIS_POOL_TIMEOUT', 2.0))  # 连接池耗尽时等待空闲连接的最长时间（秒）
+    REDIS_SOCKET_TIMEOUT = float(os.environ.get('REDIS_SOCKET_TIMEOUT', 2.0))  # Redis命令读写超时（秒）
+    REDIS_SOCKET_CONNECT_TIMEOUT = float(os.environ.get('REDIS_SOCKET_CONNECT_TIMEOUT', 1.0))  # Redis连接超时（秒）
+    REDIS_SOCKET_KEEPALIVE = os.environ.get('REDIS_SOCKET_KEEPALIVE', 'true').lower() == 'true'  # 是否开启TCP keepalive
+    REDIS_HEALTH_CHECK_INTERVAL = int(os.environ.get('REDIS_HEALTH_CHECK_INTERVAL', 30))  # 连接空闲超过该时间（秒）后使用前先PING，0表示不检查
     
     # Celery配置
     ENABLE_ASYNC = os.environ.get('ENABLE_ASYNC', 'false').lower() == 'true'
@@ -56,6 +88,45 @@ class Config:
     CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND', f'redis://{REDIS_HOST}:{REDIS_PORT}/1')
     CELERY_WORKER_CONCURRENCY = int(os.environ.get('CELERY_WORKER_CONCURRENCY', 4))
     CELERY_TASK_TIMEOUT = int(os.environ.get('CELERY_TASK_TIMEOUT', 300))
+    CELERY_METRICS_PORT = int(os.environ.get('CELERY_METRICS_PORT', 0))  # Celery指标导出端口，0表示不启动
+    
+    # 共享内存状态配置
+    SHARED_STATE_ENABLED = os.environ.get('SHARED_STATE_ENABLED', 'false').lower() == 'true'  # Web进程是否从共享内存读取状态
+    SHARED_STATE_PATH = os.environ.get('SHARED_STATE_PATH', '/dev/shm/mengma_fleet_state')  # 共享状态段文件路径
+    SHARED_STATE_MAX_STATIONS = int(os.environ.get('SHARED_STATE_MAX_STATIONS', 1024))  # 最大充电桩数量
+    SHARED_STATE_PORTS_PER_STATION = int(os.environ.get('SHARED_STATE_PORTS_PER_STATION', 16))  # 每个充电桩的端口记录数
+    SHARED_STATE_POLL_INTERVAL = int(os.environ.get('SHARED_STATE_POLL_INTERVAL', 5))  # 轮询进程刷新间隔（秒）
+    SHARED_STATE_MAX_AGE = int(os.environ.get('SHARED_STATE_MAX_AGE', 30))  # 共享状态最长可用时间（秒）
+    
+    # 空间索引配置
+    GEO_INDEX_CELL_SIZE = float(os.environ.get('GEO_INDEX_CELL_SIZE', 0.005))  # 网格大小（度），约550米
+    GEO_INDEX_MAX_AGE = int(os.environ.get('GEO_INDEX_MAX_AGE', 600))  # 全量重建间隔（秒），用于同步其他进程的变更
+    INDEX_MAINTENANCE_INTERVAL = float(os.environ.get('INDEX_MAINTENANCE_INTERVAL', 5.0))  # 后台线程检查空间索引和列式状态存储是否需要重建的间隔（秒），0表示不启动线程，由请求按需维护
+    
+    # 物化充电桩列表配置
+    FLEET_VIEW_ENABLED = os.environ.get('FLEET_VIEW_ENABLED', 'true').lower() == 'true'  # /api/stations 是否直接返回预编码的列表
+    FLEET_VIEW_SYNC_INTERVAL = float(os.environ.get('FLEET_VIEW_SYNC_INTERVAL', 1.0))  # 同步其他进程变更的最短间隔（秒）
+    FLEET_VIEW_MAX_CHANGES = int(os.environ.get('FLEET_VIEW_MAX_CHANGES', 1000))  # 增量同步的最大变更数，超过时全量同步
+    FLEET_VIEW_MAX_AGE = int(os.environ.get('FLEET_VIEW_MAX_AGE', 300))  # 全量重建间隔（秒），用于同步充电桩的增删
+    
+    # 批量开通配置
+    PROVISION_BATCH_SIZE = int(os.environ.get('PROVISION_BATCH_SIZE', 1000))  # 批量导入时每条INSERT语句的最大行数
+    PROVISION_MAX_ROWS = int(os.environ.get('PROVISION_MAX_ROWS', 5000))  # 单次导入的最大充电桩数量
+    
+    # 主页渲染配置
+    INDEX_RENDER_MODE = os.environ.get('INDEX_RENDER_MODE', 'fragments')  # fragments: 服务端渲染充电桩卡片并按快照版本缓存；shell: 只返回页面骨架，数据由前端从 /api/stations 加载
+    
+    # 响应压缩配置
+    COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', 'true').lower() == 'true'  # 是否压缩API响应
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))  # 小于该字节数的响应不压缩
+    COMPRESSION_GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', 6))  # gzip 压缩级别（1-9）
+    COMPRESSION_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', 5))  # brotli 压缩质量（0-11）
+    
+    # 请求耗时分解配置
+    REQUEST_TIMING_ENABLED = os.environ.get('REQUEST_TIMING_ENABLED', 'false').lower() == 'true'  # 是否记录请求各阶段耗时
+    SERVER_TIMING_HEADER = os.environ.get('SERVER_TIMING_HEADER', 'true').lower() == 'true'  # 是否返回 Server-Timing 响应头
+    SLOW_REQUEST_THRESHOLD_MS = int(os.environ.get('SLOW_REQUEST_THRESHOLD_MS', 1000))  # 慢请求日志阈值（毫秒）
+    SQL_QUERY_WARN_THRESHOLD = int(os.environ.get('SQL_QUERY_WARN_THRESHOLD', 50))  # 单个请求或任务SQL语句数超过该值时记录警告
     
     # 日志配置
     LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
@@ -64,6 +135,8 @@ class Config:
     # 性能优化配置
     BATCH_UPDATE_SIZE = int(os.environ.get('BATCH_UPDATE_SIZE', 10))  # 批量更新大小
     CONNECTION_POOL_SIZE = int(os.environ.get('CONNECTION_POOL_SIZE', 20))  # HTTP连接池大小
+    UPSTREAM_WARMUP_CONNECTIONS = int(os.environ.get('UPSTREAM_WARMUP_CONNECTIONS', 4))  # 工作进程启动时预热的上游连接数
+    UPSTREAM_DNS_CACHE_TTL = int(os.environ.get('UPSTREAM_DNS_CACHE_TTL', 300))  # 上游域名DNS缓存时间（秒），0表示不缓存
     BULK_DB_OPERATION = os.environ.get('BULK_DB_OPERATION', 'true').lower() == 'true'  # 是否启用批量数据库操作
 
 class DevelopmentConfig(Config):
@@ -71,13 +144,20 @@ class DevelopmentConfig(Config):
     DEBUG = True
     LOG_LEVEL = 'DEBUG'
     SQLALCHEMY_ECHO = True
+    SQLALCHEMY_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+    SQLALCHEMY_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 5))
     
 class TestingConfig(Config):
     """测试环境配置"""
     TESTING = True
     CACHE_TYPE = 'SimpleCache'
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_ENGINE_OPTIONS = {}  # SQLite内存库不使用连接池配置
+    REPLICA_DATABASE_URLS = []
+    SQLALCHEMY_BINDS = {}
     ENABLE_ASYNC = False
+    CACHE_WARMUP_ON_START = False
+    INDEX_MAINTENANCE_INTERVAL = 0  # 测试中不启动后台线程，由请求按需维护，查询数量可重复
     
 class ProductionConfig(Config):
     """生产环境配置"""
@@ -86,6 +166,7 @@ class ProductionConfig(Config):
     # 实际生产环境应该有更严格的配置
     LOG_LEVEL = 'WARNING'
     SQLALCHEMY_ECHO = False
+    SQLALCHEMY_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))  # 低于MySQL wait_timeout，避免使用被服务端关闭的连接
 
 # 配置映射
 config = {
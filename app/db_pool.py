@@ -0,0 +1,101 @@
+"""
+充电桩监控系统 - 数据库连接池模块
+
+这个模块负责把连接池配置应用到Flask-SQLAlchemy的引擎上，
+并提供带统计的连接池，记录连接等待时间和获取超时次数。
+"""
+
+import time
+import logging
+import threading
+from typing import Dict, Any
+from sqlalchemy import exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+class InstrumentedQueuePool(QueuePool):
+    """记录连接获取耗时和超时次数的 QueuePool"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            with self._stats_lock:
+                self.timeouts += 1
+            logger.warning(f"获取数据库连接超时: {self.status()}")
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            with self._stats_lock:
+                self.checkouts += 1
+                self.wait_total += waited
+                self.wait_max = max(self.wait_max, waited)
+
+    def stats(self) -> Dict[str, Any]:
+        """获取连接池统计数据
+
+        Returns:
+            Dict[str, Any]: 连接池大小、已借出连接数、溢出连接数以及等待统计
+        """
+        with self._stats_lock:
+            checkouts = self.checkouts
+            return {
+                'size': self.size(),
+                'checked_in': self.checkedin(),
+                'checked_out': self.checkedout(),
+                'overflow': self.overflow(),
+                'checkouts': checkouts,
+                'timeouts': self.timeouts,
+                'wait_avg_ms': round(self.wait_total / checkouts * 1000, 3) if checkouts else 0.0,
+                'wait_total_ms': round(self.wait_total * 1000, 3),
+                'wait_max_ms': round(self.wait_max * 1000, 3)
+            }
+
+def build_engine_options(app_config) -> Dict[str, Any]:
+    """根据应用配置生成引擎参数
+
+    SQLite（测试环境）不使用 QueuePool，此时只保留配置中显式给出的参数。
+
+    Args:
+        app_config: Flask应用配置
+
+    Returns:
+        Dict[str, Any]: 传给 create_engine 的参数
+    """
+    options = dict(app_config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    if app_config.get('SQLALCHEMY_DATABASE_URI', '').startswith('sqlite'):
+        return options
+
+    options.setdefault('poolclass', InstrumentedQueuePool)
+    options.setdefault('pool_size', app_config['SQLALCHEMY_POOL_SIZE'])
+    options.setdefault('max_overflow', app_config['SQLALCHEMY_MAX_OVERFLOW'])
+    options.setdefault('pool_timeout', app_config['SQLALCHEMY_POOL_TIMEOUT'])
+    options.setdefault('pool_recycle', app_config['SQLALCHEMY_POOL_RECYCLE'])
+    options.setdefault('pool_pre_ping', app_config['SQLALCHEMY_POOL_PRE_PING'])
+    return options
+
+def get_pool_stats(engine: Engine) -> Dict[str, Any]:
+    """获取引擎连接池的统计数据
+
+    Args:
+        engine: SQLAlchemy引擎
+
+    Returns:
+        Dict[str, Any]: 连接池统计数据，非 InstrumentedQueuePool 时只返回连接池状态描述
+    """
+    pool = engine.pool
+    if isinstance(pool, InstrumentedQueuePool):
+        return pool.stats()
+    return {'status': pool.status()}
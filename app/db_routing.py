@@ -0,0 +1,114 @@
+"""
+充电桩监控系统 - 读写分离模块
+
+这个模块提供按语句类型选择数据库的会话：数据访问层标记为只读的查询发往只读副本，
+写入以及刷新提交后一段时间内的读取仍发往主库，保证刚写入的数据能被读到。
+写入提交的时间通过缓存共享，Celery工作进程或轮询进程的提交同样会让Web进程改读主库。
+
+只读副本通过 REPLICA_DATABASE_URLS 配置，未配置时所有查询都发往主库。
+"""
+
+import time
+import random
+import functools
+import contextvars
+from typing import Callable, TypeVar
+from sqlalchemy import event
+from flask_sqlalchemy.session import Session
+
+# 只读副本的绑定名称前缀
+REPLICA_BIND_PREFIX = 'replica_'
+
+# 当前调用是否允许读副本
+_replica_reads = contextvars.ContextVar('replica_reads', default=False)
+
+# 本进程读取应发往主库的截止时间（time.monotonic），包括从缓存得知的其他进程的写入
+_read_primary_until = 0.0
+
+# 读写一致窗口（秒），由 init_db_routing 从配置读取
+_read_your_writes_window = 0.0
+
+# 是否通过缓存共享写入提交时间，只在配置了只读副本时开启
+_share_writes = False
+
+F = TypeVar('F', bound=Callable)
+
+def replica_read(func: F) -> F:
+    """将数据访问方法标记为可以读只读副本的装饰器"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        token = _replica_reads.set(True)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _replica_reads.reset(token)
+    return wrapper
+
+def init_db_routing(app) -> None:
+    """从应用配置读取读写一致窗口，配置了只读副本时开启写入时间共享"""
+    global _read_your_writes_window, _share_writes
+    _read_your_writes_window = app.config.get('READ_YOUR_WRITES_WINDOW', 0.0)
+    _share_writes = _read_your_writes_window > 0 and any(
+        key.startswith(REPLICA_BIND_PREFIX) for key in (app.config.get('SQLALCHEMY_BINDS') or {}))
+
+def recently_written() -> bool:
+    """本进程或其他进程（Web、Celery、轮询进程）是否刚提交过写入
+
+    本进程的写入直接判断；其他进程的写入读取缓存中的写入标记（一次 PTTL），
+    标记存在时记下剩余时间，窗口内不再重复读取。标记读取失败时按刚写入处理，读主库。
+    """
+    global _read_primary_until
+    now = time.monotonic()
+    if now < _read_primary_until:
+        return True
+    if not _share_writes:
+        return False
+    from app.cache import get_recent_write_remaining
+    remaining = get_recent_write_remaining()
+    if remaining is None:
+        return True
+    if remaining > 0:
+        _read_primary_until = now + remaining
+        return True
+    return False
+
+class RoutingSession(Session):
+    """读写分离会话
+
+    只有同时满足以下条件的查询才会发往只读副本：
+    由 replica_read 标记的数据访问方法发出、是SELECT语句、当前事务没有写入、
+    任何进程都不在刷新提交后的读写一致窗口内。
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and _replica_reads.get() and clause is not None
+                and getattr(clause, 'is_select', False)
+                and not self.info.get('has_writes')):
+            replicas = [engine for key, engine in self._db.engines.items()
+                        if key and key.startswith(REPLICA_BIND_PREFIX)]
+            if replicas and not recently_written():
+                return random.choice(replicas)
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _mark_writes(session, flush_context):
+    session.info['has_writes'] = True
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _mark_statement_writes(orm_execute_state):
+    # 不经过 flush 的 UPDATE/INSERT/DELETE 语句同样算作写入
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info['has_writes'] = True
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _record_commit(session):
+    global _read_primary_until
+    if session.info.pop('has_writes', False):
+        _read_primary_until = max(_read_primary_until, time.monotonic() + _read_your_writes_window)
+        if _share_writes:
+            from app.cache import mark_recent_write
+            mark_recent_write(_read_your_writes_window)
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _discard_writes(session):
+    session.info.pop('has_writes', None)
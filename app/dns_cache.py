@@ -0,0 +1,76 @@
+"""
+充电桩监控系统 - DNS缓存模块
+
+这个模块为上游接口的域名缓存DNS解析结果，避免连接池新建连接时重复解析。
+只缓存显式登记的域名，其他域名仍直接调用系统解析。
+"""
+
+import time
+import socket
+import logging
+import threading
+from typing import Dict, Iterable, Tuple
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+class DNSCache:
+    """带过期时间的 getaddrinfo 缓存
+
+    Attributes:
+        ttl: 解析结果的有效期（秒）
+        hosts: 需要缓存的域名
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.hosts = set()
+        self._entries: Dict[Tuple, Tuple[float, list]] = {}
+        self._lock = threading.Lock()
+        self._resolve = socket.getaddrinfo
+
+    def getaddrinfo(self, host, port, family=0, type=0, proto=0, flags=0):
+        """与 socket.getaddrinfo 签名一致的带缓存解析"""
+        if host not in self.hosts:
+            return self._resolve(host, port, family, type, proto, flags)
+
+        key = (host, port, family, type, proto, flags)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and entry[0] > now:
+            return entry[1]
+
+        result = self._resolve(host, port, family, type, proto, flags)
+        with self._lock:
+            self._entries[key] = (now + self.ttl, result)
+        return result
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+
+# 进程内的DNS缓存，首次安装时创建
+_dns_cache = None
+
+def install_dns_cache(hosts: Iterable[str], ttl: float) -> DNSCache:
+    """为指定域名启用DNS缓存
+
+    替换 socket.getaddrinfo，requests/urllib3 和 httpx 新建连接时都会经过缓存。
+    重复调用只会追加域名。
+
+    Args:
+        hosts: 需要缓存的域名
+        ttl: 解析结果的有效期（秒）
+
+    Returns:
+        DNSCache: DNS缓存实例
+    """
+    global _dns_cache
+    if _dns_cache is None:
+        _dns_cache = DNSCache(ttl)
+        socket.getaddrinfo = _dns_cache.getaddrinfo
+        logger.debug(f"DNS缓存已启用，有效期 {ttl} 秒")
+    _dns_cache.hosts.update(host for host in hosts if host)
+    return _dns_cache
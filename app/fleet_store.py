@@ -0,0 +1,302 @@
+"""
+充电桩监控系统 - 列式状态存储模块
+
+这个模块用 NumPy 平行数组保存全部端口的最新状态（充电桩序号、端口号、状态码、
+电压、电流、更新时间），由刷新流程保持同步，用于以向量化方式计算全局统计。
+"""
+
+import time
+import threading
+import logging
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+import numpy as np
+from app.shared_state import STATUS_CODES, UNKNOWN_STATUS_CODE
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 空槽位的状态码
+EMPTY_STATUS = -1
+FREE_STATUS = STATUS_CODES['空闲']
+BUSY_STATUS = STATUS_CODES['占用']
+FAULT_STATUS = STATUS_CODES['故障']
+
+# 各列的数据类型和空槽位填充值
+COLUMN_TYPES = {
+    'station_idx': np.int32,
+    'port_number': np.int16,
+    'status_code': np.int16,
+    'voltage': np.float32,
+    'current': np.float32,
+    'updated_at': np.float64
+}
+COLUMN_FILLS = {
+    'station_idx': -1,
+    'port_number': 0,
+    'status_code': EMPTY_STATUS,
+    'voltage': 0.0,
+    'current': 0.0,
+    'updated_at': 0.0
+}
+
+def _to_epoch(timestamp: Optional[str]) -> float:
+    """把ISO格式时间戳转换为epoch秒数"""
+    if not timestamp:
+        return 0.0
+    try:
+        return datetime.fromisoformat(timestamp).timestamp()
+    except (TypeError, ValueError):
+        return 0.0
+
+class FleetStore:
+    """列式充电桩状态存储
+
+    每个充电桩的端口占据一段连续行。端口数不变时原地覆盖，否则旧行被标记为空槽位，
+    新数据追加到末尾；空槽位过多时自动压缩。
+
+    Attributes:
+        station_ids: 充电桩序号到充电桩ID的映射
+        last_sync: 最近一次全量同步的时间（epoch秒）
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self._lock = threading.Lock()
+        self.station_ids: List[str] = []
+        self._station_index: Dict[str, int] = {}
+        self._rows: Dict[str, slice] = {}
+        self._size = 0
+        self._garbage = 0
+        self.last_sync = 0.0
+        # 按充电桩序号统计的端口数和空闲端口数，随更新增量维护
+        self.station_total = np.zeros(64, dtype=np.int32)
+        self.station_free = np.zeros(64, dtype=np.int32)
+        # 按充电桩ID排序的序号及对应ID，新增充电桩时失效
+        self._sorted_order: Optional[np.ndarray] = None
+        self._sorted_ids: Optional[np.ndarray] = None
+        self._allocate(capacity)
+
+    def _allocate(self, capacity: int) -> None:
+        """分配（或扩容）平行数组"""
+        size = getattr(self, '_size', 0)
+
+        def grow(old: Optional[np.ndarray], dtype, fill) -> np.ndarray:
+            array = np.full(capacity, fill, dtype=dtype)
+            if old is not None:
+                array[:size] = old[:size]
+            return array
+
+        for name, dtype in COLUMN_TYPES.items():
+            setattr(self, name, grow(getattr(self, name, None), dtype, COLUMN_FILLS[name]))
+
+    def _clear_rows(self, rows: slice) -> None:
+        """把指定行标记为空槽位"""
+        for name, fill in COLUMN_FILLS.items():
+            getattr(self, name)[rows] = fill
+        self._garbage += rows.stop - rows.start
+
+    def _compact(self) -> None:
+        """移除空槽位，重新排列各充电桩的行"""
+        used = self.station_idx[:self._size] >= 0
+        size = int(used.sum())
+        for name, fill in COLUMN_FILLS.items():
+            array = getattr(self, name)
+            array[:size] = array[:self._size][used]
+            array[size:self._size] = fill
+
+        # 压缩后各充电桩仍然连续，按起始行重新计算区间
+        rows: Dict[str, slice] = {}
+        offset = 0
+        for station_id, old in sorted(self._rows.items(), key=lambda item: item[1].start):
+            count = old.stop - old.start
+            rows[station_id] = slice(offset, offset + count)
+            offset += count
+        self._rows = rows
+        self._size = size
+        self._garbage = 0
+
+    def _update_locked(self, station_id: str, ports: List[Dict[str, Any]]) -> None:
+        """在持有锁的情况下更新单个充电桩"""
+        index = self._station_index.get(station_id)
+        if index is None:
+            index = len(self.station_ids)
+            self.station_ids.append(station_id)
+            self._station_index[station_id] = index
+            self._sorted_order = None
+            if index >= len(self.station_total):
+                self.station_total = np.resize(self.station_total, index * 2)
+                self.station_free = np.resize(self.station_free, index * 2)
+                self.station_total[index:] = 0
+                self.station_free[index:] = 0
+
+        count = len(ports)
+        rows = self._rows.get(station_id)
+        if rows is None or rows.stop - rows.start != count:
+            if rows is not None:
+                self._clear_rows(rows)
+            if self._size + count > len(self.station_idx):
+                self._allocate(max(len(self.station_idx) * 2, self._size + count))
+            rows = slice(self._size, self._size + count)
+            self._size += count
+            self._rows[station_id] = rows
+
+        status_codes = [STATUS_CODES.get(port.get('status'), UNKNOWN_STATUS_CODE) for port in ports]
+        self.station_total[index] = count
+        self.station_free[index] = status_codes.count(FREE_STATUS)
+        self.station_idx[rows] = index
+        self.port_number[rows] = [int(port.get('port') or 0) for port in ports]
+        self.status_code[rows] = status_codes
+        self.voltage[rows] = [float(port.get('voltage') or 0.0) for port in ports]
+        self.current[rows] = [float(port.get('current') or 0.0) for port in ports]
+        self.updated_at[rows] = [_to_epoch(port.get('timestamp')) for port in ports]
+
+        if self._garbage > self._size // 2:
+            self._compact()
+
+    def update_station(self, station_id: str, ports: List[Dict[str, Any]]) -> None:
+        """更新单个充电桩的端口状态
+
+        Args:
+            station_id: 充电桩ID
+            ports: 端口状态数据列表
+        """
+        with self._lock:
+            self._update_locked(station_id, ports)
+
+    def update_stations(self, statuses: Dict[str, Dict[str, Any]]) -> None:
+        """批量更新多个充电桩的端口状态
+
+        Args:
+            statuses: 充电桩ID到状态数据的映射
+        """
+        with self._lock:
+            for station_id, status_data in statuses.items():
+                self._update_locked(station_id, status_data.get('ports', []))
+
+    def retain_stations(self, station_ids: List[str]) -> None:
+        """只保留指定的充电桩
+
+        Args:
+            station_ids: 需要保留的充电桩ID列表
+        """
+        keep = set(station_ids)
+        with self._lock:
+            for station_id in [sid for sid in self._rows if sid not in keep]:
+                self._clear_rows(self._rows.pop(station_id))
+                index = self._station_index[station_id]
+                self.station_total[index] = 0
+                self.station_free[index] = 0
+            if self._garbage:
+                self._compact()
+
+    def sync(self, statuses: Dict[str, Dict[str, Any]]) -> None:
+        """用一组完整的充电桩状态全量同步
+
+        Args:
+            statuses: 所有激活充电桩的ID到状态数据的映射
+        """
+        self.update_stations(statuses)
+        self.retain_stations(list(statuses))
+        self.last_sync = time.time()
+
+    def free_ports(self, station_id: str) -> Optional[int]:
+        """获取单个充电桩的空闲端口数
+
+        Args:
+            station_id: 充电桩ID
+
+        Returns:
+            Optional[int]: 空闲端口数，尚无该充电桩状态时返回None
+        """
+        with self._lock:
+            if station_id not in self._rows:
+                return None
+            return int(self.station_free[self._station_index[station_id]])
+
+    def free_ports_by_station(self) -> Dict[str, int]:
+        """统计每个充电桩的空闲端口数
+
+        Returns:
+            Dict[str, int]: 充电桩ID到空闲端口数的映射，只包含已有状态的充电桩
+        """
+        with self._lock:
+            return {sid: int(self.station_free[self._station_index[sid]]) for sid in self._rows}
+
+    def match_stations(self, min_free: Optional[int] = None, status: Optional[str] = None,
+                       prefix: Optional[str] = None, after: Optional[str] = None,
+                       limit: Optional[int] = None) -> List[str]:
+        """按缓存状态筛选充电桩，结果按充电桩ID升序排列
+
+        Args:
+            min_free: 最少空闲端口数
+            status: 至少有一个端口处于该状态
+            prefix: 充电桩ID前缀（如 '93' 系列）
+            after: 只返回ID大于该值的充电桩，用于游标分页
+            limit: 最多返回数量
+
+        Returns:
+            List[str]: 符合条件的充电桩ID列表，只包含已有状态的充电桩
+
+        Raises:
+            ValueError: 端口状态不是已知的状态
+        """
+        if status is not None and status not in STATUS_CODES:
+            raise ValueError(f"无效的端口状态: {status}，可选值: {'、'.join(STATUS_CODES)}")
+        with self._lock:
+            count = len(self.station_ids)
+            mask = self.station_total[:count] > 0
+            if min_free:
+                mask &= self.station_free[:count] >= min_free
+            if status is not None:
+                size = self._size
+                rows = self.status_code[:size] == STATUS_CODES[status]
+                mask &= np.bincount(self.station_idx[:size][rows], minlength=count) > 0
+
+            if self._sorted_order is None:
+                self._sorted_order = np.argsort(np.array(self.station_ids), kind='stable')
+                self._sorted_ids = np.array(self.station_ids)[self._sorted_order]
+            start, end = 0, count
+            if prefix:
+                start = int(np.searchsorted(self._sorted_ids, prefix, side='left'))
+                end = int(np.searchsorted(self._sorted_ids, prefix + '\uffff', side='left'))
+            if after:
+                start = max(start, int(np.searchsorted(self._sorted_ids, after, side='right')))
+
+            candidates = self._sorted_order[start:end]
+            selected = candidates[mask[candidates]]
+            if limit is not None:
+                selected = selected[:limit]
+            return [self.station_ids[i] for i in selected]
+
+    def summary(self) -> Dict[str, Any]:
+        """计算全局统计
+
+        Returns:
+            Dict[str, Any]: 充电桩数、端口数、空闲/占用/故障端口数、满载充电桩、总电流、总功率等统计
+        """
+        with self._lock:
+            size = self._size
+            status = self.status_code[:size]
+            voltage = self.voltage[:size]
+            current = self.current[:size]
+            station_total = self.station_total[:len(self.station_ids)]
+            station_free = self.station_free[:len(self.station_ids)]
+
+            # 空槽位的电压、电流和时间均为0，不影响求和与最大值
+            fully_occupied = np.flatnonzero((station_total > 0) & (station_free == 0))
+            last_update = float(self.updated_at[:size].max()) if size else 0.0
+
+            return {
+                'stations': len(self._rows),
+                'ports': int(station_total.sum()),
+                'free_ports': int(station_free.sum()),
+                'occupied_ports': int(np.count_nonzero(status == BUSY_STATUS)),
+                'faulty_ports': int(np.count_nonzero(status == FAULT_STATUS)),
+                'fully_occupied_stations': [self.station_ids[i] for i in fully_occupied],
+                'total_current': round(float(current.sum()), 2),
+                'total_power': round(float(np.dot(voltage, current)), 2),
+                'last_update': datetime.fromtimestamp(last_update).isoformat() if last_update else None
+            }
+
+# 当前进程的列式状态存储
+fleet_store = FleetStore()
@@ -0,0 +1,215 @@
+"""
+充电桩监控系统 - 物化充电桩列表模块
+
+这个模块在进程内维护 /api/stations 的完整响应体：每个充电桩预先编码为一段JSON，
+某个充电桩的状态发布后只重新编码这一段，读取时直接返回拼接好的字节串。
+其他进程发布的变更通过缓存中的版本号和变更记录增量同步。
+"""
+
+import json
+import threading
+import logging
+from typing import Dict, Any, List, Optional, Tuple, Iterable
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 响应体的前缀和后缀，与 jsonify({'stations': [...]}) 的结构一致
+BODY_PREFIX = b'{"stations":['
+BODY_SUFFIX = b']}'
+
+def encode_station(station_id: str, name: Optional[str], ports: List[Dict[str, Any]]) -> bytes:
+    """把单个充电桩编码为列表中的一段JSON
+
+    Args:
+        station_id: 充电桩ID
+        name: 充电桩名称
+        ports: 端口状态列表
+
+    Returns:
+        bytes: UTF-8编码的JSON对象
+    """
+    return json.dumps({'station_id': station_id, 'name': name, 'ports': ports},
+                      ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+# 每次刷新都会变化、不代表状态变化的端口字段，判断充电桩是否变化时忽略
+VOLATILE_PORT_FIELDS = ('timestamp',)
+
+def station_state(name: Optional[str], ports: List[Dict[str, Any]]) -> bytes:
+    """计算判断充电桩是否变化所用的状态摘要，不包含 VOLATILE_PORT_FIELDS
+
+    Args:
+        name: 充电桩名称
+        ports: 端口状态列表
+
+    Returns:
+        bytes: 状态相同时相同的字节串
+    """
+    stable_ports = [{key: value for key, value in port.items() if key not in VOLATILE_PORT_FIELDS}
+                    for port in ports]
+    return json.dumps([name, stable_ports], ensure_ascii=False, sort_keys=True,
+                      separators=(',', ':')).encode('utf-8')
+
+class FleetView:
+    """预编码的充电桩列表
+
+    充电桩的顺序和名称在全量构建时确定，之后只按充电桩ID替换对应的片段；
+    响应体在片段变化后的首次读取时重新拼接，之后的读取直接复用。
+    每个片段记录写入时的列表版本号，作为该充电桩的快照版本，供页面片段缓存判断是否需要重新渲染。
+    只有端口时间戳变化的刷新不替换片段、不改变版本号，片段中的时间戳是状态最近一次变化的时间。
+
+    Attributes:
+        version: 本进程响应体的版本号，每次变更加1
+        built_at: 最近一次全量构建的时间（epoch秒），未构建时为0
+        refreshed_at: 最近一次触发过期充电桩刷新的时间（epoch秒）
+        synced_at: 最近一次检查共享版本号的时间（epoch秒）
+        synced_version: 已同步到的共享版本号，为None时表示未知
+    """
+
+    def __init__(self):
+        self.version = 0
+        self.built_at = 0.0
+        self.refreshed_at = 0.0
+        self.synced_at = 0.0
+        self.synced_version: Optional[int] = None
+        self._lock = threading.Lock()
+        self._index: Dict[str, int] = {}
+        self._names: List[Optional[str]] = []
+        self._fragments: List[bytes] = []
+        self._states: List[bytes] = []
+        self._versions: List[int] = []
+        self._body: Optional[bytes] = None
+
+    def __len__(self) -> int:
+        return len(self._fragments)
+
+    def __contains__(self, station_id: str) -> bool:
+        with self._lock:
+            return station_id in self._index
+
+    @property
+    def station_ids(self) -> List[str]:
+        """按列表顺序返回充电桩ID"""
+        with self._lock:
+            return list(self._index)
+
+    def rebuild(self, entries: Iterable[Tuple[str, Optional[str], List[Dict[str, Any]]]], built_at: float,
+                synced_version: Optional[int] = None) -> None:
+        """全量构建列表
+
+        Args:
+            entries: (充电桩ID, 充电桩名称, 端口状态列表) 元组，顺序即列表顺序
+            built_at: 构建时间（epoch秒）
+            synced_version: 构建数据对应的共享版本号
+        """
+        index, names, fragments, states = {}, [], [], []
+        for station_id, name, ports in entries:
+            index[station_id] = len(fragments)
+            names.append(name)
+            fragments.append(encode_station(station_id, name, ports))
+            states.append(station_state(name, ports))
+
+        with self._lock:
+            version = self.version + 1
+            # 状态与重建前相同的充电桩保留原来的片段和快照版本
+            versions = []
+            for station_id, position in index.items():
+                old = self._index.get(station_id)
+                if old is not None and self._states[old] == states[position]:
+                    fragments[position] = self._fragments[old]
+                    versions.append(self._versions[old])
+                else:
+                    versions.append(version)
+            # 顺序和所有充电桩的状态都没有变化时保留响应体和版本号
+            if list(index) != list(self._index) or version in versions:
+                self.version = version
+                self._body = None
+            self._index = index
+            self._names = names
+            self._fragments = fragments
+            self._states = states
+            self._versions = versions
+            self.built_at = built_at
+            self.synced_version = synced_version
+        logger.debug(f"物化充电桩列表已重建，共 {len(fragments)} 个充电桩")
+
+    def update_station(self, station_id: str, ports: List[Dict[str, Any]]) -> bool:
+        """替换单个充电桩的片段
+
+        Args:
+            station_id: 充电桩ID
+            ports: 端口状态列表
+
+        Returns:
+            bool: 片段是否被替换；充电桩不在列表中（等待下次全量构建）或状态没有变化时为False
+        """
+        return self.update_stations({station_id: ports}) > 0
+
+    def update_stations(self, ports_by_station: Dict[str, List[Dict[str, Any]]],
+                        synced_version: Optional[int] = None) -> int:
+        """批量替换充电桩的片段，状态没有变化的充电桩保持不变
+
+        Args:
+            ports_by_station: 充电桩ID到端口状态列表的映射
+            synced_version: 不为None时同时记录已同步到的共享版本号
+
+        Returns:
+            int: 实际替换的充电桩数量
+        """
+        updated = 0
+        with self._lock:
+            version = self.version + 1
+            for station_id, ports in ports_by_station.items():
+                position = self._index.get(station_id)
+                if position is None:
+                    continue
+                name = self._names[position]
+                state = station_state(name, ports)
+                if state == self._states[position]:
+                    continue
+                self._fragments[position] = encode_station(station_id, name, ports)
+                self._states[position] = state
+                self._versions[position] = version
+                updated += 1
+            if updated:
+                self._body = None
+                self.version = version
+            if synced_version is not None:
+                self.synced_version = synced_version
+        return updated
+
+    def body(self) -> Tuple[int, bytes]:
+        """获取完整响应体
+
+        Returns:
+            Tuple[int, bytes]: (版本号, UTF-8编码的JSON响应体)
+        """
+        with self._lock:
+            if self._body is None:
+                self._body = BODY_PREFIX + b','.join(self._fragments) + BODY_SUFFIX
+            return self.version, self._body
+
+    def snapshot(self) -> Tuple[int, List[Tuple[str, int, bytes]]]:
+        """获取每个充电桩的片段及其快照版本
+
+        Returns:
+            Tuple[int, List[Tuple[str, int, bytes]]]: (版本号, 按列表顺序的 (充电桩ID, 快照版本, JSON片段) 列表)
+        """
+        with self._lock:
+            return self.version, list(zip(self._index, self._versions, self._fragments))
+
+    def clear(self) -> None:
+        """清空列表，下次读取时全量构建"""
+        with self._lock:
+            self._index = {}
+            self._names = []
+            self._fragments = []
+            self._states = []
+            self._versions = []
+            self._body = None
+            self.version += 1
+            self.built_at = 0.0
+            self.synced_version = None
+
+# 当前进程的物化充电桩列表
+fleet_view = FleetView()
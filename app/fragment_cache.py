@@ -0,0 +1,77 @@
+"""
+充电桩监控系统 - 页面片段缓存模块
+
+这个模块缓存主页中每个充电桩卡片渲染后的HTML，以物化列表中该充电桩的快照版本为键：
+状态没有变化的充电桩直接复用上次渲染的片段，渲染好的整个页面按列表版本号缓存，
+列表未变化时主页渲染不再随充电桩数量增长。
+"""
+
+import json
+import threading
+import logging
+from typing import Dict, Any, List, Optional, Tuple, Callable
+from markupsafe import Markup
+from app.fleet_view import FleetView
+from app.metrics import FRAGMENT_CACHE_REQUESTS
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+class StationCardCache:
+    """充电桩卡片片段缓存
+
+    Attributes:
+        version: 已缓存页面对应的物化列表版本号，未缓存时为None
+    """
+
+    def __init__(self):
+        self.version: Optional[int] = None
+        self._lock = threading.Lock()
+        self._cards: Dict[str, Tuple[int, str]] = {}
+        self._page: Optional[bytes] = None
+
+    def render(self, view: FleetView, render_card: Callable[[Dict[str, Any]], str],
+               render_page: Callable[[Markup], str]) -> Tuple[int, bytes]:
+        """获取渲染好的页面
+
+        Args:
+            view: 物化充电桩列表
+            render_card: 渲染单个充电桩卡片的函数，参数为充电桩数据
+            render_page: 渲染整个页面的函数，参数为按列表顺序拼接的卡片HTML
+
+        Returns:
+            Tuple[int, bytes]: (物化列表版本号, UTF-8编码的页面)
+        """
+        with self._lock:
+            if self._page is not None and self.version == view.version:
+                FRAGMENT_CACHE_REQUESTS.labels('page_hit').inc()
+                return self.version, self._page
+
+            version, entries = view.snapshot()
+            cards, parts, rendered = {}, [], 0
+            for station_id, station_version, fragment in entries:
+                cached = self._cards.get(station_id)
+                if cached is None or cached[0] != station_version:
+                    cached = (station_version, str(render_card(json.loads(fragment))))
+                    rendered += 1
+                cards[station_id] = cached
+                parts.append(cached[1])
+
+            # 只保留当前列表中的充电桩，已删除充电桩的片段随之释放
+            self._cards = cards
+            self._page = render_page(Markup('\n'.join(parts))).encode('utf-8')
+            self.version = version
+            FRAGMENT_CACHE_REQUESTS.labels('rendered').inc(rendered)
+            FRAGMENT_CACHE_REQUESTS.labels('reused').inc(len(parts) - rendered)
+            logger.debug(f"主页卡片已更新，重新渲染 {rendered} 个，复用 {len(parts) - rendered} 个")
+            return version, self._page
+
+    def clear(self) -> None:
+        """清空缓存的片段"""
+        with self._lock:
+            self._cards = {}
+            self._page = None
+            self.version = None
+
+# 当前进程的充电桩卡片缓存
+station_card_cache = StationCardCache()
@@ -0,0 +1,254 @@
+"""
+充电桩监控系统 - 空间索引模块
+
+这个模块提供基于网格的内存空间索引，用于按距离查找最近的充电桩。
+索引随充电桩的增删改增量更新，查询完全在内存中完成，不访问数据库。
+"""
+
+import math
+import heapq
+import threading
+import logging
+from typing import Dict, List, Optional, Tuple, Callable, NamedTuple
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 地球平均半径（米）
+EARTH_RADIUS = 6371008.8
+# 每纬度对应的距离（米）
+METERS_PER_DEGREE = math.pi * EARTH_RADIUS / 180
+
+class GeoEntry(NamedTuple):
+    """空间索引条目"""
+    station_id: str
+    name: Optional[str]
+    latitude: float
+    longitude: float
+
+class _IndexedEntry(NamedTuple):
+    """索引内部条目，预先计算弧度和纬度余弦以加速距离计算"""
+    entry: GeoEntry
+    phi: float
+    lam: float
+    cos_phi: float
+
+def _indexed(entry: GeoEntry) -> _IndexedEntry:
+    """为条目预计算距离计算所需的值"""
+    phi = math.radians(entry.latitude)
+    return _IndexedEntry(entry, phi, math.radians(entry.longitude), math.cos(phi))
+
+def haversine(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """计算两点间的大圆距离
+
+    Args:
+        lat1: 起点纬度
+        lon1: 起点经度
+        lat2: 终点纬度
+        lon2: 终点经度
+
+    Returns:
+        float: 距离（米）
+    """
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS * math.asin(min(1.0, math.sqrt(a)))
+
+class GeoIndex:
+    """网格空间索引
+
+    把经纬度按固定大小的网格分桶，查询时从所在网格开始逐圈向外扩展，
+    当下一圈的最小可能距离已超过当前第k个结果时停止。
+
+    Attributes:
+        cell_size: 网格大小（度）
+        built_at: 最近一次全量构建的时间（epoch秒），未构建时为0
+    """
+
+    def __init__(self, cell_size: float = 0.005):
+        self.cell_size = cell_size
+        self.built_at = 0.0
+        self._lock = threading.Lock()
+        self._entries: Dict[str, GeoEntry] = {}
+        self._cells: Dict[Tuple[int, int], Dict[str, _IndexedEntry]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _cell(self, latitude: float, longitude: float) -> Tuple[int, int]:
+        """计算坐标所在网格"""
+        return int(math.floor(latitude / self.cell_size)), int(math.floor(longitude / self.cell_size))
+
+    def _remove_locked(self, station_id: str) -> None:
+        """在持有锁的情况下移除条目"""
+        entry = self._entries.pop(station_id, None)
+        if entry is None:
+            return
+        cell = self._cell(entry.latitude, entry.longitude)
+        bucket = self._cells.get(cell)
+        if bucket is not None:
+            bucket.pop(station_id, None)
+            if not bucket:
+                del self._cells[cell]
+
+    def upsert(self, station_id: str, name: Optional[str],
+               latitude: Optional[float], longitude: Optional[float]) -> None:
+        """新增或更新充电桩位置，坐标为空时从索引中移除
+
+        Args:
+            station_id: 充电桩ID
+            name: 充电桩名称
+            latitude: 纬度
+            longitude: 经度
+        """
+        with self._lock:
+            self._remove_locked(station_id)
+            if latitude is None or longitude is None:
+                return
+            entry = GeoEntry(station_id, name, float(latitude), float(longitude))
+            self._entries[station_id] = entry
+            self._cells.setdefault(self._cell(entry.latitude, entry.longitude), {})[station_id] = _indexed(entry)
+
+    def remove(self, station_id: str) -> None:
+        """从索引中移除充电桩
+
+        Args:
+            station_id: 充电桩ID
+        """
+        with self._lock:
+            self._remove_locked(station_id)
+
+    def rebuild(self, entries: List[GeoEntry], built_at: float) -> None:
+        """用一组完整的条目重建索引
+
+        Args:
+            entries: 所有需要索引的条目
+            built_at: 构建时间（epoch秒）
+        """
+        cells: Dict[Tuple[int, int], Dict[str, _IndexedEntry]] = {}
+        for entry in entries:
+            cells.setdefault(self._cell(entry.latitude, entry.longitude), {})[entry.station_id] = _indexed(entry)
+        with self._lock:
+            self._entries = {entry.station_id: entry for entry in entries}
+            self._cells = cells
+            self.built_at = built_at
+        logger.info(f"空间索引已重建，共 {len(entries)} 个充电桩")
+
+    def nearest(self, latitude: float, longitude: float, k: int = 5,
+                predicate: Optional[Callable[[GeoEntry], bool]] = None) -> List[Tuple[float, GeoEntry]]:
+        """查找距离最近的k个充电桩
+
+        Args:
+            latitude: 查询点纬度
+            longitude: 查询点经度
+            k: 返回数量
+            predicate: 可选的过滤函数，返回False的条目被跳过
+
+        Returns:
+            List[Tuple[float, GeoEntry]]: (距离（米）, 条目) 列表，按距离升序排列
+        """
+        with self._lock:
+            if not self._cells or k <= 0:
+                return []
+            center_lat, center_lon = self._cell(latitude, longitude)
+            lat_cells = [cell[0] for cell in self._cells]
+            lon_cells = [cell[1] for cell in self._cells]
+            max_ring = max(abs(center_lat - min(lat_cells)), abs(center_lat - max(lat_cells)),
+                           abs(center_lon - min(lon_cells)), abs(center_lon - max(lon_cells)))
+
+            # 一圈网格对应的最小距离，经度方向按最高纬度处的收缩计算，保证是下界
+            max_abs_lat = min(90.0, abs(latitude) + (max_ring + 1) * self.cell_size)
+            ring_width = self.cell_size * METERS_PER_DEGREE * max(math.cos(math.radians(max_abs_lat)), 1e-6)
+
+            # 堆中按半正矢公式的中间量 a 比较，a 与距离单调对应，最后再换算成距离
+            phi = math.radians(latitude)
+            lam = math.radians(longitude)
+            cos_phi = math.cos(phi)
+            sin, asin, sqrt = math.sin, math.asin, math.sqrt
+            heap: List[Tuple[float, str, GeoEntry]] = []
+            for ring, cell in self._cells_by_ring(center_lat, center_lon, max_ring):
+                if len(heap) >= k and 2 * EARTH_RADIUS * asin(min(1.0, sqrt(-heap[0][0]))) <= (ring - 1) * ring_width:
+                    break
+                for item in self._cells.get(cell, {}).values():
+                    if predicate is not None and not predicate(item.entry):
+                        continue
+                    a = sin((item.phi - phi) / 2) ** 2 + cos_phi * item.cos_phi * sin((item.lam - lam) / 2) ** 2
+                    if len(heap) < k:
+                        heapq.heappush(heap, (-a, item.entry.station_id, item.entry))
+                    elif a < -heap[0][0]:
+                        heapq.heapreplace(heap, (-a, item.entry.station_id, item.entry))
+
+        results = [(2 * EARTH_RADIUS * math.asin(min(1.0, math.sqrt(-neg_a))), entry) for neg_a, _, entry in heap]
+        return sorted(results, key=lambda item: item[0])
+
+    def _cells_by_ring(self, center_lat: int, center_lon: int, max_ring: int):
+        """按圈由内向外生成 (圈号, 网格)
+
+        网格稀疏时（需要遍历的空网格远多于已占用网格）直接对已占用网格按圈号排序。
+        """
+        if (2 * max_ring + 1) ** 2 > 4 * len(self._cells):
+            ring_of = lambda cell: max(abs(cell[0] - center_lat), abs(cell[1] - center_lon))
+            for cell in sorted(self._cells, key=ring_of):
+                yield ring_of(cell), cell
+            return
+
+        yield 0, (center_lat, center_lon)
+        for ring in range(1, max_ring + 1):
+            for d_lon in range(-ring, ring + 1):
+                yield ring, (center_lat - ring, center_lon + d_lon)
+                yield ring, (center_lat + ring, center_lon + d_lon)
+            for d_lat in range(-ring + 1, ring):
+                yield ring, (center_lat + d_lat, center_lon - ring)
+                yield ring, (center_lat + d_lat, center_lon + ring)
+
+# 当前进程的空间索引
+geo_index = GeoIndex()
+
+# 会话中待提交的充电桩位置变更
+SESSION_CHANGES_KEY = 'geo_index_changes'
+
+def _queue_change(target, removed: bool = False) -> None:
+    """记录充电桩位置变更，在事务提交后应用到索引"""
+    session = object_session(target)
+    if session is None:
+        return
+    if removed or not target.is_active:
+        change = (target.station_id, None, None, None)
+    else:
+        change = (target.station_id, target.name, target.latitude, target.longitude)
+    session.info.setdefault(SESSION_CHANGES_KEY, []).append(change)
+
+def _on_station_saved(mapper, connection, target) -> None:
+    """充电桩新增或更新事件"""
+    _queue_change(target)
+
+def _on_station_deleted(mapper, connection, target) -> None:
+    """充电桩删除事件"""
+    _queue_change(target, removed=True)
+
+def _apply_changes(session) -> None:
+    """事务提交后把变更应用到索引"""
+    for station_id, name, latitude, longitude in session.info.pop(SESSION_CHANGES_KEY, []):
+        geo_index.upsert(station_id, name, latitude, longitude)
+
+def _discard_changes(session, *args) -> None:
+    """事务回滚时丢弃未提交的变更"""
+    session.info.pop(SESSION_CHANGES_KEY, None)
+
+def init_geo_index_events(station_model) -> None:
+    """注册充电桩模型变更事件，使空间索引随增删改增量更新
+
+    Args:
+        station_model: 充电桩模型类
+    """
+    if event.contains(station_model, 'after_insert', _on_station_saved):
+        return
+    event.listen(station_model, 'after_insert', _on_station_saved)
+    event.listen(station_model, 'after_update', _on_station_saved)
+    event.listen(station_model, 'after_delete', _on_station_deleted)
+    event.listen(Session, 'after_commit', _apply_changes)
+    event.listen(Session, 'after_rollback', _discard_changes)
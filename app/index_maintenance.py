@@ -0,0 +1,103 @@
+"""
+充电桩监控系统 - 内存索引维护模块
+
+这个模块在每个Web进程处理第一个请求时构建空间索引和列式状态存储，之后由后台线程定期重建和同步，
+使 /api/stations/nearest、/api/summary 和按端口状态筛选的列表在请求路径上只读取内存，不访问数据库。
+"""
+
+import os
+import time
+import threading
+import logging
+from typing import Optional
+from flask import Flask
+from app.config import Config
+from app.models.port_status import db
+from app.fleet_store import fleet_store
+from app.geo_index import geo_index
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 当前进程的维护线程；fork 之后子进程需要重新启动
+_thread: Optional[threading.Thread] = None
+_thread_pid: Optional[int] = None
+_thread_lock = threading.Lock()
+
+def run_index_maintenance(force: bool = False) -> None:
+    """执行一轮维护：空间索引超过 GEO_INDEX_MAX_AGE 未重建时重建，
+    列式状态存储超过 CACHE_TIMEOUT 未同步时同步
+
+    Args:
+        force: 是否忽略间隔立即重建和同步
+    """
+    from app.services.station_service import rebuild_geo_index, sync_fleet_store_if_stale
+    if force or time.time() - geo_index.built_at > Config.GEO_INDEX_MAX_AGE:
+        rebuild_geo_index()
+    if force:
+        fleet_store.last_sync = 0.0
+    sync_fleet_store_if_stale()
+
+def index_maintenance_running() -> bool:
+    """当前进程的维护线程是否在运行"""
+    return _thread is not None and _thread_pid == os.getpid() and _thread.is_alive()
+
+def _maintenance_loop(app: Flask, interval: float) -> None:
+    """维护线程主循环，首轮已在启动线程前同步完成"""
+    while True:
+        time.sleep(interval)
+        with app.app_context():
+            try:
+                run_index_maintenance()
+            except Exception as e:
+                logger.error(f"维护内存索引时出错: {str(e)}")
+            finally:
+                db.session.remove()
+
+def start_index_maintenance(app: Flask) -> bool:
+    """在当前进程中构建空间索引和列式状态存储并启动维护线程，已启动时直接返回
+
+    构建在持有锁时同步完成，同时到达的其他请求等待构建结束，不会读到空的索引。
+    需要在应用上下文中调用。
+
+    Args:
+        app: Flask应用
+
+    Returns:
+        bool: 本次调用是否启动了新线程
+    """
+    global _thread, _thread_pid
+    if index_maintenance_running():
+        return False
+    with _thread_lock:
+        if index_maintenance_running():
+            return False
+        try:
+            run_index_maintenance(force=True)
+        except Exception as e:
+            logger.warning(f"构建内存索引失败: {str(e)}")
+        interval = app.config['INDEX_MAINTENANCE_INTERVAL']
+        _thread = threading.Thread(target=_maintenance_loop, args=(app, interval),
+                                   name='index-maintenance', daemon=True)
+        _thread_pid = os.getpid()
+        _thread.start()
+    logger.info(f"进程 {os.getpid()} 已启动内存索引维护线程，间隔 {interval} 秒")
+    return True
+
+def init_index_maintenance(app: Flask) -> None:
+    """注册维护线程的启动钩子
+
+    索引在每个进程处理第一个请求时构建、线程随后启动，而不是在创建应用时，
+    这样 Celery 和 flask 命令行创建应用时不查询数据库，gunicorn 等预先加载应用再 fork 的服务器中，
+    每个工作进程都有自己的线程。INDEX_MAINTENANCE_INTERVAL 为0时不启动，由请求按需维护。
+
+    Args:
+        app: Flask应用
+    """
+    if app.config.get('INDEX_MAINTENANCE_INTERVAL', 0) <= 0:
+        return
+
+    @app.before_request
+    def ensure_index_maintenance() -> None:
+        if not index_maintenance_running():
+            start_index_maintenance(app)
@@ -7,6 +7,8 @@
 import os
 import sys
 import logging
+from typing import List
+from sqlalchemy import inspect, text
 from sqlalchemy.exc import SQLAlchemyError
 from app import create_app
 from app.models.port_status import db, ChargingStation
@@ -17,6 +19,43 @@ logging.basicConfig(level=logging.INFO,
                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# 模型新增、需要在已有表上补充的列：(模型, 列名)。db.create_all() 不会修改已存在的表
+SCHEMA_UPGRADES = [
+    (ChargingStation, 'latitude'),
+    (ChargingStation, 'longitude'),
+]
+
+def upgrade_schema() -> List[str]:
+    """为已存在的表补充 SCHEMA_UPGRADES 中缺少的列
+
+    可以重复执行：已有的列和尚未创建的表（由 db.create_all() 创建）都会跳过。
+    新增的列都允许为空，不需要回填数据。需要在应用上下文中调用。
+
+    Returns:
+        List[str]: 本次新增的列，格式为 "表名.列名"
+    """
+    engine = db.engine
+    inspector = inspect(engine)
+    tables = set(inspector.get_table_names())
+    columns_by_table = {}
+    added = []
+    with engine.begin() as conn:
+        for model, column_name in SCHEMA_UPGRADES:
+            table = model.__table__
+            if table.name not in tables:
+                continue
+            if table.name not in columns_by_table:
+                columns_by_table[table.name] = {column['name'] for column in inspector.get_columns(table.name)}
+            if column_name in columns_by_table[table.name]:
+                continue
+            column = table.columns[column_name]
+            column_type = column.type.compile(dialect=engine.dialect)
+            conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column_name} {column_type} NULL"))
+            columns_by_table[table.name].add(column_name)
+            added.append(f"{table.name}.{column_name}")
+            logger.info(f"已为表 {table.name} 添加列 {column_name}")
+    return added
+
 def init_database():
     """初始化数据库结构和基础数据"""
     try:
@@ -24,6 +63,13 @@ def init_database():
         config_name = os.environ.get('FLASK_ENV', 'development')
         logger.info(f"使用配置: {config_name} 初始化数据库")
         
+        # 确保数据库存在（测试环境使用内存数据库，不需要创建）
+        if config_name != 'testing':
+            from app.config import config
+            from app.bootstrap import ensure_database
+            if not ensure_database(config[config_name]):
+                return False
+        
         # 创建应用实例
         app = create_app(config_name)
         
@@ -33,6 +79,9 @@ def init_database():
             db.create_all()
             logger.info("数据库表创建完成")
             
+            # 为升级前创建的表补充新增的列
+            upgrade_schema()
+            
             # 检查默认充电桩是否存在
             logger.info("检查默认充电桩...")
             default_station = StationRepository.get_station_by_id('9313600954')
@@ -41,18 +90,17 @@ def init_database():
                 logger.info("创建默认充电桩...")
                 station = StationRepository.create_station(
                     station_id='9313600954',
-                    name='信阳学院充电桩'
+                    name='信阳学院充电桩',
+                    commit=False
                 )
                 
-                # 创建默认端口
+                # 创建默认端口，与充电桩在同一个事务中提交
                 logger.info("创建默认端口...")
-                for i in range(1, 5):
-                    PortRepository.create_port(
-                        station_id='9313600954',
-                        port_number=i,
-                        status='空闲',
-                        service='充电服务'
-                    )
+                PortRepository.bulk_insert_ports([
+                    {'station_id': '9313600954', 'port_number': i, 'status': '空闲', 'service': '充电服务'}
+                    for i in range(1, 5)
+                ])
+                PortRepository.commit()
                 
                 logger.info(f"已创建默认充电桩: {station.name}")
             else:
@@ -0,0 +1,201 @@
+"""
+充电桩监控系统 - 指标模块
+
+这个模块定义刷新链路各阶段的Prometheus指标：上游请求耗时、缓存命中率、
+数据库批量写入和连接池、每个请求和任务的SQL语句数以及Celery任务耗时和队列长度。
+
+多进程部署（gunicorn、prefork Celery）时设置环境变量 PROMETHEUS_MULTIPROC_DIR，
+各进程把指标写入该目录，由 /metrics 或Celery侧的导出服务统一汇总。
+"""
+
+import os
+import logging
+from typing import Iterable, List
+from prometheus_client import (
+    CollectorRegistry, Counter, Histogram, REGISTRY, generate_latest, start_http_server
+)
+from prometheus_client.core import GaugeMetricFamily, CounterMetricFamily
+from prometheus_client import multiprocess
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 上游接口耗时，outcome: success、timeout、request_error、api_error、unknown_error、mock
+UPSTREAM_LATENCY = Histogram(
+    'mengma_upstream_request_seconds', '上游端口状态接口请求耗时', ['outcome'],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 3, 5, 8, 10)
+)
+
+# 对冲请求，result: sent（已发送）、won（对冲请求先返回）
+UPSTREAM_HEDGES = Counter('mengma_upstream_hedges_total', '上游对冲请求次数', ['result'])
+
+# 设备故障查询，outcome: success、request_error、api_error、mock
+UPSTREAM_FAULT_REQUESTS = Counter('mengma_upstream_fault_requests_total', '设备故障查询次数', ['outcome'])
+
+# API响应压缩，result: compressed（本次压缩）、cached（复用同版本的压缩结果）
+COMPRESSION_REQUESTS = Counter('mengma_compression_total', 'API响应压缩次数', ['encoding', 'result'])
+
+# 主页卡片片段缓存，result: page_hit（整页卡片直接复用，按页面计）、reused、rendered（按卡片计）
+FRAGMENT_CACHE_REQUESTS = Counter('mengma_index_fragments_total', '主页充电桩卡片片段缓存结果', ['result'])
+
+# 缓存读取结果，result: hit、miss
+CACHE_REQUESTS = Counter('mengma_cache_requests_total', '充电桩状态缓存读取次数', ['result'])
+
+# 数据库批量写入
+DB_WRITE_BATCH_SIZE = Histogram(
+    'mengma_db_write_batch_ports', '批量写入的端口数量',
+    buckets=(1, 5, 10, 20, 50, 100, 200, 500, 1000, 5000)
+)
+DB_WRITE_LATENCY = Histogram('mengma_db_write_seconds', '批量写入端口状态耗时', ['outcome'])
+
+# 每个请求、每个任务执行的SQL语句数量和数据库耗时，scope: request、task
+SQL_QUERIES = Histogram(
+    'mengma_sql_queries', '单个请求或任务执行的SQL语句数量', ['scope', 'name'],
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+)
+SQL_DURATION = Histogram('mengma_sql_seconds', '单个请求或任务的数据库累计耗时', ['scope', 'name'])
+
+# Celery任务耗时，state: SUCCESS、FAILURE、RETRY 等
+TASK_RUNTIME = Histogram(
+    'mengma_celery_task_seconds', 'Celery任务执行耗时', ['task', 'state'],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 2, 5, 10, 30, 60, 300)
+)
+
+def multiprocess_enabled() -> bool:
+    """是否处于多进程指标模式"""
+    return bool(os.environ.get('PROMETHEUS_MULTIPROC_DIR'))
+
+class DBPoolCollector:
+    """在抓取时读取当前进程各数据库引擎的连接池统计（get_pool_stats）
+
+    连接池是进程内的状态，多进程部署时每次抓取只包含处理 /metrics 请求的那个工作进程，
+    指标带 pid 标签以便区分；未使用 InstrumentedQueuePool 的引擎（如SQLite）不导出。
+
+    Attributes:
+        app: 用于访问数据库引擎的Flask应用，为None时不导出
+    """
+
+    def __init__(self):
+        self.app = None
+
+    def collect(self) -> Iterable[GaugeMetricFamily]:
+        labels = ['bind', 'pid']
+        size = GaugeMetricFamily('mengma_db_pool_size', '数据库连接池大小', labels=labels)
+        checked_out = GaugeMetricFamily('mengma_db_pool_checked_out', '已借出的数据库连接数', labels=labels)
+        overflow = GaugeMetricFamily('mengma_db_pool_overflow', '超出连接池大小的溢出连接数', labels=labels)
+        checkouts = CounterMetricFamily('mengma_db_pool_checkouts', '获取数据库连接次数', labels=labels)
+        timeouts = CounterMetricFamily('mengma_db_pool_timeouts', '获取数据库连接超时次数', labels=labels)
+        wait = CounterMetricFamily('mengma_db_pool_wait_seconds', '获取数据库连接的累计等待时间', labels=labels)
+        wait_max = GaugeMetricFamily('mengma_db_pool_wait_max_seconds', '获取数据库连接的最长等待时间', labels=labels)
+        families = (size, checked_out, overflow, checkouts, timeouts, wait, wait_max)
+
+        if self.app is not None:
+            try:
+                from app.models.port_status import db
+                from app.db_pool import get_pool_stats
+                with self.app.app_context():
+                    engines = dict(db.engines)
+                pid = str(os.getpid())
+                for bind_key, engine in engines.items():
+                    stats = get_pool_stats(engine)
+                    if 'checkouts' not in stats:
+                        continue
+                    values = [str(bind_key or 'default'), pid]
+                    size.add_metric(values, stats['size'])
+                    checked_out.add_metric(values, stats['checked_out'])
+                    overflow.add_metric(values, max(stats['overflow'], 0))
+                    checkouts.add_metric(values, stats['checkouts'])
+                    timeouts.add_metric(values, stats['timeouts'])
+                    wait.add_metric(values, stats['wait_total_ms'] / 1000)
+                    wait_max.add_metric(values, stats['wait_max_ms'] / 1000)
+            except Exception as e:
+                logger.warning(f"读取数据库连接池统计失败: {str(e)}")
+        yield from families
+
+# 当前进程的连接池指标采集器
+DB_POOL_COLLECTOR = DBPoolCollector()
+_db_pool_collector_registered = False
+
+def register_db_pool_metrics(app) -> None:
+    """导出当前进程的数据库连接池统计，重复调用时只更新使用的应用
+
+    Args:
+        app: Flask应用
+    """
+    global _db_pool_collector_registered
+    DB_POOL_COLLECTOR.app = app
+    if not _db_pool_collector_registered:
+        if not multiprocess_enabled():
+            REGISTRY.register(DB_POOL_COLLECTOR)
+        _db_pool_collector_registered = True
+
+def build_registry() -> CollectorRegistry:
+    """创建用于导出的注册表
+
+    多进程模式下汇总 PROMETHEUS_MULTIPROC_DIR 中所有进程的指标，并附加当前进程的连接池统计；
+    否则使用默认注册表。
+
+    Returns:
+        CollectorRegistry: 指标注册表
+    """
+    if not multiprocess_enabled():
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    if _db_pool_collector_registered:
+        registry.register(DB_POOL_COLLECTOR)
+    return registry
+
+def render_metrics(registry: CollectorRegistry = None) -> bytes:
+    """生成文本格式的指标数据"""
+    return generate_latest(registry or build_registry())
+
+def mark_process_dead(pid: int) -> None:
+    """清理已退出进程的多进程指标文件，供 gunicorn 的 child_exit 钩子调用"""
+    if multiprocess_enabled():
+        multiprocess.mark_process_dead(pid)
+
+class QueueDepthCollector:
+    """在抓取时读取Redis broker中各队列的待处理任务数
+
+    Attributes:
+        broker_url: Redis broker地址
+        queues: 队列名称列表
+    """
+
+    def __init__(self, broker_url: str, queues: List[str]):
+        self.broker_url = broker_url
+        self.queues = queues
+        self._client = None
+
+    def collect(self) -> Iterable[GaugeMetricFamily]:
+        depth = GaugeMetricFamily('mengma_celery_queue_depth', 'Celery队列中等待执行的任务数', labels=['queue'])
+        try:
+            if self._client is None:
+                import redis
+                self._client = redis.Redis.from_url(self.broker_url)
+            for queue in self.queues:
+                depth.add_metric([queue], self._client.llen(queue))
+        except Exception as e:
+            logger.warning(f"读取Celery队列长度失败: {str(e)}")
+        yield depth
+
+def start_celery_exporter(port: int, broker_url: str, queues: List[str]) -> CollectorRegistry:
+    """启动Celery侧的指标导出服务
+
+    在Celery主进程中调用，汇总所有子进程的任务指标并附加队列长度。
+
+    Args:
+        port: 监听端口
+        broker_url: Redis broker地址
+        queues: 需要统计长度的队列
+
+    Returns:
+        CollectorRegistry: 导出服务使用的注册表
+    """
+    registry = build_registry()
+    if broker_url.startswith('redis'):
+        registry.register(QueueDepthCollector(broker_url, queues))
+    start_http_server(port, registry=registry)
+    logger.info(f"Celery指标导出服务已启动，端口 {port}")
+    return registry
@@ -7,8 +7,9 @@
 from datetime import datetime
 from typing import Dict, Any, List
 from flask_sqlalchemy import SQLAlchemy
+from app.db_routing import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class ChargingStation(db.Model):
     """充电桩模型
@@ -18,6 +19,8 @@ class ChargingStation(db.Model):
         station_id: 充电桩ID
         name: 充电桩名称
         is_active: 是否激活
+        latitude: 纬度
+        longitude: 经度
         ports: 关联的端口状态记录
     """
     __tablename__ = 'charging_stations'
@@ -26,6 +29,8 @@ class ChargingStation(db.Model):
     station_id = db.Column(db.String(20), unique=True, nullable=False, index=True, comment='充电桩ID')
     name = db.Column(db.String(50), nullable=True, comment='充电桩名称')
     is_active = db.Column(db.Boolean, default=True, nullable=False, index=True, comment='是否激活')
+    latitude = db.Column(db.Float, nullable=True, comment='纬度')
+    longitude = db.Column(db.Float, nullable=True, comment='经度')
     
     # 关联端口状态
     ports = db.relationship('PortStatus', backref='station', lazy=True,
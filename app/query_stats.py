@@ -0,0 +1,150 @@
+"""
+充电桩监控系统 - SQL语句统计模块
+
+这个模块通过引擎的游标事件统计每个请求、每个Celery任务执行的SQL语句数量和数据库耗时，
+写入日志和指标，并提供 assert_max_queries 用于在测试中限定接口的查询数量，
+尽早发现逐个充电桩、逐个端口查询的 N+1 问题。
+"""
+
+import time
+import logging
+import contextvars
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.metrics import SQL_QUERIES, SQL_DURATION
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+class QueryStats:
+    """一段代码执行的SQL统计
+
+    Attributes:
+        count: 语句数量
+        duration: 数据库累计耗时（秒）
+        statements: 记录的SQL语句，仅在 record_statements 为True时记录
+    """
+
+    def __init__(self, record_statements: bool = False):
+        self.count = 0
+        self.duration = 0.0
+        self.record_statements = record_statements
+        self.statements: List[str] = []
+
+    def add(self, statement: str, duration: float) -> None:
+        """记录一条语句"""
+        self.count += 1
+        self.duration += duration
+        if self.record_statements:
+            self.statements.append(statement)
+
+# 当前上下文中正在统计的 QueryStats，支持嵌套
+_active_stats: contextvars.ContextVar[Tuple[QueryStats, ...]] = contextvars.ContextVar('active_query_stats', default=())
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _active_stats.get():
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    active = _active_stats.get()
+    starts = conn.info.get('query_start')
+    if not active or not starts:
+        return
+    duration = time.perf_counter() - starts.pop()
+    for stats in active:
+        stats.add(statement, duration)
+
+def start_tracking(record_statements: bool = False) -> Tuple[QueryStats, contextvars.Token]:
+    """开始统计当前上下文中执行的SQL
+
+    Returns:
+        Tuple[QueryStats, Token]: 统计对象以及用于 stop_tracking 的令牌
+    """
+    stats = QueryStats(record_statements)
+    token = _active_stats.set(_active_stats.get() + (stats,))
+    return stats, token
+
+def stop_tracking(token: contextvars.Token) -> None:
+    """停止 start_tracking 开始的统计"""
+    _active_stats.reset(token)
+
+@contextmanager
+def track_queries(record_statements: bool = False):
+    """统计代码块中执行的SQL的上下文管理器
+
+    Yields:
+        QueryStats: 统计对象
+    """
+    stats, token = start_tracking(record_statements)
+    try:
+        yield stats
+    finally:
+        stop_tracking(token)
+
+@contextmanager
+def assert_max_queries(max_queries: int):
+    """断言代码块执行的SQL语句不超过给定数量，供测试使用
+
+    用法（先按目标规模准备好充电桩数据）：
+        with assert_max_queries(5):
+            client.get('/api/stations')
+
+    Args:
+        max_queries: 允许的最大语句数量
+
+    Raises:
+        AssertionError: 语句数量超出预算，错误信息中列出所有语句
+    """
+    with track_queries(record_statements=True) as stats:
+        yield stats
+    if stats.count > max_queries:
+        statements = '\n'.join(f"  {index + 1}. {statement}" for index, statement in enumerate(stats.statements))
+        raise AssertionError(f"执行了 {stats.count} 条SQL，超出预算 {max_queries} 条:\n{statements}")
+
+def report_query_stats(scope: str, name: str, stats: QueryStats, warn_threshold: Optional[int] = None) -> None:
+    """把一次请求或任务的SQL统计写入指标和日志
+
+    Args:
+        scope: 统计范围，request 或 task
+        name: 路由规则或任务名称
+        stats: 统计对象
+        warn_threshold: 语句数量超过该值时记录警告
+    """
+    SQL_QUERIES.labels(scope, name).observe(stats.count)
+    SQL_DURATION.labels(scope, name).observe(stats.duration)
+    message = f"{scope} {name} 执行 {stats.count} 条SQL，数据库耗时 {stats.duration * 1000:.2f} 毫秒"
+    if warn_threshold and stats.count > warn_threshold:
+        logger.warning(message)
+    else:
+        logger.debug(message)
+
+def init_query_stats(app) -> None:
+    """为每个请求注册SQL统计钩子
+
+    Args:
+        app: Flask应用实例
+    """
+    warn_threshold = app.config.get('SQL_QUERY_WARN_THRESHOLD')
+
+    @app.before_request
+    def _start_query_stats():
+        g.query_stats, g.query_stats_token = start_tracking()
+
+    @app.after_request
+    def _report_query_stats(response):
+        stats = g.get('query_stats')
+        if stats is not None:
+            rule = request.url_rule.rule if request.url_rule else 'unmatched'
+            report_query_stats('request', rule, stats, warn_threshold)
+        return response
+
+    @app.teardown_request
+    def _stop_query_stats(exc):
+        token = g.pop('query_stats_token', None)
+        if token is not None:
+            stop_tracking(token)
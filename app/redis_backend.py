@@ -0,0 +1,140 @@
+"""
+充电桩监控系统 - 原生Redis缓存后端模块
+
+这个模块提供基于自行管理的Redis连接池的 Flask-Caching 后端：
+连接池大小、等待时间、socket超时和keepalive都由配置决定，响应解析器由 redis-py 自动选择（安装了 hiredis 时使用 hiredis）；
+在 Flask-Caching 的键值接口之外，还提供按前缀扫描键、pipeline 和 Lua 脚本，供缓存模块直接使用Redis的能力。
+"""
+
+import socket
+import logging
+import threading
+from typing import Dict, Any, Iterator, Optional
+import redis
+from redis.commands.core import Script
+from flask_caching.backends.rediscache import RedisCache
+from app.config import Config
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+def _keepalive_options() -> Dict[int, int]:
+    """TCP keepalive 参数：空闲60秒后开始探测，每10秒一次，连续3次无响应判定断开"""
+    options = {}
+    for name, value in (('TCP_KEEPIDLE', 60), ('TCP_KEEPINTVL', 10), ('TCP_KEEPCNT', 3)):
+        if hasattr(socket, name):
+            options[getattr(socket, name)] = value
+    return options
+
+def create_connection_pool(host: str, port: int, password: Optional[str] = None,
+                           db: int = 0) -> redis.BlockingConnectionPool:
+    """创建Redis连接池
+
+    使用 BlockingConnectionPool：连接数达到 REDIS_POOL_SIZE 后，新的请求最多等待 REDIS_POOL_TIMEOUT 秒，
+    而不是无限制地新建连接。连接池在 fork 后首次使用时会自动丢弃父进程的连接。
+
+    Args:
+        host: Redis主机
+        port: Redis端口
+        password: 密码
+        db: 数据库编号
+
+    Returns:
+        redis.BlockingConnectionPool: 连接池
+    """
+    pool = redis.BlockingConnectionPool(
+        host=host,
+        port=port,
+        password=password or None,
+        db=db,
+        max_connections=Config.REDIS_POOL_SIZE,
+        timeout=Config.REDIS_POOL_TIMEOUT,
+        socket_timeout=Config.REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=Config.REDIS_SOCKET_CONNECT_TIMEOUT,
+        socket_keepalive=Config.REDIS_SOCKET_KEEPALIVE,
+        socket_keepalive_options=_keepalive_options() if Config.REDIS_SOCKET_KEEPALIVE else None,
+        health_check_interval=Config.REDIS_HEALTH_CHECK_INTERVAL
+    )
+    logger.info(f"Redis连接池已创建: {host}:{port}/{db}，大小 {Config.REDIS_POOL_SIZE}")
+    return pool
+
+class NativeRedisCache(RedisCache):
+    """使用自行管理连接池的Redis缓存后端
+
+    与 Flask-Caching 的 RedisCache 使用相同的键前缀和序列化格式，两者写入的数据可以互相读取。
+
+    Attributes:
+        client: 底层Redis客户端
+        pool: 连接池
+    """
+
+    def __init__(self, pool: redis.BlockingConnectionPool, default_timeout: int = 300,
+                 key_prefix: Optional[str] = None):
+        self.pool = pool
+        self.client = redis.Redis(connection_pool=pool)
+        super().__init__(host=self.client, default_timeout=default_timeout, key_prefix=key_prefix)
+        self._scripts: Dict[str, Script] = {}
+        self._scripts_lock = threading.Lock()
+
+    @classmethod
+    def factory(cls, app, config, args, kwargs):
+        pool = create_connection_pool(
+            host=config.get('CACHE_REDIS_HOST', 'localhost'),
+            port=config.get('CACHE_REDIS_PORT', 6379),
+            password=config.get('CACHE_REDIS_PASSWORD'),
+            db=config.get('CACHE_REDIS_DB', 0)
+        )
+        kwargs['key_prefix'] = config.get('CACHE_KEY_PREFIX')
+        return cls(pool, *args, **kwargs)
+
+    def full_key(self, key: str) -> str:
+        """加上键前缀后的Redis键名"""
+        return self._get_prefix() + key
+
+    def dump_value(self, value: Any) -> bytes:
+        """按缓存的序列化格式编码值，用于在 pipeline 或Lua脚本中直接写入"""
+        return self.serializer.dumps(value)
+
+    def scan_keys(self, match: str, count: int = 1000) -> Iterator[str]:
+        """用 SCAN 增量遍历匹配的键，不阻塞Redis
+
+        Args:
+            match: 不含键前缀的匹配模式，如 'station:*'
+            count: 每次 SCAN 的建议数量
+
+        Returns:
+            Iterator[str]: 去掉键前缀后的键名
+        """
+        prefix = self._get_prefix()
+        for key in self.client.scan_iter(match=prefix + match, count=count):
+            if isinstance(key, bytes):
+                key = key.decode('utf-8')
+            yield key[len(prefix):]
+
+    def pipeline(self, transaction: bool = False) -> redis.client.Pipeline:
+        """获取 pipeline，默认不使用 MULTI/EXEC，只合并网络往返"""
+        return self.client.pipeline(transaction=transaction)
+
+    def script(self, source: str) -> Script:
+        """获取Lua脚本对象，同一段脚本只注册一次
+
+        Script 调用时使用 EVALSHA，服务端脚本缓存丢失时自动回退到 EVAL。
+
+        Args:
+            source: Lua脚本源码
+
+        Returns:
+            Script: 可调用的脚本对象，参数为 keys 和 args
+        """
+        with self._scripts_lock:
+            script = self._scripts.get(source)
+            if script is None:
+                script = self._scripts[source] = self.client.register_script(source)
+            return script
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """连接池配置：连接数上限和等待空闲连接的最长时间（秒）"""
+        return {
+            'max_connections': self.pool.max_connections,
+            'timeout': self.pool.timeout
+        }
@@ -2,12 +2,17 @@
 充电桩监控系统 - 充电桩数据访问模块
 
 这个模块封装了对充电桩数据的访问操作。
+用 replica_read 标记的列表查询在配置了只读副本时读副本，其余查询和所有写入走主库。
 """
 
+import time
 import logging
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Set, Tuple
 from datetime import datetime
+from sqlalchemy import insert
 from app.models.port_status import db, ChargingStation, PortStatus
+from app.db_routing import replica_read
+from app.metrics import DB_WRITE_BATCH_SIZE, DB_WRITE_LATENCY
 
 # 配置日志
 logger = logging.getLogger(__name__)
@@ -21,13 +26,14 @@ class StationRepository:
         return ChargingStation.query.filter_by(is_active=True).first()
     
     @staticmethod
-    def create_station(station_id: str, name: str, is_active: bool = True) -> ChargingStation:
+    def create_station(station_id: str, name: str, is_active: bool = True, commit: bool = True) -> ChargingStation:
         """创建充电桩
         
         Args:
             station_id: 充电桩ID
             name: 充电桩名称
             is_active: 是否激活
+            commit: 是否立即提交，为False时只写入当前事务，由调用方统一提交
             
         Returns:
             ChargingStation: 创建的充电桩实例
@@ -38,11 +44,15 @@ class StationRepository:
             is_active=is_active
         )
         db.session.add(station)
-        db.session.commit()
+        if commit:
+            db.session.commit()
+        else:
+            db.session.flush()
         logger.info(f"创建充电桩: {station_id}, 名称: {name}")
         return station
     
     @staticmethod
+    @replica_read
     def get_all_active_stations() -> List[ChargingStation]:
         """获取所有激活的充电桩
         
@@ -51,6 +61,44 @@ class StationRepository:
         """
         return ChargingStation.query.filter_by(is_active=True).all()
     
+    @staticmethod
+    @replica_read
+    def get_active_stations_page(after: Optional[str] = None, limit: Optional[int] = None,
+                                 prefix: Optional[str] = None) -> List[ChargingStation]:
+        """按充电桩ID顺序分页获取激活的充电桩
+        
+        Args:
+            after: 只返回ID大于该值的充电桩（游标）
+            limit: 最多返回数量
+            prefix: 充电桩ID前缀
+            
+        Returns:
+            List[ChargingStation]: 按充电桩ID升序排列的充电桩列表
+        """
+        query = ChargingStation.query.filter(ChargingStation.is_active.is_(True))
+        if prefix:
+            query = query.filter(ChargingStation.station_id.startswith(prefix, autoescape=True))
+        if after:
+            query = query.filter(ChargingStation.station_id > after)
+        query = query.order_by(ChargingStation.station_id)
+        if limit is not None:
+            query = query.limit(limit)
+        return query.all()
+    
+    @staticmethod
+    @replica_read
+    def get_located_active_stations() -> List[ChargingStation]:
+        """获取所有设置了经纬度的激活充电桩
+        
+        Returns:
+            List[ChargingStation]: 充电桩列表
+        """
+        return ChargingStation.query.filter(
+            ChargingStation.is_active.is_(True),
+            ChargingStation.latitude.isnot(None),
+            ChargingStation.longitude.isnot(None)
+        ).all()
+    
     @staticmethod
     def get_station_by_id(station_id: str) -> Optional[ChargingStation]:
         """根据ID获取充电桩
@@ -64,6 +112,7 @@ class StationRepository:
         return ChargingStation.query.filter_by(station_id=station_id).first()
     
     @staticmethod
+    @replica_read
     def get_stations_by_ids(station_ids: List[str]) -> List[ChargingStation]:
         """根据ID列表批量获取充电桩
         
@@ -75,6 +124,42 @@ class StationRepository:
         """
         return ChargingStation.query.filter(ChargingStation.station_id.in_(station_ids)).all()
 
+    @staticmethod
+    def get_existing_station_ids(station_ids: List[str], batch_size: int = 1000) -> Set[str]:
+        """查询已存在的充电桩ID（包括未激活的）
+        
+        Args:
+            station_ids: 充电桩ID列表
+            batch_size: 每条查询的最大ID数量
+            
+        Returns:
+            Set[str]: 已存在的充电桩ID
+        """
+        existing = set()
+        for start in range(0, len(station_ids), batch_size):
+            chunk = station_ids[start:start + batch_size]
+            rows = db.session.query(ChargingStation.station_id).filter(ChargingStation.station_id.in_(chunk)).all()
+            existing.update(row[0] for row in rows)
+        return existing
+
+    @staticmethod
+    def bulk_insert_stations(stations_data: List[Dict[str, Any]], batch_size: int = 1000) -> int:
+        """以多行INSERT批量插入充电桩，不提交事务
+        
+        不经过ORM的单对象flush，因此不会触发模型事件，调用方需要自行更新空间索引等派生数据。
+        
+        Args:
+            stations_data: 充电桩数据列表，每个字典包含 station_id、name、is_active、latitude、longitude
+            batch_size: 每条INSERT语句的最大行数
+            
+        Returns:
+            int: 插入的充电桩数量
+        """
+        for start in range(0, len(stations_data), batch_size):
+            db.session.execute(insert(ChargingStation), stations_data[start:start + batch_size])
+        logger.info(f"批量插入 {len(stations_data)} 个充电桩")
+        return len(stations_data)
+
 
 class PortRepository:
     """端口状态数据访问类"""
@@ -123,10 +208,77 @@ class PortRepository:
             PortStatus.port_number.in_(port_numbers)
         ).all()
     
+    @staticmethod
+    @replica_read
+    def get_ports_of_active_stations() -> List[PortStatus]:
+        """一次查询获取所有激活充电桩的端口
+
+        Returns:
+            List[PortStatus]: 按充电桩ID和端口号排序的端口状态实例列表
+        """
+        return PortStatus.query.join(ChargingStation).filter(
+            ChargingStation.is_active.is_(True)
+        ).order_by(PortStatus.station_id, PortStatus.port_number).all()
+
+    @staticmethod
+    @replica_read
+    def get_ports_by_station_ids(station_ids: List[str], batch_size: int = 1000) -> List[PortStatus]:
+        """批量获取给定充电桩的所有端口
+        
+        Args:
+            station_ids: 充电桩ID列表
+            batch_size: 每条查询的最大充电桩数量
+            
+        Returns:
+            List[PortStatus]: 按充电桩ID和端口号排序的端口状态实例列表
+        """
+        ports = []
+        for start in range(0, len(station_ids), batch_size):
+            chunk = station_ids[start:start + batch_size]
+            ports.extend(PortStatus.query.filter(PortStatus.station_id.in_(chunk)).order_by(
+                PortStatus.station_id, PortStatus.port_number).all())
+        return ports
+
+    @staticmethod
+    def get_existing_port_keys(station_ids: List[str], batch_size: int = 1000) -> Set[Tuple[str, int]]:
+        """查询给定充电桩已存在的端口
+        
+        Args:
+            station_ids: 充电桩ID列表
+            batch_size: 每条查询的最大充电桩数量
+            
+        Returns:
+            Set[Tuple[str, int]]: (充电桩ID, 端口号) 集合
+        """
+        existing = set()
+        for start in range(0, len(station_ids), batch_size):
+            chunk = station_ids[start:start + batch_size]
+            rows = db.session.query(PortStatus.station_id, PortStatus.port_number).filter(
+                PortStatus.station_id.in_(chunk)
+            ).all()
+            existing.update((row[0], row[1]) for row in rows)
+        return existing
+
+    @staticmethod
+    def bulk_insert_ports(ports_data: List[Dict[str, Any]], batch_size: int = 1000) -> int:
+        """以多行INSERT批量插入端口，不提交事务
+        
+        Args:
+            ports_data: 端口数据列表，每个字典的键与 PortStatus 的列名一致（station_id、port_number、status等）
+            batch_size: 每条INSERT语句的最大行数
+            
+        Returns:
+            int: 插入的端口数量
+        """
+        for start in range(0, len(ports_data), batch_size):
+            db.session.execute(insert(PortStatus), ports_data[start:start + batch_size])
+        logger.info(f"批量插入 {len(ports_data)} 个端口")
+        return len(ports_data)
+
     @staticmethod
     def create_port(station_id: str, port_number: int, status: str = '空闲',
                    service: Optional[str] = None, voltage: float = 0.0,
-                   current: float = 0.0, power: float = 0.0) -> PortStatus:
+                   current: float = 0.0, commit: bool = True) -> PortStatus:
         """创建端口状态
         
         Args:
@@ -136,7 +288,7 @@ class PortRepository:
             service: 服务类型
             voltage: 电压
             current: 电流
-            power: 功率
+            commit: 是否立即提交，为False时只写入当前事务，由调用方统一提交
             
         Returns:
             PortStatus: 创建的端口状态实例
@@ -147,17 +299,17 @@ class PortRepository:
             status=status,
             service=service,
             voltage=voltage,
-            current=current,
-            power=power
+            current=current
         )
         db.session.add(port)
-        db.session.commit()
+        if commit:
+            db.session.commit()
         logger.info(f"创建端口: 充电桩 {station_id}, 端口号 {port_number}, 状态 {status}")
         return port
     
     @staticmethod
     def update_port(port: PortStatus, status: str, service: Optional[str] = None,
-                   voltage: float = 0.0, current: float = 0.0, power: float = 0.0) -> PortStatus:
+                   voltage: float = 0.0, current: float = 0.0) -> PortStatus:
         """更新端口状态
         
         Args:
@@ -166,7 +318,6 @@ class PortRepository:
             service: 服务类型
             voltage: 电压
             current: 电流
-            power: 功率
             
         Returns:
             PortStatus: 更新后的端口状态实例
@@ -175,7 +326,6 @@ class PortRepository:
         port.service = service
         port.voltage = voltage
         port.current = current
-        port.power = power
         port.timestamp = datetime.now()
         db.session.commit()
         return port
@@ -187,6 +337,8 @@ class PortRepository:
         Args:
             ports_data: 端口状态数据列表，每个字典包含station_id, port, status等字段
         """
+        start = time.perf_counter()
+        DB_WRITE_BATCH_SIZE.observe(len(ports_data))
         try:
             # 提取所有涉及的充电桩ID和端口号
             station_id_ports = {}
@@ -228,7 +380,6 @@ class PortRepository:
                     port.service = port_data.get('service', port.service)
                     port.voltage = port_data.get('voltage', port.voltage)
                     port.current = port_data.get('current', port.current)
-                    port.power = port_data.get('power', port.power)
                     port.timestamp = current_time
                 else:
                     # 创建新端口
@@ -239,20 +390,26 @@ class PortRepository:
                         service=port_data.get('service', '充电服务'),
                         voltage=port_data.get('voltage', 0.0),
                         current=port_data.get('current', 0.0),
-                        power=port_data.get('power', 0.0),
                         timestamp=current_time
                     )
                     db.session.add(port)
             
             # 一次性提交所有更改
             db.session.commit()
+            DB_WRITE_LATENCY.labels('success').observe(time.perf_counter() - start)
             logger.info(f"批量更新完成，共处理 {len(ports_data)} 个端口数据")
         except Exception as e:
             logger.error(f"批量更新端口状态时出错: {str(e)}")
             db.session.rollback()
+            DB_WRITE_LATENCY.labels('error').observe(time.perf_counter() - start)
             raise
     
     @staticmethod
     def commit():
         """提交所有挂起的更改"""
-        db.session.commit() 
\ No newline at end of file
+        db.session.commit()
+    
+    @staticmethod
+    def rollback():
+        """回滚所有挂起的更改"""
+        db.session.rollback() 
\ No newline at end of file
@@ -0,0 +1,150 @@
+"""
+充电桩监控系统 - 异步充电桩服务模块
+
+这个模块为ASGI服务模式提供充电桩状态的异步获取。上游请求使用 httpx.AsyncClient
+并发发送，等待期间不占用线程；数据库和缓存操作仍使用现有的同步实现，
+在Flask应用上下文中放到线程池执行。
+"""
+
+import asyncio
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+from flask import Flask
+from app.config import Config
+from app.repositories.station_repository import StationRepository
+from app.cache import get_station_faults, set_station_faults, get_stale_station_ids
+from app.services.station_service import (
+    get_all_active_stations, get_default_station, should_update_status, apply_station_status,
+    load_station_statuses
+)
+from port_status import get_port_status_async, get_device_faults_async, mark_faulty_ports
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+class AsyncStationService:
+    """异步充电桩服务
+
+    同一充电桩的并发刷新会合并为一次上游请求。
+
+    Attributes:
+        flask_app: 用于提供应用上下文的Flask应用
+        client: httpx.AsyncClient 实例
+    """
+
+    def __init__(self, flask_app: Flask, client):
+        self.flask_app = flask_app
+        self.client = client
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._upstream_slots = asyncio.Semaphore(Config.CONNECTION_POOL_SIZE)
+
+    def _call_in_context(self, func, *args):
+        """在应用上下文中调用同步函数"""
+        with self.flask_app.app_context():
+            return func(*args)
+
+    async def run_sync(self, func, *args):
+        """在线程池中执行需要应用上下文的同步函数"""
+        return await asyncio.to_thread(self._call_in_context, func, *args)
+
+    async def refresh_station(self, station_id: str) -> None:
+        """刷新单个充电桩状态，合并同一充电桩的并发刷新
+
+        Args:
+            station_id: 充电桩ID
+        """
+        future = self._inflight.get(station_id)
+        if future is not None:
+            await asyncio.shield(future)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[station_id] = future
+        try:
+            status_data = await self.fetch_station_status(station_id)
+            await self.run_sync(apply_station_status, station_id, status_data)
+            future.set_result(None)
+        except Exception as e:
+            logger.error(f"异步更新充电桩 {station_id} 状态时出错: {str(e)}")
+            future.set_result(None)
+        finally:
+            del self._inflight[station_id]
+
+    async def fetch_station_status(self, station_id: str) -> Dict[str, Any]:
+        """获取充电桩最新状态并合并端口故障，与 station_service.fetch_station_status 行为一致
+
+        故障缓存失效时，故障查询与 device/detail 并发发送。
+
+        Args:
+            station_id: 充电桩ID
+
+        Returns:
+            Dict[str, Any]: 状态数据，另含 faults 故障端口列表
+        """
+        if not Config.FAULT_STATUS_ENABLED:
+            async with self._upstream_slots:
+                return await get_port_status_async(station_id, self.client)
+
+        faults = await self.run_sync(get_station_faults, station_id)
+        async with self._upstream_slots:
+            if faults is None:
+                status_data, faults = await asyncio.gather(
+                    get_port_status_async(station_id, self.client),
+                    get_device_faults_async(station_id, self.client)
+                )
+                if faults is not None:
+                    await self.run_sync(set_station_faults, station_id, faults)
+            else:
+                status_data = await get_port_status_async(station_id, self.client)
+        return mark_faulty_ports(status_data, faults or [])
+
+    async def get_all_active_stations(self) -> List[Dict[str, Any]]:
+        """获取所有激活的充电桩，并发刷新缓存已过期的充电桩
+
+        Returns:
+            List[Dict[str, Any]]: 与 get_all_active_stations 格式一致的充电桩列表
+        """
+        # 共享内存状态或Celery刷新模式下请求本身不会等待上游，直接复用同步实现
+        if Config.SHARED_STATE_ENABLED or Config.ENABLE_ASYNC:
+            return await self.run_sync(get_all_active_stations)
+
+        stations, stale_ids = await self.run_sync(_load_stations_and_stale_ids)
+        await asyncio.gather(*(self.refresh_station(station_id) for station_id in stale_ids))
+        return await self.run_sync(_build_from_cache, stations)
+
+    async def get_default_ports(self) -> List[Dict[str, Any]]:
+        """获取默认充电桩的端口状态
+
+        Returns:
+            List[Dict[str, Any]]: 端口状态列表
+        """
+        station_id, stale = await self.run_sync(_load_default_station)
+        if stale:
+            await self.refresh_station(station_id)
+        return await self.run_sync(_load_station_ports, station_id)
+
+def _load_stations_and_stale_ids() -> Tuple[List[Tuple[str, Optional[str]]], List[str]]:
+    """加载激活的充电桩以及需要刷新的充电桩ID"""
+    stations = [(station.station_id, station.name) for station in StationRepository.get_all_active_stations()]
+    # 一次批量 EXISTS 检查所有充电桩的缓存
+    stale_ids = get_stale_station_ids([station_id for station_id, _ in stations])
+    return stations, stale_ids
+
+def _build_from_cache(stations: List[Tuple[str, Optional[str]]]) -> List[Dict[str, Any]]:
+    """用缓存中的状态构建充电桩列表，缓存缺失的充电桩按批从数据库加载端口状态"""
+    statuses = load_station_statuses([station_id for station_id, _ in stations])
+    return [{
+        'station_id': station_id,
+        'name': name,
+        'ports': statuses[station_id].get('ports', [])
+    } for station_id, name in stations]
+
+def _load_default_station() -> Tuple[str, bool]:
+    """加载默认充电桩ID及其是否需要刷新"""
+    station = get_default_station()
+    return station.station_id, should_update_status(station.station_id)
+
+def _load_station_ports(station_id: str) -> List[Dict[str, Any]]:
+    """从数据库加载充电桩的端口状态"""
+    station = StationRepository.get_station_by_id(station_id)
+    return [port.to_dict() for port in station.ports] if station else []
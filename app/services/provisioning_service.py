@@ -0,0 +1,238 @@
+"""
+充电桩监控系统 - 批量开通服务模块
+
+这个模块负责从CSV或JSON批量导入充电桩及其端口：先校验全部数据，
+再在一个事务中以多行INSERT写入新的充电桩和缺少的端口，
+提交后更新本进程的空间索引并重建物化列表。
+"""
+
+import io
+import csv
+import json
+import logging
+from typing import Dict, Any, List, Optional, Union
+from datetime import datetime
+from app.config import Config
+from app.models.port_status import db
+from app.repositories.station_repository import StationRepository, PortRepository
+from app.geo_index import geo_index
+from app.fleet_store import fleet_store
+from app.fleet_view import fleet_view
+from port_status import get_station_port_config
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 导入数据支持的字段，CSV文件的表头使用同样的名称
+IMPORT_FIELDS = ('station_id', 'name', 'port_count', 'latitude', 'longitude', 'is_active')
+
+# 与模型列长度一致
+MAX_STATION_ID_LENGTH = 20
+MAX_NAME_LENGTH = 50
+
+# 单个充电桩允许的最大端口数
+MAX_PORT_COUNT = 64
+
+def _parse_bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in ('1', 'true', 'yes', 'y'):
+        return True
+    if text in ('0', 'false', 'no', 'n'):
+        return False
+    raise ValueError(f"无效的布尔值: {value}")
+
+def _parse_optional(value: Any, parse) -> Any:
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    return parse(value)
+
+def normalize_row(row: Dict[str, Any], line: int) -> Dict[str, Any]:
+    """校验并规范化一条导入数据
+
+    Args:
+        row: 原始数据，字段见 IMPORT_FIELDS
+        line: 数据所在的行号（JSON为列表下标加1），用于错误信息
+
+    Returns:
+        Dict[str, Any]: 规范化后的数据，未提供端口数时按 STATION_PORT_CONFIG 推断
+
+    Raises:
+        ValueError: 数据无效
+    """
+    if not isinstance(row, dict):
+        raise ValueError(f"第 {line} 行: 数据必须是对象")
+
+    station_id = str(row.get('station_id') or '').strip()
+    if not station_id:
+        raise ValueError(f"第 {line} 行: 缺少 station_id")
+    if len(station_id) > MAX_STATION_ID_LENGTH:
+        raise ValueError(f"第 {line} 行: station_id 超过 {MAX_STATION_ID_LENGTH} 个字符")
+
+    name = str(row.get('name') or '').strip() or f"充电桩 {station_id}"
+    if len(name) > MAX_NAME_LENGTH:
+        raise ValueError(f"第 {line} 行: name 超过 {MAX_NAME_LENGTH} 个字符")
+
+    port_config = get_station_port_config(station_id)
+    try:
+        port_count = _parse_optional(row.get('port_count'), int)
+        latitude = _parse_optional(row.get('latitude'), float)
+        longitude = _parse_optional(row.get('longitude'), float)
+        is_active = _parse_optional(row.get('is_active'), _parse_bool)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"第 {line} 行: {str(e)}") from e
+
+    if port_count is None:
+        port_count = port_config['port_count']
+    if not 1 <= port_count <= MAX_PORT_COUNT:
+        raise ValueError(f"第 {line} 行: port_count 必须在 1 到 {MAX_PORT_COUNT} 之间")
+    if (latitude is None) != (longitude is None):
+        raise ValueError(f"第 {line} 行: latitude 和 longitude 必须同时提供")
+    if latitude is not None and not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        raise ValueError(f"第 {line} 行: 经纬度超出范围")
+
+    return {
+        'station_id': station_id,
+        'name': name,
+        'port_count': port_count,
+        'service': port_config['service_name'],
+        'latitude': latitude,
+        'longitude': longitude,
+        'is_active': True if is_active is None else is_active
+    }
+
+def parse_import_data(data: Union[str, bytes], data_format: str) -> List[Dict[str, Any]]:
+    """解析并校验CSV或JSON格式的导入数据
+
+    CSV第一行为表头；JSON可以是对象列表，也可以是 {"stations": [...]}。
+
+    Args:
+        data: 导入数据
+        data_format: 'csv' 或 'json'
+
+    Returns:
+        List[Dict[str, Any]]: 规范化后的数据列表
+
+    Raises:
+        ValueError: 格式错误、数据无效、充电桩ID重复或超过 PROVISION_MAX_ROWS 行
+    """
+    if isinstance(data, bytes):
+        try:
+            data = data.decode('utf-8-sig')
+        except UnicodeDecodeError as e:
+            raise ValueError("导入数据必须是UTF-8编码") from e
+
+    if data_format == 'csv':
+        reader = csv.DictReader(io.StringIO(data))
+        if not reader.fieldnames or 'station_id' not in [field.strip() for field in reader.fieldnames]:
+            raise ValueError("CSV表头缺少 station_id")
+        # 表头为第1行
+        rows = [(line, {key.strip(): value for key, value in row.items() if key})
+                for line, row in enumerate(reader, start=2)]
+    elif data_format == 'json':
+        try:
+            parsed = json.loads(data)
+        except ValueError as e:
+            raise ValueError(f"JSON格式错误: {str(e)}") from e
+        if isinstance(parsed, dict):
+            parsed = parsed.get('stations')
+        if not isinstance(parsed, list):
+            raise ValueError("JSON必须是充电桩列表或包含 stations 列表的对象")
+        rows = list(enumerate(parsed, start=1))
+    else:
+        raise ValueError(f"不支持的导入格式: {data_format}")
+
+    if len(rows) > Config.PROVISION_MAX_ROWS:
+        raise ValueError(f"单次最多导入 {Config.PROVISION_MAX_ROWS} 个充电桩")
+
+    stations, seen = [], set()
+    for line, row in rows:
+        station = normalize_row(row, line)
+        if station['station_id'] in seen:
+            raise ValueError(f"第 {line} 行: 充电桩 {station['station_id']} 重复")
+        seen.add(station['station_id'])
+        stations.append(station)
+    return stations
+
+def detect_format(filename: Optional[str] = None, content_type: Optional[str] = None) -> str:
+    """根据文件名或Content-Type判断导入格式，无法判断时按JSON处理"""
+    if (filename and filename.lower().endswith('.csv')) or (content_type and 'csv' in content_type):
+        return 'csv'
+    return 'json'
+
+def provision_stations(stations: List[Dict[str, Any]]) -> Dict[str, int]:
+    """批量开通充电桩和端口
+
+    已存在的充电桩不修改，只补齐缺少的端口，因此同一份数据可以重复导入。
+    所有写入在一个事务中完成，任一批次失败时整体回滚。
+
+    Args:
+        stations: parse_import_data 或 normalize_row 返回的数据列表
+
+    Returns:
+        Dict[str, int]: 新建充电桩数、已存在充电桩数、新建端口数
+    """
+    if not stations:
+        return {'created_stations': 0, 'existing_stations': 0, 'created_ports': 0}
+
+    batch_size = Config.PROVISION_BATCH_SIZE
+    station_ids = [station['station_id'] for station in stations]
+    try:
+        existing = StationRepository.get_existing_station_ids(station_ids, batch_size)
+        new_stations = [station for station in stations if station['station_id'] not in existing]
+        StationRepository.bulk_insert_stations([
+            {key: station[key] for key in ('station_id', 'name', 'is_active', 'latitude', 'longitude')}
+            for station in new_stations
+        ], batch_size)
+
+        # 新建的充电桩没有端口，只需要查询已存在充电桩的端口
+        existing_ports = PortRepository.get_existing_port_keys(sorted(existing), batch_size) if existing else set()
+        now = datetime.now()
+        ports_data = [
+            {
+                'station_id': station['station_id'],
+                'port_number': port_number,
+                'status': '空闲',
+                'service': station['service'],
+                'voltage': 0.0,
+                'current': 0.0,
+                'timestamp': now
+            }
+            for station in stations
+            for port_number in range(1, station['port_count'] + 1)
+            if (station['station_id'], port_number) not in existing_ports
+        ]
+        PortRepository.bulk_insert_ports(ports_data, batch_size)
+        PortRepository.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"批量开通充电桩时出错: {str(e)}")
+        raise
+
+    # 多行INSERT不触发模型事件，这里显式更新本进程的空间索引和列式状态存储；
+    # 其他进程的空间索引、列式状态存储和物化列表在各自的全量重建周期内同步
+    new_ports: Dict[str, List[Dict[str, Any]]] = {}
+    for port in ports_data:
+        new_ports.setdefault(port['station_id'], []).append({
+            'port': port['port_number'],
+            'status': port['status'],
+            'service': port['service'],
+            'voltage': port['voltage'],
+            'current': port['current'],
+            'timestamp': now.isoformat()
+        })
+    for station in new_stations:
+        if station['is_active']:
+            geo_index.upsert(station['station_id'], station['name'], station['latitude'], station['longitude'])
+            fleet_store.update_station(station['station_id'], new_ports.get(station['station_id'], []))
+    if new_stations or ports_data:
+        fleet_view.clear()
+
+    result = {
+        'created_stations': len(new_stations),
+        'existing_stations': len(existing),
+        'created_ports': len(ports_data)
+    }
+    logger.info(f"批量开通完成: {result}")
+    return result
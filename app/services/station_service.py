@@ -4,14 +4,27 @@
 这个模块提供充电桩状态管理相关的服务功能。
 """
 
+import time
+import base64
+import threading
+import binascii
 import logging
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 from app.models.port_status import ChargingStation
 from app.repositories.station_repository import StationRepository, PortRepository
 from app.config import Config
-from app.cache import get_station_status, set_station_status, is_cache_valid
-from port_status import get_port_status
+from app.cache import (
+    get_station_status, set_station_status, is_cache_valid, get_station_statuses, get_stale_station_ids,
+    get_station_faults, set_station_faults, record_fleet_change, get_fleet_version, get_fleet_changes
+)
+from app.fleet_store import fleet_store
+from app.fleet_view import fleet_view
+from app.geo_index import geo_index, GeoEntry
+from app.index_maintenance import index_maintenance_running, run_index_maintenance
+from app.metrics import DB_WRITE_BATCH_SIZE, DB_WRITE_LATENCY
+from app.timing import stage
+from port_status import get_port_status, get_port_status_with_faults, mark_faulty_ports
 
 # 配置日志
 logger = logging.getLogger(__name__)
@@ -22,19 +35,17 @@ def get_default_station() -> ChargingStation:
     if not station:
         station = StationRepository.create_station(
             station_id='9313600954',
-            name='信阳学院充电桩'
+            name='信阳学院充电桩',
+            commit=False
         )
         
-        # 创建默认端口
-        for i in range(1, 5):  # 创建4个端口
-            PortRepository.create_port(
-                station_id='9313600954',
-                port_number=i,
-                status='空闲',
-                service='充电服务',
-                voltage=220.0,
-                current=0.0
-            )
+        # 创建默认端口，与充电桩在同一个事务中提交
+        PortRepository.bulk_insert_ports([
+            {'station_id': '9313600954', 'port_number': i, 'status': '空闲',
+             'service': '充电服务', 'voltage': 220.0, 'current': 0.0}
+            for i in range(1, 5)  # 创建4个端口
+        ])
+        PortRepository.commit()
     
     return station
 
@@ -48,7 +59,8 @@ def should_update_status(station_id: str) -> bool:
         bool: 是否需要更新
     """
     # 使用新的缓存系统检查缓存是否有效
-    return not is_cache_valid(station_id)
+    with stage('cache'):
+        return not is_cache_valid(station_id)
 
 def update_station_status(station: ChargingStation, use_async: bool = None) -> None:
     """更新充电桩状态
@@ -74,26 +86,79 @@ def update_station_status(station: ChargingStation, use_async: bool = None) -> N
         update_station_task.delay(station.station_id)
     else:
         logger.info(f"同步更新充电桩 {station.station_id} 状态")
-        update_station_sync(station)
+        update_station_sync(station.station_id)
 
-def update_station_sync(station: ChargingStation) -> None:
+def update_station_sync(station_id: str) -> None:
     """同步更新充电桩状态
     
     Args:
-        station: 充电桩实例
+        station_id: 充电桩ID
     """
     try:
         # 从API获取最新状态
-        status_data = get_port_status(station.station_id)
-        if status_data and 'ports' in status_data:
-            # 批量更新数据库中的端口状态
-            update_ports_batch(station.station_id, status_data['ports'])
-            
-            # 更新缓存
-            set_station_status(station.station_id, status_data)
+        with stage('upstream'):
+            status_data = fetch_station_status(station_id)
+        with stage('db_write'):
+            apply_station_status(station_id, status_data)
     except Exception as e:
         logger.error(f"更新充电桩状态时出错: {str(e)}")
 
+def fetch_station_status(station_id: str) -> Dict[str, Any]:
+    """从API获取充电桩最新状态，并合并端口故障信息
+    
+    故障端口单独缓存 Config.FAULT_CACHE_TIMEOUT 秒；缓存失效时故障查询与 device/detail
+    并发发送，刷新耗时取两者中较慢的一个。查询失败时不标记故障，下次刷新重试。
+    
+    Args:
+        station_id: 充电桩ID
+        
+    Returns:
+        Dict[str, Any]: 与 get_port_status 格式一致的状态数据，另含 faults 故障端口列表
+    """
+    if not Config.FAULT_STATUS_ENABLED:
+        return get_port_status(station_id)
+    
+    faults = get_station_faults(station_id)
+    if faults is None:
+        status_data, faults = get_port_status_with_faults(station_id)
+        if faults is not None:
+            set_station_faults(station_id, faults)
+    else:
+        status_data = get_port_status(station_id)
+    return mark_faulty_ports(status_data, faults or [])
+
+def apply_station_status(station_id: str, status_data: Dict[str, Any]) -> None:
+    """把从API获取到的状态写入数据库并发布
+    
+    Args:
+        station_id: 充电桩ID
+        status_data: get_port_status 返回的状态数据
+    """
+    if status_data and 'ports' in status_data:
+        # 批量更新数据库中的端口状态
+        update_ports_batch(station_id, status_data['ports'])
+        
+        # 更新缓存和进程内状态
+        publish_station_status(station_id, status_data)
+
+def publish_station_status(station_id: str, status_data: Dict[str, Any]) -> None:
+    """发布充电桩的最新状态
+    
+    刷新流程获取到新状态后统一调用此函数，写入缓存并同步列式状态存储和物化充电桩列表。
+    状态（不含时间戳）没有变化时不记录变更，其他进程的物化列表无需同步。
+    
+    Args:
+        station_id: 充电桩ID
+        status_data: 充电桩状态数据
+    """
+    set_station_status(station_id, status_data)
+    fleet_store.update_station(station_id, status_data.get('ports', []))
+    if Config.FLEET_VIEW_ENABLED:
+        changed = fleet_view.update_station(station_id, status_data.get('ports', []))
+        # 不在本进程列表中的充电桩无法判断是否变化，仍然记录
+        if changed or station_id not in fleet_view:
+            record_fleet_change(station_id)
+
 def update_ports_batch(station_id: str, ports_data: List[Dict[str, Any]]) -> None:
     """批量更新端口状态
     
@@ -101,38 +166,49 @@ def update_ports_batch(station_id: str, ports_data: List[Dict[str, Any]]) -> Non
         station_id: 充电桩ID
         ports_data: 端口状态数据列表
     """
-    # 预先获取所有端口，减少查询次数
-    port_numbers = [port_data['port'] for port_data in ports_data]
-    existing_ports = PortRepository.get_ports_by_numbers(station_id, port_numbers)
-    
-    # 创建端口号到端口对象的映射
-    port_map = {port.port_number: port for port in existing_ports}
-    
-    # 准备批量更新
-    for port_data in ports_data:
-        port_number = port_data['port']
-        port = port_map.get(port_number)
-        
-        if not port:
-            # 创建新端口
-            PortRepository.create_port(
-                station_id=station_id,
-                port_number=port_number,
-                status=port_data['status'],
-                service=port_data.get('service', '充电服务'),
-                voltage=port_data.get('voltage', 0.0),
-                current=port_data.get('current', 0.0)
-            )
-        else:
-            # 更新现有端口
-            port.status = port_data['status']
-            port.service = port_data.get('service', '充电服务')
-            port.voltage = port_data.get('voltage', 0.0)
-            port.current = port_data.get('current', 0.0)
-            port.timestamp = datetime.now()
-    
-    # 统一提交所有更改，减少数据库操作次数
-    PortRepository.commit()
+    start = time.perf_counter()
+    DB_WRITE_BATCH_SIZE.observe(len(ports_data))
+    
+    try:
+        # 预先获取所有端口，减少查询次数
+        port_numbers = [port_data['port'] for port_data in ports_data]
+        existing_ports = PortRepository.get_ports_by_numbers(station_id, port_numbers)
+        
+        # 创建端口号到端口对象的映射
+        port_map = {port.port_number: port for port in existing_ports}
+        
+        # 准备批量更新
+        for port_data in ports_data:
+            port_number = port_data['port']
+            port = port_map.get(port_number)
+            
+            if not port:
+                # 创建新端口
+                PortRepository.create_port(
+                    station_id=station_id,
+                    port_number=port_number,
+                    status=port_data['status'],
+                    service=port_data.get('service', '充电服务'),
+                    voltage=port_data.get('voltage', 0.0),
+                    current=port_data.get('current', 0.0),
+                    commit=False
+                )
+            else:
+                # 更新现有端口
+                port.status = port_data['status']
+                port.service = port_data.get('service', '充电服务')
+                port.voltage = port_data.get('voltage', 0.0)
+                port.current = port_data.get('current', 0.0)
+                port.timestamp = datetime.now()
+        
+        # 统一提交所有更改，减少数据库操作次数
+        PortRepository.commit()
+        DB_WRITE_LATENCY.labels('success').observe(time.perf_counter() - start)
+    except Exception as e:
+        logger.error(f"批量更新充电桩 {station_id} 端口状态时出错: {str(e)}")
+        PortRepository.rollback()
+        DB_WRITE_LATENCY.labels('error').observe(time.perf_counter() - start)
+        raise
 
 def get_all_active_stations() -> List[Dict[str, Any]]:
     """获取所有激活的充电桩，并更新它们的状态
@@ -141,40 +217,134 @@ def get_all_active_stations() -> List[Dict[str, Any]]:
         List[Dict[str, Any]]: 包含所有充电桩数据的列表
     """
     try:
-        # 获取所有激活的充电桩
-        stations = StationRepository.get_all_active_stations()
+        # 启用共享内存状态时，直接读取本节点轮询进程维护的状态段
+        if Config.SHARED_STATE_ENABLED:
+            from app.shared_state import get_shared_state_reader
+            reader = get_shared_state_reader()
+            if reader:
+                with stage('shm'):
+                    shared_data = reader.read_all(max_age=Config.SHARED_STATE_MAX_AGE)
+                if shared_data is not None:
+                    return shared_data
         
-        # 如果启用异步处理，提交异步任务批量更新
-        if Config.ENABLE_ASYNC and stations:
-            from app.tasks import batch_update_stations
-            station_ids = [station.station_id for station in stations]
-            batch_update_stations.delay(station_ids)
-        else:
-            # 同步更新每个充电桩
-            for station in stations:
-                update_station_status(station, use_async=False)
-        
-        # 更新并获取所有充电桩状态
-        stations_data = []
-        for station in stations:
-            # 检查缓存中是否有数据
-            cached_status = get_station_status(station.station_id)
-            if cached_status:
-                # 使用缓存数据构建响应
-                stations_data.append({
-                    'station_id': station.station_id,
-                    'name': station.name,
-                    'ports': cached_status.get('ports', [])
-                })
-            else:
-                # 回退到数据库查询
-                stations_data.append(station.to_dict())
-        
-        return stations_data
+        # 获取所有激活的充电桩
+        with stage('db'):
+            stations = StationRepository.get_all_active_stations()
+        return build_stations_data(stations)
     except Exception as e:
         logger.error(f"获取充电桩列表时出错: {str(e)}")
         return []
 
+def build_stations_data(stations: List[ChargingStation]) -> List[Dict[str, Any]]:
+    """刷新给定充电桩的状态并构建响应数据
+    
+    充电桩的ID和名称在刷新前取出：刷新逐个提交后实例会过期，再次访问属性会逐个重新查询。
+    状态批量读取缓存，缓存缺失的充电桩按批从数据库加载端口状态。
+    
+    Args:
+        stations: 充电桩实例列表
+        
+    Returns:
+        List[Dict[str, Any]]: 充电桩数据列表，顺序与输入一致
+    """
+    rows = [(station.station_id, station.name) for station in stations]
+    refresh_stations(stations)
+    
+    statuses = load_station_statuses([station_id for station_id, _ in rows])
+    return [{
+        'station_id': station_id,
+        'name': name,
+        'ports': statuses[station_id].get('ports', [])
+    } for station_id, name in rows]
+
+def refresh_stations(stations: List[ChargingStation]) -> None:
+    """刷新给定充电桩中缓存已过期的状态
+    
+    启用异步处理时提交一个批量更新任务，否则一次批量检查缓存后同步逐个更新已过期的充电桩。
+    
+    Args:
+        stations: 充电桩实例列表
+    """
+    station_ids = [station.station_id for station in stations]
+    # 如果启用异步处理，提交异步任务批量更新
+    if Config.ENABLE_ASYNC and station_ids:
+        from app.tasks import batch_update_stations
+        with stage('enqueue'):
+            batch_update_stations.delay(station_ids)
+    else:
+        # 同步更新每个已过期的充电桩，按ID更新，不再访问可能已过期的实例
+        with stage('cache'):
+            stale_ids = get_stale_station_ids(station_ids)
+        for station_id in stale_ids:
+            logger.info(f"同步更新充电桩 {station_id} 状态")
+            update_station_sync(station_id)
+
+def encode_cursor(station_id: str) -> str:
+    """把充电桩ID编码为不透明的分页游标"""
+    return base64.urlsafe_b64encode(station_id.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor: str) -> str:
+    """解码分页游标
+    
+    Raises:
+        ValueError: 游标格式无效
+    """
+    try:
+        station_id = base64.b64decode(cursor + '=' * (-len(cursor) % 4), altchars=b'-_', validate=True).decode('utf-8')
+    except (binascii.Error, UnicodeDecodeError) as e:
+        raise ValueError(f"无效的分页游标: {cursor}") from e
+    if not station_id:
+        raise ValueError(f"无效的分页游标: {cursor}")
+    return station_id
+
+def get_stations_page(limit: Optional[int] = None, cursor: Optional[str] = None,
+                      status: Optional[str] = None, min_free: Optional[int] = None,
+                      prefix: Optional[str] = None) -> Dict[str, Any]:
+    """分页并筛选获取激活的充电桩
+    
+    ID前缀和游标条件下推到SQL；端口状态和空闲端口数条件在列式状态存储中向量化筛选，
+    再只按本页的充电桩ID查询数据库。只有本页返回的充电桩会被刷新和序列化。
+    
+    Args:
+        limit: 每页数量，为None时返回所有符合条件的充电桩
+        cursor: 上一页返回的游标
+        status: 至少有一个端口处于该状态
+        min_free: 最少空闲端口数
+        prefix: 充电桩ID前缀（系列），如 '93'
+        
+    Returns:
+        Dict[str, Any]: 包含 stations 和 next_cursor 的字典，没有下一页时 next_cursor 为None
+        
+    Raises:
+        ValueError: 游标格式无效或端口状态不是已知的状态
+    """
+    after = decode_cursor(cursor) if cursor else None
+    fetch_limit = limit + 1 if limit is not None else None
+    
+    if status or min_free:
+        # 需要端口状态的条件在列式状态存储中筛选
+        if not index_maintenance_running():
+            sync_fleet_store_if_stale()
+        station_ids = fleet_store.match_stations(min_free=min_free, status=status, prefix=prefix,
+                                                 after=after, limit=fetch_limit)
+        station_map = {station.station_id: station
+                       for station in StationRepository.get_stations_by_ids(station_ids)
+                       if station.is_active}
+        stations = [station_map[sid] for sid in station_ids if sid in station_map]
+    else:
+        stations = StationRepository.get_active_stations_page(after=after, limit=fetch_limit, prefix=prefix)
+    
+    has_more = limit is not None and len(stations) > limit
+    if has_more:
+        stations = stations[:limit]
+    # 游标在刷新前计算，避免访问刷新提交后已过期的实例
+    next_cursor = encode_cursor(stations[-1].station_id) if has_more else None
+    
+    return {
+        'stations': build_stations_data(stations),
+        'next_cursor': next_cursor
+    }
+
 def get_station_by_id(station_id: str) -> Optional[Dict[str, Any]]:
     """根据ID获取充电桩状态
     
@@ -186,10 +356,12 @@ def get_station_by_id(station_id: str) -> Optional[Dict[str, Any]]:
     """
     try:
         # 尝试从缓存获取
-        cached_status = get_station_status(station_id)
+        with stage('cache'):
+            cached_status = get_station_status(station_id)
         if cached_status:
             # 获取充电桩基本信息
-            station = StationRepository.get_station_by_id(station_id)
+            with stage('db'):
+                station = StationRepository.get_station_by_id(station_id)
             if station:
                 return {
                     'station_id': station.station_id,
@@ -198,12 +370,303 @@ def get_station_by_id(station_id: str) -> Optional[Dict[str, Any]]:
                 }
         
         # 如果缓存没有，则获取实时数据
-        station = StationRepository.get_station_by_id(station_id)
+        with stage('db'):
+            station = StationRepository.get_station_by_id(station_id)
         if station:
             update_station_status(station)
-            return station.to_dict()
+            with stage('db'):
+                return station.to_dict()
         
         return None
     except Exception as e:
         logger.error(f"获取充电桩 {station_id} 信息时出错: {str(e)}")
-        return None 
\ No newline at end of file
+        return None 
+
+def sync_shared_state(writer) -> int:
+    """刷新所有激活充电桩的状态并写入共享内存状态段
+    
+    Args:
+        writer: 以写入方打开的 SharedFleetState 实例
+        
+    Returns:
+        int: 写入的充电桩数量
+    """
+    stations = StationRepository.get_all_active_stations()
+    
+    # 只刷新缓存已过期的充电桩
+    for station in stations:
+        update_station_status(station, use_async=False)
+    
+    station_ids = [station.station_id for station in stations]
+    statuses = get_station_statuses(station_ids)
+    entries = []
+    for station in stations:
+        status_data = statuses.get(station.station_id) or station.to_dict()
+        entries.append((station.station_id, station.name, status_data))
+    
+    writer.retain_stations(station_ids)
+    return writer.write_stations(entries)
+
+def get_fleet_summary() -> Dict[str, Any]:
+    """获取全部充电桩的汇总统计
+    
+    列式状态存储由后台线程定期同步（缓存已过期的充电桩使用数据库中的端口状态），
+    这里只进行向量化统计；未启动后台线程时先按需同步一次。
+    
+    Returns:
+        Dict[str, Any]: 汇总统计数据
+    """
+    if not index_maintenance_running():
+        sync_fleet_store_if_stale()
+    return fleet_store.summary()
+
+def load_station_statuses(station_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """批量获取充电桩的最新已知状态
+    
+    优先读取缓存；缓存已过期或尚未写入的充电桩回退到数据库中最近一次写入的端口状态，
+    因此长时间没有刷新（或冷启动）后仍能返回全部充电桩。
+    
+    Args:
+        station_ids: 充电桩ID列表
+        
+    Returns:
+        Dict[str, Dict[str, Any]]: 充电桩ID到状态数据的映射，数据库中没有端口的充电桩状态为空端口列表
+    """
+    with stage('cache'):
+        statuses = get_station_statuses(station_ids)
+    missing = [station_id for station_id in station_ids if station_id not in statuses]
+    if missing:
+        for station_id in missing:
+            statuses[station_id] = {'device_id': station_id, 'ports': []}
+        with stage('db'):
+            for port in PortRepository.get_ports_by_station_ids(missing):
+                statuses[port.station_id]['ports'].append(port.to_dict())
+    return statuses
+
+def sync_fleet_store_if_stale() -> None:
+    """列式状态存储超过缓存有效期未全量同步时，同步全部激活充电桩的最新已知状态"""
+    if time.time() - fleet_store.last_sync > Config.CACHE_TIMEOUT:
+        station_ids = [station.station_id for station in StationRepository.get_all_active_stations()]
+        fleet_store.sync(load_station_statuses(station_ids))
+
+# 同一时间只允许一个线程重建或同步物化充电桩列表
+_fleet_view_lock = threading.Lock()
+
+def get_stations_listing() -> Tuple[int, bytes]:
+    """获取全部激活充电桩的预编码列表，即 /api/stations 无参数时的响应体
+    
+    列表在进程内常驻，读取本身不访问数据库和缓存。维护工作按间隔摊销到少数请求上：
+    每 FLEET_VIEW_SYNC_INTERVAL 秒同步一次其他进程的变更，每 CACHE_TIMEOUT 秒触发一次
+    过期充电桩的刷新，每 FLEET_VIEW_MAX_AGE 秒全量重建一次以同步充电桩的增删。
+    其他线程正在维护时直接返回当前列表。
+    
+    Returns:
+        Tuple[int, bytes]: (列表版本号, UTF-8编码的JSON响应体)
+    """
+    if not fleet_view.built_at:
+        with _fleet_view_lock:
+            if not fleet_view.built_at:
+                rebuild_fleet_view()
+        return fleet_view.body()
+    
+    now = time.time()
+    due = (now - fleet_view.built_at > Config.FLEET_VIEW_MAX_AGE
+           or now - fleet_view.synced_at >= Config.FLEET_VIEW_SYNC_INTERVAL
+           or (not Config.SHARED_STATE_ENABLED and now - fleet_view.refreshed_at > Config.CACHE_TIMEOUT))
+    if due and _fleet_view_lock.acquire(blocking=False):
+        try:
+            if now - fleet_view.built_at > Config.FLEET_VIEW_MAX_AGE:
+                rebuild_fleet_view()
+            else:
+                if not Config.SHARED_STATE_ENABLED and now - fleet_view.refreshed_at > Config.CACHE_TIMEOUT:
+                    # 共享内存模式下由轮询进程负责刷新
+                    fleet_view.refreshed_at = now
+                    with stage('db'):
+                        stations = StationRepository.get_all_active_stations()
+                    refresh_stations(stations)
+                if now - fleet_view.synced_at >= Config.FLEET_VIEW_SYNC_INTERVAL:
+                    sync_fleet_view()
+        finally:
+            _fleet_view_lock.release()
+    return fleet_view.body()
+
+def read_shared_fleet() -> Optional[Tuple[int, List[Dict[str, Any]]]]:
+    """读取本节点的共享内存状态段
+    
+    Returns:
+        Optional[Tuple[int, List[Dict[str, Any]]]]: (状态段版本号, 充电桩列表)，
+        未启用、状态段尚未创建或已超过 SHARED_STATE_MAX_AGE 未更新时返回None
+    """
+    if not Config.SHARED_STATE_ENABLED:
+        return None
+    from app.shared_state import get_shared_state_reader
+    reader = get_shared_state_reader()
+    if reader is None:
+        return None
+    with stage('shm'):
+        return reader.read_snapshot(max_age=Config.SHARED_STATE_MAX_AGE)
+
+def rebuild_fleet_view_from_shared(shared: Tuple[int, List[Dict[str, Any]]]) -> int:
+    """用共享内存状态段全量构建物化充电桩列表，状态段版本号作为已同步版本号
+    
+    Args:
+        shared: read_shared_fleet 的返回值
+        
+    Returns:
+        int: 列表中的充电桩数量
+    """
+    seq, stations_data = shared
+    now = time.time()
+    fleet_view.rebuild(((station['station_id'], station['name'], station['ports']) for station in stations_data),
+                       now, seq)
+    fleet_view.refreshed_at = now
+    fleet_view.synced_at = now
+    return len(stations_data)
+
+def rebuild_fleet_view() -> int:
+    """全量构建物化充电桩列表
+    
+    共享内存模式下直接使用本节点的状态段，不访问数据库和缓存；
+    否则（或状态段不可用时）从数据库和缓存构建。
+    
+    Returns:
+        int: 列表中的充电桩数量
+    """
+    shared = read_shared_fleet()
+    if shared is not None:
+        return rebuild_fleet_view_from_shared(shared)
+    
+    version = get_fleet_version()
+    with stage('db'):
+        stations = StationRepository.get_all_active_stations()
+    rows = [(station.station_id, station.name) for station in stations]
+    if not Config.SHARED_STATE_ENABLED:
+        refresh_stations(stations)
+    
+    statuses = load_station_statuses([station_id for station_id, _ in rows])
+    entries = [(station_id, name, statuses[station_id].get('ports', [])) for station_id, name in rows]
+    
+    now = time.time()
+    fleet_view.rebuild(entries, now, version)
+    fleet_view.refreshed_at = now
+    fleet_view.synced_at = now
+    return len(entries)
+
+def sync_fleet_view() -> int:
+    """把其他进程发布的变更同步到物化充电桩列表
+    
+    只重新读取变更记录中的充电桩；变更数超过 FLEET_VIEW_MAX_CHANGES、共享版本号回退（缓存被清空）
+    或变更记录缺失时，读取列表中全部充电桩的缓存状态。
+    共享内存模式下改为从本节点的状态段同步，以状态段版本号作为同步计数，不访问缓存；
+    状态段不可用时回退到缓存。
+    
+    Returns:
+        int: 更新的充电桩数量
+    """
+    fleet_view.synced_at = time.time()
+    if Config.SHARED_STATE_ENABLED:
+        synced = sync_fleet_view_from_shared()
+        if synced is not None:
+            return synced
+    
+    version = get_fleet_version()
+    synced = fleet_view.synced_version
+    if version is None or version == synced:
+        return 0
+    
+    station_ids = None
+    if synced is not None and synced < version <= synced + Config.FLEET_VIEW_MAX_CHANGES:
+        changes = get_fleet_changes(synced + 1, version)
+        if None not in changes:
+            station_ids = list(set(changes))
+    if station_ids is None:
+        station_ids = fleet_view.station_ids
+    
+    with stage('cache'):
+        statuses = get_station_statuses(station_ids)
+    return fleet_view.update_stations(
+        {station_id: status_data.get('ports', []) for station_id, status_data in statuses.items()},
+        synced_version=version
+    )
+
+def sync_fleet_view_from_shared() -> Optional[int]:
+    """把共享内存状态段的变化同步到物化充电桩列表
+    
+    状态段版本号与已同步版本号相同时不读取槽位；充电桩集合或顺序变化时全量重建。
+    
+    Returns:
+        Optional[int]: 更新的充电桩数量，状态段不可用时返回None，由调用方回退到缓存同步
+    """
+    from app.shared_state import get_shared_state_reader
+    reader = get_shared_state_reader()
+    if reader is None:
+        return None
+    seq = reader.version(max_age=Config.SHARED_STATE_MAX_AGE)
+    if seq is None:
+        return None
+    if seq == fleet_view.synced_version:
+        return 0
+    
+    shared = read_shared_fleet()
+    if shared is None:
+        return None
+    seq, stations_data = shared
+    if [station['station_id'] for station in stations_data] != fleet_view.station_ids:
+        return rebuild_fleet_view_from_shared(shared)
+    return fleet_view.update_stations(
+        {station['station_id']: station['ports'] for station in stations_data},
+        synced_version=seq
+    )
+
+def rebuild_geo_index() -> int:
+    """从数据库全量重建空间索引
+    
+    Returns:
+        int: 索引中的充电桩数量
+    """
+    entries = [
+        GeoEntry(station.station_id, station.name, station.latitude, station.longitude)
+        for station in StationRepository.get_located_active_stations()
+    ]
+    geo_index.rebuild(entries, time.time())
+    return len(entries)
+
+def find_nearest_stations(latitude: float, longitude: float, k: int = 5,
+                          min_free: int = 1) -> List[Dict[str, Any]]:
+    """查找附近有空闲端口的充电桩
+    
+    空间索引和空闲端口数都来自内存，由后台线程定期重建和同步，请求本身不访问数据库；
+    未启动后台线程（INDEX_MAINTENANCE_INTERVAL 为0）时在请求中按需维护。
+    
+    Args:
+        latitude: 纬度
+        longitude: 经度
+        k: 返回数量
+        min_free: 最少空闲端口数
+        
+    Returns:
+        List[Dict[str, Any]]: 按距离升序、距离相同时按空闲端口数降序排列的充电桩列表
+    """
+    if not index_maintenance_running():
+        run_index_maintenance()
+    
+    free_ports = {}
+    
+    def has_free_ports(entry: GeoEntry) -> bool:
+        free = fleet_store.free_ports(entry.station_id) or 0
+        free_ports[entry.station_id] = free
+        return free >= min_free
+    
+    results = geo_index.nearest(latitude, longitude, k, predicate=has_free_ports)
+    results.sort(key=lambda item: (round(item[0]), -free_ports[item[1].station_id]))
+    return [
+        {
+            'station_id': entry.station_id,
+            'name': entry.name,
+            'latitude': entry.latitude,
+            'longitude': entry.longitude,
+            'distance': round(distance, 1),
+            'free_ports': free_ports[entry.station_id]
+        }
+        for distance, entry in results
+    ]
@@ -0,0 +1,153 @@
+"""
+充电桩监控系统 - 缓存预热服务模块
+
+这个模块负责在冷启动时把最近一次已知的端口状态批量写入缓存，
+数据来源可以是数据库中的 port_status 表，也可以是定期写入的压缩快照文件。
+"""
+
+import os
+import gzip
+import json
+import time
+import logging
+from typing import Dict, Any, Optional
+from app.config import Config
+from app.repositories.station_repository import StationRepository, PortRepository
+from app.cache import set_station_statuses, get_station_statuses
+from app.fleet_store import fleet_store
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 快照文件格式版本
+SNAPSHOT_VERSION = 1
+
+def load_states_from_database() -> Dict[str, Dict[str, Any]]:
+    """从数据库加载所有激活充电桩最近一次已知的端口状态
+
+    Returns:
+        Dict[str, Dict[str, Any]]: 充电桩ID到状态数据的映射，格式与 get_port_status 返回值一致
+    """
+    statuses: Dict[str, Dict[str, Any]] = {}
+    for port in PortRepository.get_ports_of_active_stations():
+        station_status = statuses.setdefault(port.station_id, {
+            'device_id': port.station_id,
+            'ports': []
+        })
+        station_status['ports'].append(port.to_dict())
+    logger.info(f"从数据库加载了 {len(statuses)} 个充电桩的端口状态")
+    return statuses
+
+def load_snapshot(path: Optional[str] = None, max_age: Optional[int] = None) -> Optional[Dict[str, Dict[str, Any]]]:
+    """从压缩快照文件加载端口状态
+
+    Args:
+        path: 快照文件路径，默认使用配置中的路径
+        max_age: 快照最长可用时间（秒），超过则视为无效，默认使用配置
+
+    Returns:
+        Optional[Dict[str, Dict[str, Any]]]: 充电桩ID到状态数据的映射，快照不存在或无效时返回None
+    """
+    path = path or Config.CACHE_SNAPSHOT_PATH
+    max_age = Config.CACHE_SNAPSHOT_MAX_AGE if max_age is None else max_age
+
+    if not os.path.exists(path):
+        logger.debug(f"缓存快照文件不存在: {path}")
+        return None
+
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"读取缓存快照文件失败: {str(e)}")
+        return None
+
+    if snapshot.get('version') != SNAPSHOT_VERSION:
+        logger.warning(f"缓存快照版本不匹配: {snapshot.get('version')}")
+        return None
+
+    age = time.time() - snapshot.get('written_at', 0)
+    if age > max_age:
+        logger.info(f"缓存快照已过期，已经过去 {int(age)} 秒")
+        return None
+
+    stations = snapshot.get('stations', {})
+    logger.info(f"从快照文件加载了 {len(stations)} 个充电桩的端口状态")
+    return stations
+
+def write_snapshot(path: Optional[str] = None) -> int:
+    """把当前缓存中所有激活充电桩的状态写入压缩快照文件
+
+    先写入临时文件再原子替换，避免读取到写了一半的快照。
+
+    Args:
+        path: 快照文件路径，默认使用配置中的路径
+
+    Returns:
+        int: 写入快照的充电桩数量
+    """
+    path = path or Config.CACHE_SNAPSHOT_PATH
+    station_ids = [station.station_id for station in StationRepository.get_all_active_stations()]
+    stations = get_station_statuses(station_ids)
+
+    snapshot = {
+        'version': SNAPSHOT_VERSION,
+        'written_at': time.time(),
+        'stations': stations
+    }
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+        json.dump(snapshot, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+    logger.info(f"已写入缓存快照 {path}，共 {len(stations)} 个充电桩")
+    return len(stations)
+
+def warm_cache(source: str = 'auto') -> int:
+    """预热缓存
+
+    Args:
+        source: 数据来源，'snapshot' 只使用快照，'database' 只使用数据库，
+                'auto' 优先使用未过期的快照，否则回退到数据库
+
+    Returns:
+        int: 写入缓存的充电桩数量
+    """
+    statuses = None
+    if source in ('auto', 'snapshot'):
+        statuses = load_snapshot()
+    if statuses is None and source in ('auto', 'database'):
+        statuses = load_states_from_database()
+
+    count = set_station_statuses(statuses or {})
+    fleet_store.update_stations(statuses or {})
+    logger.info(f"缓存预热完成，共写入 {count} 个充电桩状态")
+    return count
+
+def warm_cache_on_start(app) -> bool:
+    """服务进程启动时预热缓存
+
+    由 run.py、asgi.py 等服务入口调用，create_app 本身不预热，Celery 和命令行创建应用时不访问Redis和数据库。
+    flask 命令行同样会加载 run.py，此时跳过，需要时执行 flask warm-cache。
+    共享缓存只需由第一个启动的进程预热，其余进程直接跳过。
+
+    Args:
+        app: Flask应用
+
+    Returns:
+        bool: 本进程是否执行了预热
+    """
+    if not app.config.get('CACHE_WARMUP_ON_START') or os.environ.get('FLASK_RUN_FROM_CLI') == 'true':
+        return False
+    from app.cache import claim_warmup
+    with app.app_context():
+        try:
+            if not claim_warmup():
+                return False
+            warm_cache()
+            return True
+        except Exception as e:
+            logger.warning(f"缓存预热失败: {str(e)}")
+            return False
@@ -0,0 +1,347 @@
+"""
+充电桩监控系统 - 共享内存状态模块
+
+这个模块提供基于 mmap 的共享充电桩状态段。同一节点上由一个轮询进程负责写入，
+所有Web工作进程通过只读映射直接读取，无需访问Redis，也无需JSON解码。
+
+内存布局（小端序，定长记录）：
+    头部:     magic(8s) seq(Q) max_stations(I) ports_per_station(I) station_count(I) updated_at(d)
+    充电桩槽: station_id(20s) name(150s) service(150s) port_count(H) updated_at(d)
+              + ports_per_station 个端口记录
+    端口记录: port(H) status_code(B) voltage(f) current(f) timestamp(d)
+
+写入使用顺序锁（seqlock）：写入前把 seq 加一变为奇数，写完再加一变为偶数；
+读取方在 seq 为奇数或读取前后 seq 不一致时重试。
+"""
+
+import os
+import mmap
+import time
+import struct
+import logging
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+MAGIC = b'MMFLEET2'
+# 名称和服务类型对应 String(50) 列，按每个字符最多3个UTF-8字节预留，中文名称不会被截断
+ID_SIZE = 20
+NAME_SIZE = 150
+SERVICE_SIZE = 150
+HEADER = struct.Struct('<8sQIIId')
+STATION = struct.Struct(f'<{ID_SIZE}s{NAME_SIZE}s{SERVICE_SIZE}sHd')
+PORT = struct.Struct('<HBffd')
+SEQ_OFFSET = 8
+SEQ = struct.Struct('<Q')
+
+# 端口状态编码
+STATUS_CODES = {'空闲': 0, '占用': 1, '故障': 2}
+STATUS_NAMES = {code: name for name, code in STATUS_CODES.items()}
+UNKNOWN_STATUS_CODE = 255
+
+# 读取方在写入进行中时的最大重试次数
+MAX_READ_RETRIES = 100
+
+def _encode(value: Optional[str], size: int) -> bytes:
+    """把字符串编码为定长UTF-8字节，超长时在字符边界截断"""
+    data = (value or '').encode('utf-8')[:size]
+    return data.decode('utf-8', 'ignore').encode('utf-8')
+
+def _decode(value: bytes) -> str:
+    """解码定长UTF-8字节"""
+    return value.rstrip(b'\x00').decode('utf-8', 'ignore')
+
+def _to_epoch(timestamp: Optional[str]) -> float:
+    """把ISO格式时间戳转换为epoch秒数"""
+    if not timestamp:
+        return 0.0
+    try:
+        return datetime.fromisoformat(timestamp).timestamp()
+    except (TypeError, ValueError):
+        return 0.0
+
+class SharedFleetState:
+    """共享内存充电桩状态段
+
+    Attributes:
+        path: 映射文件路径，建议位于 /dev/shm
+        max_stations: 最大充电桩数量
+        ports_per_station: 每个充电桩预留的端口记录数
+        writable: 是否以写入方打开
+    """
+
+    def __init__(self, path: str, max_stations: int = 1024, ports_per_station: int = 16,
+                 writable: bool = False):
+        self.path = path
+        self.max_stations = max_stations
+        self.ports_per_station = ports_per_station
+        self.writable = writable
+        self.slot_size = STATION.size + PORT.size * ports_per_station
+        self.size = HEADER.size + self.slot_size * max_stations
+        self._mm: Optional[mmap.mmap] = None
+        self._slots: Dict[str, int] = {}
+        self._station_count = 0
+
+    def open(self) -> 'SharedFleetState':
+        """打开共享状态段
+
+        写入方在文件不存在或布局不一致时重新初始化；读取方以只读方式映射，
+        并使用文件头中记录的布局。
+
+        Returns:
+            SharedFleetState: 自身，便于链式调用
+        """
+        if self.writable:
+            self._open_writer()
+        else:
+            self._open_reader()
+        return self
+
+    def _open_writer(self) -> None:
+        """以写入方打开，必要时初始化文件"""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size != self.size:
+                os.ftruncate(fd, 0)
+                os.ftruncate(fd, self.size)
+            self._mm = mmap.mmap(fd, self.size, access=mmap.ACCESS_WRITE)
+        finally:
+            os.close(fd)
+
+        magic, seq, max_stations, ports_per_station, station_count, _ = HEADER.unpack_from(self._mm, 0)
+        if (magic != MAGIC or max_stations != self.max_stations
+                or ports_per_station != self.ports_per_station):
+            HEADER.pack_into(self._mm, 0, MAGIC, 0, self.max_stations, self.ports_per_station, 0, 0.0)
+            station_count = 0
+        elif seq % 2:
+            # 上一个写入进程在写入中途退出，恢复为偶数
+            SEQ.pack_into(self._mm, SEQ_OFFSET, seq + 1)
+
+        # 从已有内容重建槽位索引
+        self._station_count = station_count
+        self._slots = {}
+        for slot in range(station_count):
+            station_id = _decode(self._mm[self._slot_offset(slot):self._slot_offset(slot) + ID_SIZE])
+            if station_id:
+                self._slots[station_id] = slot
+        logger.info(f"共享状态段已打开（写入）: {self.path}，已有 {len(self._slots)} 个充电桩")
+
+    def _open_reader(self) -> None:
+        """以只读方式打开"""
+        with open(self.path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, _, max_stations, ports_per_station, _, _ = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"共享状态段格式无效: {self.path}")
+        self.max_stations = max_stations
+        self.ports_per_station = ports_per_station
+        self.slot_size = STATION.size + PORT.size * ports_per_station
+        self.size = HEADER.size + self.slot_size * max_stations
+
+    def close(self) -> None:
+        """关闭映射"""
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+
+    def _slot_offset(self, slot: int) -> int:
+        """计算槽位偏移量"""
+        return HEADER.size + slot * self.slot_size
+
+    def _begin_write(self) -> int:
+        """进入写临界区，seq 变为奇数"""
+        seq = SEQ.unpack_from(self._mm, SEQ_OFFSET)[0] + 1
+        SEQ.pack_into(self._mm, SEQ_OFFSET, seq)
+        return seq
+
+    def _end_write(self, seq: int) -> None:
+        """离开写临界区，更新头部并把 seq 变为偶数"""
+        HEADER.pack_into(self._mm, 0, MAGIC, seq, self.max_stations, self.ports_per_station,
+                         self._station_count, time.time())
+        SEQ.pack_into(self._mm, SEQ_OFFSET, seq + 1)
+
+    def _write_slot(self, slot: int, station_id: str, name: Optional[str],
+                    status_data: Dict[str, Any]) -> None:
+        """原地写入单个充电桩槽位"""
+        ports = status_data.get('ports', [])[:self.ports_per_station]
+        service = ports[0].get('service') if ports else None
+        offset = self._slot_offset(slot)
+        STATION.pack_into(self._mm, offset, _encode(station_id, ID_SIZE), _encode(name, NAME_SIZE),
+                          _encode(service, SERVICE_SIZE), len(ports), time.time())
+        offset += STATION.size
+        for port in ports:
+            PORT.pack_into(
+                self._mm, offset,
+                int(port.get('port') or 0),
+                STATUS_CODES.get(port.get('status'), UNKNOWN_STATUS_CODE),
+                float(port.get('voltage') or 0.0),
+                float(port.get('current') or 0.0),
+                _to_epoch(port.get('timestamp'))
+            )
+            offset += PORT.size
+
+    def write_stations(self, entries: List[Tuple[str, Optional[str], Dict[str, Any]]]) -> int:
+        """批量原地更新充电桩状态
+
+        Args:
+            entries: (充电桩ID, 充电桩名称, 状态数据) 元组列表，状态数据格式与 get_port_status 返回值一致
+
+        Returns:
+            int: 实际写入的充电桩数量，超出容量的充电桩会被忽略
+        """
+        written = 0
+        seq = self._begin_write()
+        try:
+            for station_id, name, status_data in entries:
+                slot = self._slots.get(station_id)
+                if slot is None:
+                    if self._station_count >= self.max_stations:
+                        logger.warning(f"共享状态段已满，忽略充电桩 {station_id}")
+                        continue
+                    slot = self._station_count
+                    self._station_count += 1
+                    self._slots[station_id] = slot
+                self._write_slot(slot, station_id, name, status_data)
+                written += 1
+        finally:
+            self._end_write(seq)
+        return written
+
+    def retain_stations(self, station_ids: List[str]) -> None:
+        """只保留指定的充电桩，其余槽位被清空并压缩
+
+        Args:
+            station_ids: 需要保留的充电桩ID列表
+        """
+        keep = set(station_ids)
+        if keep.issuperset(self._slots):
+            return
+
+        seq = self._begin_write()
+        try:
+            kept = [(sid, slot) for sid, slot in sorted(self._slots.items(), key=lambda item: item[1])
+                    if sid in keep]
+            slots: Dict[str, int] = {}
+            for new_slot, (station_id, old_slot) in enumerate(kept):
+                if new_slot != old_slot:
+                    old_offset = self._slot_offset(old_slot)
+                    self._mm[self._slot_offset(new_slot):self._slot_offset(new_slot) + self.slot_size] = \
+                        self._mm[old_offset:old_offset + self.slot_size]
+                slots[station_id] = new_slot
+            self._slots = slots
+            self._station_count = len(kept)
+        finally:
+            self._end_write(seq)
+
+    def version(self, max_age: Optional[float] = None) -> Optional[int]:
+        """读取状态段的版本号（即 seq），不解析槽位数据
+
+        每次写入后版本号都会增加，读取方可以据此判断状态段自上次读取后是否被写入过。
+
+        Args:
+            max_age: 共享状态最长可用时间（秒），写入方超过该时间未更新则返回None
+
+        Returns:
+            Optional[int]: 版本号，状态过期或持续读取到写入中的数据时返回None
+        """
+        for _ in range(MAX_READ_RETRIES):
+            seq = SEQ.unpack_from(self._mm, SEQ_OFFSET)[0]
+            if seq % 2:
+                continue
+            updated_at = HEADER.unpack_from(self._mm, 0)[5]
+            if SEQ.unpack_from(self._mm, SEQ_OFFSET)[0] == seq:
+                break
+        else:
+            return None
+        if max_age is not None and time.time() - updated_at > max_age:
+            return None
+        return seq
+
+    def read_snapshot(self, max_age: Optional[float] = None) -> Optional[Tuple[int, List[Dict[str, Any]]]]:
+        """读取所有充电桩状态及其对应的版本号
+
+        Args:
+            max_age: 共享状态最长可用时间（秒），写入方超过该时间未更新则返回None
+
+        Returns:
+            Optional[Tuple[int, List[Dict[str, Any]]]]: (版本号, 与 ChargingStation.to_dict() 格式一致的充电桩列表)，
+            状态过期或持续读取到写入中的数据时返回None
+        """
+        for _ in range(MAX_READ_RETRIES):
+            seq = SEQ.unpack_from(self._mm, SEQ_OFFSET)[0]
+            if seq % 2:
+                continue
+            _, _, _, _, station_count, updated_at = HEADER.unpack_from(self._mm, 0)
+            data = self._mm[HEADER.size:HEADER.size + station_count * self.slot_size]
+            if SEQ.unpack_from(self._mm, SEQ_OFFSET)[0] == seq:
+                break
+        else:
+            logger.warning("读取共享状态段时重试次数过多")
+            return None
+
+        if max_age is not None and time.time() - updated_at > max_age:
+            logger.debug(f"共享状态段已过期，已经过去 {time.time() - updated_at:.1f} 秒")
+            return None
+
+        return seq, self._parse(data, station_count)
+
+    def read_all(self, max_age: Optional[float] = None) -> Optional[List[Dict[str, Any]]]:
+        """读取所有充电桩状态
+
+        Args:
+            max_age: 共享状态最长可用时间（秒），写入方超过该时间未更新则返回None
+
+        Returns:
+            Optional[List[Dict[str, Any]]]: 与 ChargingStation.to_dict() 格式一致的充电桩列表，
+            状态过期或持续读取到写入中的数据时返回None
+        """
+        snapshot = self.read_snapshot(max_age)
+        return snapshot[1] if snapshot is not None else None
+
+    def _parse(self, data: bytes, station_count: int) -> List[Dict[str, Any]]:
+        """解析槽位数据"""
+        stations = []
+        for slot in range(station_count):
+            offset = slot * self.slot_size
+            station_id, name, service, port_count, _ = STATION.unpack_from(data, offset)
+            offset += STATION.size
+            service = _decode(service)
+            ports = []
+            for port_number, status_code, voltage, current, timestamp in PORT.iter_unpack(
+                    data[offset:offset + port_count * PORT.size]):
+                ports.append({
+                    'port': port_number,
+                    'status': STATUS_NAMES.get(status_code, '未知'),
+                    'service': service,
+                    'voltage': voltage,
+                    'current': current,
+                    'timestamp': datetime.fromtimestamp(timestamp).isoformat() if timestamp else None
+                })
+            stations.append({
+                'station_id': _decode(station_id),
+                'name': _decode(name),
+                'ports': ports
+            })
+        return stations
+
+# 每个进程各自持有的只读映射
+_reader: Optional[SharedFleetState] = None
+
+def get_shared_state_reader() -> Optional[SharedFleetState]:
+    """获取当前进程的共享状态段只读映射
+
+    Returns:
+        Optional[SharedFleetState]: 只读映射，共享状态段尚未由轮询进程创建时返回None
+    """
+    global _reader
+    if _reader is None:
+        from app.config import Config
+        try:
+            _reader = SharedFleetState(Config.SHARED_STATE_PATH).open()
+        except (OSError, ValueError) as e:
+            logger.debug(f"共享状态段不可用: {str(e)}")
+            return None
+    return _reader
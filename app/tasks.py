@@ -5,10 +5,13 @@
 """
 
 import os
+import time
 import logging
 from typing import Dict, Any, List, Optional
-from celery import Celery
+from celery import Celery, Task
+from celery import signals
 from app.config import Config
+from app.metrics import TASK_RUNTIME, mark_process_dead, start_celery_exporter
 
 # 配置日志
 logger = logging.getLogger(__name__)
@@ -26,11 +29,23 @@ def make_celery(app_name=__name__):
     broker_url = Config.CELERY_BROKER_URL
     result_backend = Config.CELERY_RESULT_BACKEND
     
+    class AppContextTask(Task):
+        """在Flask应用上下文中执行并统计SQL语句的任务，Flask应用在首次执行任务时才创建"""
+        
+        def __call__(self, *args, **kwargs):
+            from app.query_stats import track_queries, report_query_stats
+            with get_flask_app().app_context(), track_queries() as stats:
+                try:
+                    return super().__call__(*args, **kwargs)
+                finally:
+                    report_query_stats('task', self.name, stats, Config.SQL_QUERY_WARN_THRESHOLD)
+    
     celery = Celery(
         app_name,
         broker=broker_url,
         backend=result_backend,
-        include=['app.tasks']
+        include=['app.tasks'],
+        task_cls=AppContextTask
     )
     
     # 配置Celery
@@ -45,13 +60,70 @@ def make_celery(app_name=__name__):
         worker_concurrency=Config.CELERY_WORKER_CONCURRENCY,
         task_acks_late=True,  # 任务执行完成后才确认，避免任务丢失
         task_reject_on_worker_lost=True,  # worker意外退出时重新分配任务
-        task_default_rate_limit='10/m'  # 默认任务速率限制
+        task_default_rate_limit='10/m',  # 默认任务速率限制
+        beat_schedule={
+            # 定期写入缓存快照，供冷启动预热使用
+            'write-cache-snapshot': {
+                'task': 'app.tasks.write_cache_snapshot',
+                'schedule': Config.CACHE_SNAPSHOT_INTERVAL
+            }
+        }
     )
     
     return celery
 
 celery = make_celery()
 
+# 正在执行的任务开始时间，按任务ID记录
+_task_started: Dict[str, float] = {}
+
+@signals.task_prerun.connect
+def _record_task_start(task_id=None, **kwargs):
+    _task_started[task_id] = time.perf_counter()
+
+@signals.task_postrun.connect
+def _record_task_runtime(task_id=None, task=None, state=None, **kwargs):
+    start = _task_started.pop(task_id, None)
+    if start is not None and task is not None:
+        TASK_RUNTIME.labels(task.name, state or 'UNKNOWN').observe(time.perf_counter() - start)
+
+@signals.worker_init.connect
+def _start_metrics_exporter(**kwargs):
+    # 在主进程中启动导出服务，汇总所有子进程写入的指标
+    if Config.CELERY_METRICS_PORT:
+        start_celery_exporter(Config.CELERY_METRICS_PORT, Config.CELERY_BROKER_URL,
+                              [celery.conf.task_default_queue])
+
+@signals.worker_process_init.connect
+def _warm_up_upstream(**kwargs):
+    # prefork 子进程启动后创建自己的HTTP会话并预热连接
+    try:
+        from port_status import warm_up_session
+        warm_up_session()
+    except Exception as e:
+        logger.warning(f"预热上游连接失败: {str(e)}")
+
+@signals.worker_process_shutdown.connect
+def _cleanup_process_metrics(pid=None, **kwargs):
+    mark_process_dead(pid or os.getpid())
+
+# 任务使用的Flask应用实例（延迟创建）
+_flask_app = None
+
+def get_flask_app():
+    """获取任务使用的Flask应用实例
+    
+    延迟到首次执行任务时创建，导入本模块（如Web进程提交任务）不会创建应用。
+    
+    Returns:
+        Flask: Flask应用实例
+    """
+    global _flask_app
+    if _flask_app is None:
+        from app import create_app
+        _flask_app = create_app(os.environ.get('FLASK_ENV', 'development'))
+    return _flask_app
+
 @celery.task(
     name='app.tasks.update_station',
     bind=True,
@@ -74,12 +146,11 @@ def update_station(self, station_id: str) -> Dict[str, Any]:
         logger.info(f"开始异步更新充电桩 {station_id} 状态")
         
         # 动态导入，避免循环导入
-        from port_status import get_port_status
         from app.repositories.station_repository import PortRepository
-        from app.cache import set_station_status
+        from app.services.station_service import fetch_station_status, publish_station_status
         
-        # 获取状态数据
-        status_data = get_port_status(station_id)
+        # 获取状态数据（含端口故障）
+        status_data = fetch_station_status(station_id)
         
         # 检查是否有错误
         if 'error' in status_data:
@@ -114,8 +185,8 @@ def update_station(self, station_id: str) -> Dict[str, Any]:
                 # 批量更新数据库
                 PortRepository.bulk_update_ports(ports_data)
                 
-                # 更新缓存
-                set_station_status(station_id, status_data)
+                # 更新缓存和进程内状态
+                publish_station_status(station_id, status_data)
                 
                 logger.info(f"充电桩 {station_id} 状态更新完成，共 {len(ports_data)} 个端口")
                 return {
@@ -232,4 +303,30 @@ def refresh_cached_stations() -> Dict[str, Any]:
             'status': 'error',
             'message': f'刷新已缓存充电桩出错: {str(e)}',
             'task_id': None
-        } 
\ No newline at end of file
+        } 
+
+@celery.task(name='app.tasks.write_cache_snapshot')
+def write_cache_snapshot() -> Dict[str, Any]:
+    """把当前缓存状态写入压缩快照文件
+    
+    Returns:
+        Dict[str, Any]: 操作结果
+    """
+    try:
+        # 动态导入，避免循环导入
+        from app.services.warmup_service import write_snapshot
+        
+        count = write_snapshot()
+        
+        return {
+            'status': 'success',
+            'message': f'已写入 {count} 个充电桩的缓存快照',
+            'count': count
+        }
+    except Exception as e:
+        logger.error(f"写入缓存快照时出错: {str(e)}")
+        return {
+            'status': 'error',
+            'message': f'写入缓存快照出错: {str(e)}',
+            'count': 0
+        }
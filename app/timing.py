@@ -0,0 +1,179 @@
+"""
+充电桩监控系统 - 请求耗时分解模块
+
+这个模块记录单个请求内各阶段（数据库查询、缓存读取、上游请求、序列化等）的耗时，
+通过 Server-Timing 响应头返回，并把超过阈值的慢请求写入结构化日志。
+
+未启用时 stage() 直接返回空上下文管理器，不做任何计时。
+Flask 请求的计时记录在 g 中；ASGI 原生处理器不经过 Flask 的请求钩子，
+通过 request_timing_scope() 把计时记录在上下文变量中，线程池中执行的同步代码同样能记录阶段。
+"""
+
+import json
+import time
+import logging
+import contextvars
+from contextlib import contextmanager, nullcontext
+from typing import Dict, List, Optional
+from flask import g, request, has_request_context
+
+# 配置日志
+logger = logging.getLogger(__name__)
+slow_request_logger = logging.getLogger('app.slow_requests')
+
+# 是否启用请求耗时分解，由 init_request_timing 从配置读取
+_enabled = False
+_threshold = 1.0
+_emit_header = True
+
+# Flask 请求上下文之外（ASGI原生处理器）正在记录的请求
+_current_timing: contextvars.ContextVar[Optional['RequestTiming']] = contextvars.ContextVar('request_timing', default=None)
+
+# 未启用时复用的空上下文管理器
+_NULL_STAGE = nullcontext()
+
+class _Stage:
+    """单个阶段的计时上下文管理器"""
+
+    __slots__ = ('timing', 'name', 'start')
+
+    def __init__(self, timing: 'RequestTiming', name: str):
+        self.timing = timing
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.timing.add(self.name, time.perf_counter() - self.start)
+        return False
+
+class RequestTiming:
+    """单个请求的阶段耗时记录
+
+    同名阶段会累加，例如逐个充电桩读取缓存的耗时合并为一个 cache 阶段。
+
+    Attributes:
+        start: 请求开始时间
+        stages: 阶段名称到 [累计耗时（秒）, 次数] 的映射
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.stages: Dict[str, List] = {}
+
+    def add(self, name: str, duration: float) -> None:
+        """累加一个阶段的耗时"""
+        entry = self.stages.get(name)
+        if entry is None:
+            self.stages[name] = [duration, 1]
+        else:
+            entry[0] += duration
+            entry[1] += 1
+
+    def elapsed(self) -> float:
+        """请求开始至今的耗时（秒）"""
+        return time.perf_counter() - self.start
+
+    def header_value(self, total: float) -> str:
+        """生成 Server-Timing 响应头的值"""
+        parts = [f'{name};dur={duration * 1000:.2f};desc="x{count}"'
+                 for name, (duration, count) in self.stages.items()]
+        parts.append(f'total;dur={total * 1000:.2f}')
+        return ', '.join(parts)
+
+def stage(name: str):
+    """记录当前请求中一个阶段的耗时
+
+    用法：
+        with stage('db'):
+            stations = StationRepository.get_all_active_stations()
+
+    Args:
+        name: 阶段名称
+
+    Returns:
+        上下文管理器，未启用或不在请求中时为空上下文管理器
+    """
+    if _enabled:
+        timing = g.get('request_timing') if has_request_context() else _current_timing.get()
+        if timing is not None:
+            return _Stage(timing, name)
+    return _NULL_STAGE
+
+@contextmanager
+def request_timing_scope():
+    """在 Flask 请求钩子之外记录一个请求的阶段耗时，供 ASGI 原生处理器使用
+
+    Yields:
+        Optional[RequestTiming]: 计时记录，未启用时为None
+    """
+    if not _enabled:
+        yield None
+        return
+    timing = RequestTiming()
+    token = _current_timing.set(timing)
+    try:
+        yield timing
+    finally:
+        _current_timing.reset(token)
+
+def finish_request_timing(timing: RequestTiming, method: str, path: str, query: str,
+                          status: int) -> Optional[str]:
+    """结束一个请求的计时，超过阈值时写入慢请求日志
+
+    Args:
+        timing: 计时记录
+        method: 请求方法
+        path: 请求路径
+        query: 查询字符串
+        status: 响应状态码
+
+    Returns:
+        Optional[str]: Server-Timing 响应头的值，不返回响应头时为None
+    """
+    total = timing.elapsed()
+    if total >= _threshold:
+        slow_request_logger.warning(json.dumps({
+            'event': 'slow_request',
+            'method': method,
+            'path': path,
+            'query': query,
+            'status': status,
+            'duration_ms': round(total * 1000, 2),
+            'stages': {name: {'duration_ms': round(duration * 1000, 2), 'count': count}
+                       for name, (duration, count) in timing.stages.items()}
+        }, ensure_ascii=False))
+    return timing.header_value(total) if _emit_header else None
+
+def init_request_timing(app) -> None:
+    """根据配置注册请求耗时分解的钩子
+
+    Args:
+        app: Flask应用实例
+    """
+    global _enabled, _threshold, _emit_header
+    _enabled = app.config.get('REQUEST_TIMING_ENABLED', False)
+    if not _enabled:
+        return
+
+    _threshold = app.config.get('SLOW_REQUEST_THRESHOLD_MS', 1000) / 1000
+    _emit_header = app.config.get('SERVER_TIMING_HEADER', True)
+
+    @app.before_request
+    def _start_request_timing():
+        g.request_timing = RequestTiming()
+
+    @app.after_request
+    def _finish_request_timing(response):
+        timing = g.pop('request_timing', None)
+        if timing is None:
+            return response
+        header = finish_request_timing(timing, request.method, request.path,
+                                       request.query_string.decode('utf-8', 'replace'), response.status_code)
+        if header is not None:
+            response.headers['Server-Timing'] = header
+        return response
+
+    logger.info(f"请求耗时分解已启用，慢请求阈值 {_threshold * 1000:.0f} 毫秒")
@@ -0,0 +1,118 @@
+"""
+充电桩监控系统 - 上游延迟跟踪模块
+
+这个模块记录最近的上游请求耗时，据此计算自适应的连接/读取超时和对冲请求的等待时间，
+并用令牌预算限制对冲请求带来的额外请求量。
+"""
+
+import threading
+from collections import deque
+from typing import Optional, Tuple
+from app.config import Config
+
+class LatencyTracker:
+    """滑动窗口内的请求耗时分位数
+
+    Attributes:
+        window: 保留的最近样本数
+        min_samples: 样本数达到该值后才给出分位数
+    """
+
+    def __init__(self, window: int = 500, min_samples: int = 20):
+        self.window = window
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=window)
+        self._sorted: Optional[list] = None
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        """记录一次成功请求的耗时"""
+        with self._lock:
+            self._samples.append(seconds)
+            self._sorted = None
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """获取分位数，样本不足时返回None
+
+        Args:
+            fraction: 分位（0~1）
+
+        Returns:
+            Optional[float]: 耗时（秒）
+        """
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            if self._sorted is None:
+                self._sorted = sorted(self._samples)
+            values = self._sorted
+        return values[min(int(fraction * len(values)), len(values) - 1)]
+
+class HedgeBudget:
+    """对冲请求预算
+
+    每个普通请求积累 ratio 个令牌，每个对冲请求消耗一个令牌，
+    因此对冲请求量长期不超过普通请求量的 ratio 倍。
+
+    Attributes:
+        ratio: 对冲请求占普通请求的最大比例
+        capacity: 令牌上限，限制突发的对冲数量
+    """
+
+    def __init__(self, ratio: float, capacity: float = 10.0):
+        self.ratio = ratio
+        self.capacity = capacity
+        self._tokens = 0.0
+        self._lock = threading.Lock()
+
+    def record_request(self) -> None:
+        """记录一次普通请求"""
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + self.ratio)
+
+    def try_acquire(self) -> bool:
+        """尝试为一次对冲请求扣除令牌"""
+        with self._lock:
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+def _clamp(value: float, lower: float, upper: float) -> float:
+    return max(lower, min(value, upper))
+
+# 进程内共享的延迟统计和对冲预算
+latency_tracker = LatencyTracker(window=Config.UPSTREAM_LATENCY_WINDOW)
+hedge_budget = HedgeBudget(Config.UPSTREAM_HEDGE_BUDGET)
+
+def adaptive_timeouts() -> Tuple[float, float]:
+    """根据最近的耗时分布计算 (连接超时, 读取超时)
+
+    样本不足或关闭自适应超时时返回固定的 (3, API_TIMEOUT)。
+    连接超时取 p95 的2倍，读取超时取 p99 的3倍，并限制在 [1, 3] 和 [1, API_TIMEOUT] 之间
+    （连接超时不低于1秒，至少容纳一次SYN重传）。
+
+    Returns:
+        Tuple[float, float]: 连接超时和读取超时（秒）
+    """
+    default = (3.0, float(Config.API_TIMEOUT))
+    if not Config.UPSTREAM_ADAPTIVE_TIMEOUT:
+        return default
+    p95 = latency_tracker.percentile(0.95)
+    p99 = latency_tracker.percentile(0.99)
+    if p95 is None or p99 is None:
+        return default
+    return _clamp(p95 * 2, 1.0, 3.0), _clamp(p99 * 3, 1.0, float(Config.API_TIMEOUT))
+
+def hedge_delay() -> Optional[float]:
+    """对冲请求的等待时间：首个请求超过观测到的 p95 仍未返回时发出对冲请求
+
+    Returns:
+        Optional[float]: 等待时间（秒），关闭对冲或样本不足时返回None
+    """
+    if not Config.UPSTREAM_HEDGE_ENABLED:
+        return None
+    p95 = latency_tracker.percentile(0.95)
+    if p95 is None:
+        return None
+    return max(p95, Config.UPSTREAM_HEDGE_MIN_DELAY)
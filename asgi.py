@@ -0,0 +1,13 @@
+"""
+充电桩监控系统 - ASGI入口
+
+这个模块是异步服务模式的入口点，供 uvicorn 等ASGI服务器加载：
+
+    uvicorn asgi:app --host 0.0.0.0 --port 5000
+"""
+
+import os
+from app.asgi import create_asgi_app
+
+# 创建ASGI应用实例
+app = create_asgi_app(os.environ.get('FLASK_ENV', 'development'))
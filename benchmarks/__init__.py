@@ -0,0 +1,5 @@
+"""
+充电桩监控系统 - 性能基准包
+
+这个包包含离线运行的性能基准脚本。
+"""
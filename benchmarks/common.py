@@ -0,0 +1,118 @@
+"""
+充电桩监控系统 - 基准公共工具
+
+这个模块提供各基准脚本共用的计时、结果文件读写和与基线对比的工具。
+"""
+
+import os
+import json
+import time
+import platform
+import statistics
+import subprocess
+from datetime import datetime
+from typing import Callable, Dict, Any, Optional
+
+# 基准目录和默认的结果、基线文件
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(BENCHMARKS_DIR, 'results')
+
+def measure(func: Callable[[], Any], repeat: int = 3, setup: Optional[Callable[[], Any]] = None) -> Dict[str, float]:
+    """多次执行函数并统计耗时
+
+    Args:
+        func: 被测函数
+        repeat: 执行次数
+        setup: 每次执行前调用的准备函数，不计入耗时
+
+    Returns:
+        Dict[str, float]: 中位数、最小值和最大值（毫秒）
+    """
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        'median_ms': round(statistics.median(samples), 3),
+        'min_ms': round(min(samples), 3),
+        'max_ms': round(max(samples), 3)
+    }
+
+def git_revision() -> Optional[str]:
+    """获取当前提交的短哈希，不在git仓库中时返回None"""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCHMARKS_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def build_report(suite: str, results: Dict[str, Any], **extra) -> Dict[str, Any]:
+    """生成带运行环境信息的结果报告"""
+    return {
+        'suite': suite,
+        'revision': git_revision(),
+        'created_at': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        **extra,
+        'results': results
+    }
+
+def write_report(report: Dict[str, Any], path: str) -> None:
+    """把结果报告写入JSON文件"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+def load_report(path: str) -> Optional[Dict[str, Any]]:
+    """读取结果报告，文件不存在时返回None"""
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def compare_reports(current: Dict[str, Any], baseline: Dict[str, Any], key: str = 'median_ms',
+                    tolerance: float = 0.2, higher_is_better: bool = False) -> Dict[str, Dict[str, Any]]:
+    """把当前结果与基线逐项对比
+
+    Args:
+        current: 当前结果报告
+        baseline: 基线结果报告
+        key: 对比的指标
+        tolerance: 允许的相对变化，超出即视为退化
+        higher_is_better: 指标是否越大越好（如吞吐量）
+
+    Returns:
+        Dict[str, Dict[str, Any]]: 每个基准的基线值、当前值、变化比例和是否退化
+    """
+    comparison = {}
+    for name, result in current['results'].items():
+        base = baseline.get('results', {}).get(name)
+        if not base or key not in base or key not in result or not base[key]:
+            continue
+        change = (result[key] - base[key]) / base[key]
+        regressed = change < -tolerance if higher_is_better else change > tolerance
+        comparison[name] = {
+            'baseline': base[key],
+            'current': result[key],
+            'change': round(change, 4),
+            'regressed': regressed
+        }
+    return comparison
+
+def print_comparison(comparison: Dict[str, Dict[str, Any]]) -> None:
+    """以表格形式输出对比结果"""
+    if not comparison:
+        print('没有可对比的基线结果')
+        return
+    width = max(len(name) for name in comparison)
+    for name, item in comparison.items():
+        flag = '  <-- 退化' if item['regressed'] else ''
+        print(f"{name:<{width}}  {item['baseline']:>12.3f}  {item['current']:>12.3f}  {item['change']:>+8.1%}{flag}")
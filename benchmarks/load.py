@@ -0,0 +1,193 @@
+"""
+充电桩监控系统 - 端到端负载测试
+
+这个脚本模拟N个同时打开监控页面的客户端：每个客户端先加载首页，之后按 index.html 的行为
+每5秒轮询一次 /api/stations，并按概率访问 /api/ports 和单个充电桩详情。
+结束后输出吞吐量、p50/p95/p99延迟、错误率以及每个模拟用户引起的上游请求数。
+
+上游请求数来自本地上游模拟服务的 /__stats，应用需设置 UPSTREAM_BASE_URL 指向该服务。
+
+使用方式：
+    python -m benchmarks.upstream_simulator --port 8900 &
+    UPSTREAM_BASE_URL=http://127.0.0.1:8900 USE_MOCK_DATA=false flask run &
+    python -m benchmarks.load --base-url http://127.0.0.1:5000 --users 200 --duration 60 \\
+        --upstream-url http://127.0.0.1:8900
+"""
+
+import sys
+import time
+import random
+import asyncio
+import argparse
+from typing import Dict, Any, List, Optional
+import httpx
+
+from benchmarks.common import RESULTS_DIR, build_report, write_report, load_report, compare_reports, print_comparison
+
+# 默认结果和基线文件
+DEFAULT_OUTPUT = f"{RESULTS_DIR}/load.json"
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """计算已排序数据的分位数（最近秩法）"""
+    if not sorted_values:
+        return 0.0
+    index = min(int(fraction * len(sorted_values)), len(sorted_values) - 1)
+    return sorted_values[index]
+
+class LoadRecorder:
+    """记录每个接口的请求延迟和错误"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+
+    def record(self, endpoint: str, latency: float, ok: bool) -> None:
+        """记录一次请求"""
+        self.latencies.setdefault(endpoint, []).append(latency)
+        if not ok:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+    def summarize(self, elapsed: float) -> Dict[str, Dict[str, Any]]:
+        """按接口和总体汇总
+
+        Args:
+            elapsed: 测试持续时间（秒）
+
+        Returns:
+            Dict[str, Dict[str, Any]]: 接口到统计数据的映射，总体统计的键为 all
+        """
+        groups = dict(self.latencies)
+        groups['all'] = [latency for values in self.latencies.values() for latency in values]
+        summary = {}
+        for endpoint, values in groups.items():
+            values = sorted(values)
+            errors = sum(self.errors.values()) if endpoint == 'all' else self.errors.get(endpoint, 0)
+            summary[endpoint] = {
+                'requests': len(values),
+                'throughput_rps': round(len(values) / elapsed, 2) if elapsed else 0.0,
+                'error_rate': round(errors / len(values), 4) if values else 0.0,
+                'p50_ms': round(percentile(values, 0.50) * 1000, 2),
+                'p95_ms': round(percentile(values, 0.95) * 1000, 2),
+                'p99_ms': round(percentile(values, 0.99) * 1000, 2)
+            }
+        return summary
+
+async def timed_get(client: httpx.AsyncClient, recorder: LoadRecorder, endpoint: str, url: str) -> Optional[httpx.Response]:
+    """发送GET请求并记录延迟，网络错误计为失败"""
+    start = time.perf_counter()
+    try:
+        response = await client.get(url)
+        await response.aread()
+        recorder.record(endpoint, time.perf_counter() - start, response.status_code < 400)
+        return response
+    except httpx.HTTPError:
+        recorder.record(endpoint, time.perf_counter() - start, False)
+        return None
+
+async def dashboard_user(client: httpx.AsyncClient, recorder: LoadRecorder, deadline: float,
+                         args: argparse.Namespace, rng: random.Random) -> None:
+    """模拟一个监控页面客户端"""
+    station_ids: List[str] = []
+    await timed_get(client, recorder, '/', '/')
+
+    while time.monotonic() < deadline:
+        tick = time.monotonic()
+        response = await timed_get(client, recorder, '/api/stations', '/api/stations')
+        if response is not None and response.status_code == 200 and not station_ids:
+            try:
+                station_ids = [station['station_id'] for station in response.json().get('stations', [])]
+            except ValueError:
+                pass
+
+        if rng.random() < args.ports_probability:
+            await timed_get(client, recorder, '/api/ports', '/api/ports')
+        if station_ids and rng.random() < args.detail_probability:
+            station_id = rng.choice(station_ids)
+            await timed_get(client, recorder, '/api/stations/<station_id>', f'/api/stations/{station_id}')
+
+        # 与 index.html 的 setInterval 一致，按固定间隔轮询
+        await asyncio.sleep(max(args.poll_interval - (time.monotonic() - tick), 0))
+
+async def fetch_upstream_stats(upstream_url: Optional[str], reset: bool = False) -> Optional[Dict[str, int]]:
+    """读取（或清零）上游模拟服务的计数"""
+    if not upstream_url:
+        return None
+    async with httpx.AsyncClient(base_url=upstream_url, timeout=5) as client:
+        if reset:
+            await client.post('/__reset')
+            return None
+        response = await client.get('/__stats')
+        return response.json()
+
+async def run_load(args: argparse.Namespace) -> Dict[str, Any]:
+    """运行负载测试并返回结果"""
+    rng = random.Random(args.seed)
+    recorder = LoadRecorder()
+    limits = httpx.Limits(max_connections=args.users, max_keepalive_connections=args.users)
+
+    await fetch_upstream_stats(args.upstream_url, reset=True)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        start = time.monotonic()
+        deadline = start + args.duration
+        users = []
+        for index in range(args.users):
+            # 在 ramp-up 时间内均匀启动客户端，并错开轮询相位
+            delay = args.ramp_up * index / args.users if args.ramp_up else rng.uniform(0, args.poll_interval)
+            users.append(asyncio.create_task(
+                _start_later(delay, dashboard_user(client, recorder, deadline, args, random.Random(rng.random())))
+            ))
+        await asyncio.gather(*users)
+        elapsed = time.monotonic() - start
+
+    results = recorder.summarize(elapsed)
+    upstream = await fetch_upstream_stats(args.upstream_url)
+    if upstream is not None:
+        results['upstream'] = {
+            'calls': upstream.get('total', 0),
+            'calls_per_user': round(upstream.get('total', 0) / args.users, 2),
+            'outcomes': upstream
+        }
+    return results
+
+async def _start_later(delay: float, coroutine) -> None:
+    await asyncio.sleep(delay)
+    await coroutine
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='模拟N个监控页面客户端的负载测试')
+    parser.add_argument('--base-url', default='http://127.0.0.1:5000', help='被测应用地址')
+    parser.add_argument('--users', type=int, default=50, help='模拟客户端数量')
+    parser.add_argument('--duration', type=float, default=60, help='测试时长（秒）')
+    parser.add_argument('--ramp-up', type=float, default=0, help='逐步启动全部客户端的时间（秒），0表示随机错开')
+    parser.add_argument('--poll-interval', type=float, default=5, help='/api/stations 轮询间隔（秒）')
+    parser.add_argument('--ports-probability', type=float, default=0.2, help='每次轮询同时访问 /api/ports 的概率')
+    parser.add_argument('--detail-probability', type=float, default=0.1, help='每次轮询同时访问充电桩详情的概率')
+    parser.add_argument('--timeout', type=float, default=30, help='单个请求超时（秒）')
+    parser.add_argument('--upstream-url', default=None, help='上游模拟服务地址，用于统计上游请求数')
+    parser.add_argument('--seed', type=int, default=1, help='随机种子')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help='结果JSON文件')
+    parser.add_argument('--baseline', default=None, help='用于对比p99延迟的基线JSON文件')
+    args = parser.parse_args()
+
+    print(f"{args.users} 个客户端，持续 {args.duration} 秒，目标 {args.base_url}", file=sys.stderr)
+    results = asyncio.run(run_load(args))
+    report = build_report('load', results, base_url=args.base_url, users=args.users, duration=args.duration,
+                          poll_interval=args.poll_interval)
+    write_report(report, args.output)
+
+    for endpoint, item in results.items():
+        if endpoint == 'upstream':
+            print(f"上游请求 {item['calls']} 次，每个用户 {item['calls_per_user']} 次")
+        else:
+            print(f"{endpoint:<28} {item['requests']:>7} 次  {item['throughput_rps']:>8.2f} req/s  "
+                  f"错误率 {item['error_rate']:.2%}  p50 {item['p50_ms']:.1f}  p95 {item['p95_ms']:.1f}  "
+                  f"p99 {item['p99_ms']:.1f} ms")
+    print(f"结果已写入 {args.output}", file=sys.stderr)
+
+    if args.baseline:
+        baseline = load_report(args.baseline)
+        if baseline is not None:
+            print_comparison(compare_reports(report, baseline, key='p99_ms'))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+"""
+充电桩监控系统 - 刷新链路分阶段基准
+
+这个脚本离线运行（SQLite内存库 + 进程内 SimpleCache 代替Redis），按端口规模分别测量：
+模拟数据生成与上游响应解析、update_ports_batch、bulk_update_ports、
+set_station_status/get_station_status 以及 /api/stations 的序列化和完整请求。
+
+结果写入JSON文件，并与保存的基线对比。
+
+使用方式：
+    python -m benchmarks.stages                      # 运行并与基线对比
+    python -m benchmarks.stages --sizes 10 1000      # 只测部分规模
+    python -m benchmarks.stages --save-baseline      # 把本次结果保存为基线
+"""
+
+import os
+import sys
+import random
+import logging
+import argparse
+from typing import Dict, Any, List
+
+# 离线运行：使用测试配置，不连接MySQL、Redis和上游接口
+os.environ.setdefault('FLASK_ENV', 'testing')
+os.environ.setdefault('CACHE_TYPE', 'SimpleCache')
+os.environ['USE_MOCK_DATA'] = 'true'
+
+from benchmarks.common import (
+    BENCHMARKS_DIR, RESULTS_DIR, measure, build_report, write_report, load_report,
+    compare_reports, print_comparison
+)
+
+# 每个充电桩的端口数
+PORTS_PER_STATION = 10
+
+# 默认测试的端口规模
+DEFAULT_SIZES = [10, 1000, 50000]
+
+# 默认结果和基线文件
+DEFAULT_OUTPUT = os.path.join(RESULTS_DIR, 'stages.json')
+DEFAULT_BASELINE = os.path.join(BENCHMARKS_DIR, 'baselines', 'stages.json')
+
+def make_station_ids(port_total: int) -> List[str]:
+    """生成指定端口规模所需的充电桩ID"""
+    station_count = max(port_total // PORTS_PER_STATION, 1)
+    return [f"93{index:08d}" for index in range(station_count)]
+
+def make_upstream_payload(rng: random.Random) -> Dict[str, Any]:
+    """生成 device/detail 格式的上游响应"""
+    return {
+        'success': True,
+        'data': {
+            'portList': [{'portId': port, 'status': 10 if rng.random() < 0.4 else 0}
+                         for port in range(1, PORTS_PER_STATION + 1)]
+        }
+    }
+
+def seed_database(db, station_ids: List[str]) -> None:
+    """清空并写入指定数量的充电桩和端口"""
+    from app.models.port_status import ChargingStation, PortStatus
+    db.drop_all()
+    db.create_all()
+    db.session.execute(db.insert(ChargingStation), [
+        {'station_id': station_id, 'name': f"基准充电桩 {station_id}", 'is_active': True}
+        for station_id in station_ids
+    ])
+    db.session.execute(db.insert(PortStatus), [
+        {'station_id': station_id, 'port_number': port, 'status': '空闲', 'service': '充电服务',
+         'voltage': 0.0, 'current': 0.0}
+        for station_id in station_ids for port in range(1, PORTS_PER_STATION + 1)
+    ])
+    db.session.commit()
+
+def run_size(app, port_total: int, repeat: int) -> Dict[str, Dict[str, float]]:
+    """测量一个端口规模下的所有阶段
+
+    Args:
+        app: Flask应用实例
+        port_total: 端口总数
+        repeat: 每个阶段的执行次数
+
+    Returns:
+        Dict[str, Dict[str, float]]: 以“阶段@端口数”为键的结果
+    """
+    from flask import jsonify
+    from app.models.port_status import db
+    from app.cache import cache, set_station_status, get_station_status
+    from app.repositories.station_repository import PortRepository
+    from app.services.station_service import update_ports_batch, get_all_active_stations
+    from app.fleet_view import fleet_view
+    from port_status import generate_mock_port_data, parse_response
+
+    rng = random.Random(port_total)
+    random.seed(port_total)
+    station_ids = make_station_ids(port_total)
+    payloads = {station_id: make_upstream_payload(rng) for station_id in station_ids}
+    statuses = {station_id: parse_response(station_id, payload) for station_id, payload in payloads.items()}
+    flat_ports = [dict(port, station_id=station_id)
+                  for station_id, status in statuses.items() for port in status['ports']]
+
+    results = {}
+    suffix = f"@{port_total}"
+
+    results['parse.mock_generate' + suffix] = measure(
+        lambda: [generate_mock_port_data(station_id, PORTS_PER_STATION) for station_id in station_ids], repeat)
+    results['parse.upstream_response' + suffix] = measure(
+        lambda: [parse_response(station_id, payload) for station_id, payload in payloads.items()], repeat)
+
+    with app.app_context():
+        seed_database(db, station_ids)
+
+        results['db.update_ports_batch' + suffix] = measure(
+            lambda: [update_ports_batch(station_id, status['ports']) for station_id, status in statuses.items()],
+            repeat, setup=db.session.expire_all)
+        results['db.bulk_update_ports' + suffix] = measure(
+            lambda: PortRepository.bulk_update_ports(flat_ports), repeat, setup=db.session.expire_all)
+
+        results['cache.set_station_status' + suffix] = measure(
+            lambda: [set_station_status(station_id, status) for station_id, status in statuses.items()], repeat)
+        results['cache.get_station_status' + suffix] = measure(
+            lambda: [get_station_status(station_id) for station_id in station_ids], repeat)
+
+        stations_data = get_all_active_stations()
+        results['api.stations_serialize' + suffix] = measure(
+            lambda: jsonify({'stations': stations_data}).get_data(), repeat)
+
+    # 数据库已按本规模重新写入，丢弃上一规模的物化列表
+    fleet_view.clear()
+    client = app.test_client()
+    results['api.stations_request' + suffix] = measure(lambda: client.get('/api/stations').get_data(), repeat)
+
+    with app.app_context():
+        cache.clear()
+        db.session.remove()
+    return results
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='刷新链路分阶段基准')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='端口规模')
+    parser.add_argument('--repeat', type=int, default=3, help='每个阶段的执行次数')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help='结果JSON文件')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='基线JSON文件')
+    parser.add_argument('--save-baseline', action='store_true', help='把本次结果保存为基线')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='允许的相对变慢比例')
+    parser.add_argument('--fail-on-regression', action='store_true', help='有退化时以非零状态退出')
+    args = parser.parse_args()
+
+    # 基准过程中的逐条日志会显著影响计时
+    logging.disable(logging.INFO)
+
+    from app import create_app
+    from app.config import Config
+    Config.CACHE_TIMEOUT = 3600  # 测量期间缓存保持有效，/api/stations 不回源
+    app = create_app('testing')
+
+    results = {}
+    for size in args.sizes:
+        print(f"正在测量 {size} 个端口...", file=sys.stderr)
+        results.update(run_size(app, size, args.repeat))
+
+    report = build_report('stages', results, repeat=args.repeat, ports_per_station=PORTS_PER_STATION,
+                          database='sqlite-memory', cache='SimpleCache')
+    write_report(report, args.output)
+    print(f"结果已写入 {args.output}", file=sys.stderr)
+
+    if args.save_baseline:
+        write_report(report, args.baseline)
+        print(f"基线已保存到 {args.baseline}", file=sys.stderr)
+        return
+
+    baseline = load_report(args.baseline)
+    if baseline is None:
+        print(f"未找到基线 {args.baseline}，可使用 --save-baseline 保存", file=sys.stderr)
+        return
+    comparison = compare_reports(report, baseline, tolerance=args.tolerance)
+    print_comparison(comparison)
+    if args.fail_on_regression and any(item['regressed'] for item in comparison.values()):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+充电桩监控系统 - 启动耗时基准
+
+这个脚本在全新的子进程中分别测量导入 app、导入 port_status 以及调用 create_app 的耗时，
+多次运行后输出中位数，用于评估Web和Celery工作进程的启动速度。
+
+使用方式：
+    python -m benchmarks.startup --runs 5 --config production
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+from typing import Dict, List
+
+# 项目根目录
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 在子进程中执行的测量代码
+PROBE = """
+import json, time
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+import port_status
+t2 = time.perf_counter()
+application = app.create_app({config!r})
+t3 = time.perf_counter()
+print(json.dumps({{
+    'import_app': t1 - t0,
+    'import_port_status': t2 - t1,
+    'create_app': t3 - t2,
+    'total': t3 - t0
+}}))
+"""
+
+def measure_once(config_name: str) -> Dict[str, float]:
+    """在新的解释器进程中测量一次启动耗时
+
+    Args:
+        config_name: 传给 create_app 的配置名称
+
+    Returns:
+        Dict[str, float]: 各阶段耗时（秒）
+    """
+    env = dict(os.environ, FLASK_ENV=config_name)
+    result = subprocess.run(
+        [sys.executable, '-c', PROBE.format(config=config_name)],
+        cwd=BASE_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def run(runs: int, config_name: str) -> Dict[str, Dict[str, float]]:
+    """多次测量并汇总
+
+    Args:
+        runs: 测量次数
+        config_name: 配置名称
+
+    Returns:
+        Dict[str, Dict[str, float]]: 每个阶段的中位数、最小值和最大值（毫秒）
+    """
+    samples: List[Dict[str, float]] = [measure_once(config_name) for _ in range(runs)]
+    report = {}
+    for stage in samples[0]:
+        values = [sample[stage] * 1000 for sample in samples]
+        report[stage] = {
+            'median_ms': round(statistics.median(values), 2),
+            'min_ms': round(min(values), 2),
+            'max_ms': round(max(values), 2)
+        }
+    return report
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='测量进程启动耗时')
+    parser.add_argument('--runs', type=int, default=5, help='测量次数')
+    parser.add_argument('--config', default='testing', help='create_app 使用的配置名称')
+    args = parser.parse_args()
+
+    report = run(args.runs, args.config)
+    print(json.dumps({'config': args.config, 'runs': args.runs, 'stages': report},
+                     ensure_ascii=False, indent=2))
+
+if __name__ == '__main__':
+    main()
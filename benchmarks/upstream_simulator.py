@@ -0,0 +1,357 @@
+"""
+充电桩监控系统 - 上游接口模拟服务
+
+这个脚本在本地模拟 app.mamcharge.com 的 device/detail 接口（返回 portList，status 0为空闲、10为占用）
+和 mobile.mamcharge.com 的 getDeviceFault 接口（返回故障端口号），
+支持可配置的延迟分布、错误率、超时率、HTTP 429 限流以及回放录制的响应，
+用于在不访问真实接口的情况下对完整的请求链路（会话、签名、重试、解析）做压测。
+
+使用方式：
+    python -m benchmarks.upstream_simulator --port 8900 --latency lognormal:0.15:0.5 \\
+        --error-rate 0.02 --timeout-rate 0.01 --rate-limit 200
+
+    # 让应用指向模拟服务（不能同时开启 USE_MOCK_DATA）
+    UPSTREAM_BASE_URL=http://127.0.0.1:8900 UPSTREAM_FAULT_BASE_URL=http://127.0.0.1:8900 flask run
+
+GET /__stats 返回各类响应的计数，POST /__reset 清零计数。
+"""
+
+import json
+import time
+import random
+import logging
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Callable, Dict, Any, Optional
+from urllib.parse import urlparse, parse_qs
+
+# 设备故障查询接口路径，与 port_status.FAULT_PATH 一致
+FAULT_PATH = '/applet/startCharger/api/startCharger/getDeviceFault'
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """解析延迟分布配置
+
+    支持：
+        fixed:<秒>
+        uniform:<最小秒>:<最大秒>
+        lognormal:<中位数秒>:<sigma>
+        exp:<平均秒>
+
+    Args:
+        spec: 延迟分布配置
+
+    Returns:
+        Callable[[random.Random], float]: 生成单次延迟（秒）的函数
+
+    Raises:
+        ValueError: 配置格式无效
+    """
+    kind, _, rest = spec.partition(':')
+    try:
+        values = [float(value) for value in rest.split(':')] if rest else []
+        if kind == 'fixed' and len(values) == 1:
+            return lambda rng: values[0]
+        if kind == 'uniform' and len(values) == 2:
+            return lambda rng: rng.uniform(values[0], values[1])
+        if kind == 'lognormal' and len(values) == 2:
+            import math
+            mu = math.log(values[0])
+            return lambda rng: rng.lognormvariate(mu, values[1])
+        if kind == 'exp' and len(values) == 1:
+            return lambda rng: rng.expovariate(1 / values[0]) if values[0] > 0 else 0.0
+    except ValueError:
+        pass
+    raise ValueError(f"无效的延迟分布配置: {spec}")
+
+class TokenBucket:
+    """令牌桶限流器
+
+    Attributes:
+        rate: 每秒补充的令牌数
+        capacity: 令牌桶容量
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> bool:
+        """尝试获取一个令牌"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+class UpstreamSimulator:
+    """模拟上游接口的状态和故障注入
+
+    每个充电桩的端口状态在两次请求之间按 churn 概率翻转，模拟真实的占用变化。
+
+    Attributes:
+        port_count: 每个充电桩的端口数量
+        latency: 延迟分布函数
+        error_rate: 返回业务错误（success=false）的概率
+        server_error_rate: 返回HTTP 500的概率
+        timeout_rate: 挂起不响应（超过客户端超时）的概率
+        hang_seconds: 模拟超时时挂起的秒数
+        limiter: 限流器，为None时不限流
+        fault_rate: 每个端口处于故障状态的概率，同一充电桩的故障端口保持不变
+        replay: 录制的响应，充电桩ID到响应列表的映射
+    """
+
+    def __init__(self, port_count: int = 12, latency: Callable[[random.Random], float] = None,
+                 error_rate: float = 0.0, server_error_rate: float = 0.0, timeout_rate: float = 0.0,
+                 hang_seconds: float = 10.0, rate_limit: float = 0.0, churn: float = 0.1,
+                 fault_rate: float = 0.0, replay: Optional[Dict[str, list]] = None, seed: Optional[int] = None):
+        self.port_count = port_count
+        self.latency = latency or (lambda rng: 0.0)
+        self.error_rate = error_rate
+        self.server_error_rate = server_error_rate
+        self.timeout_rate = timeout_rate
+        self.hang_seconds = hang_seconds
+        self.limiter = TokenBucket(rate_limit) if rate_limit > 0 else None
+        self.churn = churn
+        self.fault_rate = fault_rate
+        self.replay = replay or {}
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.ports: Dict[str, list] = {}
+        self.faults: Dict[str, list] = {}
+        self.replay_positions: Dict[str, int] = {}
+        self.stats: Dict[str, int] = {}
+
+    def count(self, outcome: str) -> None:
+        """累加一类响应的计数"""
+        with self.lock:
+            self.stats[outcome] = self.stats.get(outcome, 0) + 1
+
+    def snapshot_stats(self) -> Dict[str, int]:
+        """获取当前计数"""
+        with self.lock:
+            stats = dict(self.stats)
+        stats['total'] = sum(stats.values())
+        return stats
+
+    def reset_stats(self) -> None:
+        """清零计数"""
+        with self.lock:
+            self.stats.clear()
+
+    def draw(self) -> Dict[str, float]:
+        """抽取本次请求的随机量（加锁保证多线程下可复现）"""
+        with self.lock:
+            return {
+                'latency': max(self.latency(self.rng), 0.0),
+                'fault': self.rng.random()
+            }
+
+    def device_detail(self, pno: str) -> Dict[str, Any]:
+        """生成 device/detail 响应体"""
+        with self.lock:
+            recorded = self.replay.get(pno)
+            if recorded:
+                position = self.replay_positions.get(pno, 0)
+                self.replay_positions[pno] = position + 1
+                return recorded[position % len(recorded)]
+
+            ports = self.ports.get(pno)
+            if ports is None:
+                ports = [10 if self.rng.random() < 0.4 else 0 for _ in range(self.port_count)]
+                self.ports[pno] = ports
+            else:
+                for index, status in enumerate(ports):
+                    if self.rng.random() < self.churn:
+                        ports[index] = 0 if status else 10
+            port_list = [{'portId': index + 1, 'status': status} for index, status in enumerate(ports)]
+
+        return {
+            'success': True,
+            'code': 200,
+            'msg': '操作成功',
+            'data': {'pno': pno, 'portList': port_list}
+        }
+
+    def device_fault(self, serial_number: str) -> Dict[str, Any]:
+        """生成 getDeviceFault 响应体"""
+        with self.lock:
+            faults = self.faults.get(serial_number)
+            if faults is None:
+                faults = [index + 1 for index in range(self.port_count) if self.rng.random() < self.fault_rate]
+                self.faults[serial_number] = faults
+
+        return {
+            'success': True,
+            'device_id': None,
+            'total_ports': 0,
+            'online_status': None,
+            'ports': [],
+            'fault_status': {'has_fault': bool(faults), 'fault_data': faults, 'message': '成功'}
+        }
+
+def load_replay(path: str) -> Dict[str, list]:
+    """读取录制的响应
+
+    文件为JSON Lines格式，每行形如 {"pno": "9313600954", "response": {...}}，
+    同一充电桩的多条响应按顺序循环回放。
+
+    Args:
+        path: 录制文件路径
+
+    Returns:
+        Dict[str, list]: 充电桩ID到响应列表的映射
+    """
+    replay: Dict[str, list] = {}
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                record = json.loads(line)
+                replay.setdefault(str(record['pno']), []).append(record['response'])
+    return replay
+
+def make_handler(simulator: UpstreamSimulator):
+    """创建绑定到模拟器的请求处理类"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            logger.debug(format % args)
+
+        def _send_json(self, status: int, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+            data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json;charset=UTF-8')
+            self.send_header('Content-Length', str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_HEAD(self):
+            # 供客户端预热连接使用
+            self.send_response(200)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+        def do_POST(self):
+            path = urlparse(self.path).path
+            length = int(self.headers.get('Content-Length') or 0)
+            body = self.rfile.read(length) if length else b''
+            if path == '/__reset':
+                simulator.reset_stats()
+                self._send_json(200, {'reset': True})
+            elif path == FAULT_PATH:
+                try:
+                    serial_number = str(json.loads(body or b'{}').get('serialNumber', ''))
+                except ValueError:
+                    serial_number = ''
+                self._serve(lambda: simulator.device_fault(serial_number))
+            else:
+                self._send_json(404, {'success': False, 'msg': 'not found'})
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == '/__stats':
+                self._send_json(200, simulator.snapshot_stats())
+                return
+            if url.path != '/device/detail':
+                self._send_json(404, {'success': False, 'msg': 'not found'})
+                return
+
+            pno = parse_qs(url.query).get('pno', [''])[0]
+            self._serve(lambda: simulator.device_detail(pno))
+
+        def _serve(self, respond: Callable[[], Dict[str, Any]]) -> None:
+            """按配置注入限流、超时、延迟和错误，正常时返回 respond() 生成的响应体"""
+            if simulator.limiter is not None and not simulator.limiter.acquire():
+                simulator.count('throttled')
+                self._send_json(429, {'success': False, 'msg': '请求过于频繁'}, {'Retry-After': '1'})
+                return
+
+            draw = simulator.draw()
+            fault = draw['fault']
+            if fault < simulator.timeout_rate:
+                simulator.count('timeout')
+                time.sleep(simulator.hang_seconds)
+                self.close_connection = True
+                return
+            fault -= simulator.timeout_rate
+
+            time.sleep(draw['latency'])
+            if fault < simulator.server_error_rate:
+                simulator.count('server_error')
+                self._send_json(500, {'success': False, 'msg': '服务器内部错误'})
+            elif fault < simulator.server_error_rate + simulator.error_rate:
+                simulator.count('api_error')
+                self._send_json(200, {'success': False, 'code': 500, 'msg': '设备离线'})
+            else:
+                simulator.count('success')
+                self._send_json(200, respond())
+
+    return Handler
+
+class SimulatorServer(ThreadingHTTPServer):
+    # 默认的 listen 队列只有5，大量并发建连时会被丢弃并触发客户端的SYN重传
+    request_queue_size = 128
+
+def create_server(simulator: UpstreamSimulator, host: str = '127.0.0.1', port: int = 8900) -> SimulatorServer:
+    """创建模拟服务，调用方负责 serve_forever 和 shutdown"""
+    server = SimulatorServer((host, port), make_handler(simulator))
+    server.daemon_threads = True
+    return server
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='上游 device/detail 接口模拟服务')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8900)
+    parser.add_argument('--ports-per-station', type=int, default=12, help='每个充电桩的端口数量')
+    parser.add_argument('--latency', default='lognormal:0.12:0.5',
+                        help='延迟分布：fixed:s、uniform:a:b、lognormal:median:sigma、exp:mean')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='返回 success=false 的概率')
+    parser.add_argument('--server-error-rate', type=float, default=0.0, help='返回HTTP 500的概率')
+    parser.add_argument('--timeout-rate', type=float, default=0.0, help='挂起不响应的概率')
+    parser.add_argument('--hang', type=float, default=10.0, help='模拟超时时挂起的秒数')
+    parser.add_argument('--rate-limit', type=float, default=0.0, help='每秒允许的请求数，超出返回429，0表示不限流')
+    parser.add_argument('--churn', type=float, default=0.1, help='两次请求之间每个端口状态翻转的概率')
+    parser.add_argument('--fault-rate', type=float, default=0.0, help='每个端口处于故障状态的概率')
+    parser.add_argument('--replay', default=None, help='录制的响应文件（JSON Lines）')
+    parser.add_argument('--seed', type=int, default=None, help='随机种子')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    simulator = UpstreamSimulator(
+        port_count=args.ports_per_station,
+        latency=parse_latency(args.latency),
+        error_rate=args.error_rate,
+        server_error_rate=args.server_error_rate,
+        timeout_rate=args.timeout_rate,
+        hang_seconds=args.hang,
+        rate_limit=args.rate_limit,
+        churn=args.churn,
+        fault_rate=args.fault_rate,
+        replay=load_replay(args.replay) if args.replay else None,
+        seed=args.seed
+    )
+    server = create_server(simulator, args.host, args.port)
+    logger.info(f"上游模拟服务已启动: http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == '__main__':
+    main()
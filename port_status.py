@@ -12,46 +12,129 @@ import os
 import requests
 import urllib3
 from datetime import datetime
+from urllib.parse import urlparse
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
-from typing import Dict, Any, Optional, List
-from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FutureTimeoutError
+from typing import Dict, Any, Optional, List, Tuple
 import logging
 import random
 
 # 配置日志
 logger = logging.getLogger(__name__)
 
-# 加载环境变量（确保在导入Config前加载）
-load_dotenv(dotenv_path=os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env'))
-
-# 导入配置
+# 导入配置（app.config 负责加载 .env）
 from app.config import Config
+from app.metrics import UPSTREAM_LATENCY, UPSTREAM_HEDGES, UPSTREAM_FAULT_REQUESTS
+from app.upstream_latency import latency_tracker, hedge_budget, adaptive_timeouts, hedge_delay
 
 # 禁用不安全请求警告
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
-# 创建会话对象
-session = requests.Session()
+# 会话对象，每个进程首次请求时创建（fork 出的子进程不复用父进程的连接池）
+_session: Optional[requests.Session] = None
+_session_pid: Optional[int] = None
+
+# 发送对冲请求和故障查询的线程池，与会话一样按进程创建
+_upstream_executor: Optional[ThreadPoolExecutor] = None
+_upstream_executor_pid: Optional[int] = None
+
+def _reset_session_after_fork() -> None:
+    """fork 后丢弃继承自父进程的会话和线程池，子进程首次请求时重新创建"""
+    global _session, _session_pid, _upstream_executor, _upstream_executor_pid
+    _session = None
+    _session_pid = None
+    _upstream_executor = None
+    _upstream_executor_pid = None
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_session_after_fork)
 
-# 配置重试策略
-retry_strategy = Retry(
-    total=3,  # 最多重试3次
-    backoff_factor=0.5,  # 重试间隔
-    status_forcelist=[429, 500, 502, 503, 504],  # 需要重试的HTTP状态码
-    allowed_methods=["GET", "POST"]  # 允许重试的请求方法
-)
+def get_session() -> requests.Session:
+    """获取当前进程的HTTP会话，首次调用时创建并配置连接池和重试策略
+    
+    连接池大小由 Config.CONNECTION_POOL_SIZE 决定，连接保持长连接复用，
+    只有新建连接时才需要DNS解析和TLS握手。
+    
+    Returns:
+        requests.Session: 会话对象
+    """
+    global _session, _session_pid
+    if _session is None or _session_pid != os.getpid():
+        session = requests.Session()
+        
+        # 配置重试策略（读取超时最多重试1次，慢响应由对冲请求处理）
+        retry_strategy = Retry(
+            total=3,  # 最多重试3次
+            read=1,  # 读取超时最多重试1次
+            backoff_factor=0.5,  # 重试间隔
+            status_forcelist=[429, 500, 502, 503, 504],  # 需要重试的HTTP状态码
+            allowed_methods=["GET", "POST"]  # 允许重试的请求方法
+        )
+        
+        # 配置连接池
+        adapter = HTTPAdapter(
+            max_retries=retry_strategy,
+            pool_connections=4,  # 按主机区分的连接池数量
+            pool_maxsize=Config.CONNECTION_POOL_SIZE  # 每个主机保持的连接数
+        )
+        
+        # 将连接池配置应用到会话
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        
+        # 缓存上游域名的DNS解析结果
+        if Config.UPSTREAM_DNS_CACHE_TTL > 0:
+            from app.dns_cache import install_dns_cache
+            install_dns_cache([urlparse(Config.UPSTREAM_BASE_URL).hostname,
+                               urlparse(Config.UPSTREAM_FAULT_BASE_URL).hostname], Config.UPSTREAM_DNS_CACHE_TTL)
+        
+        _session = session
+        _session_pid = os.getpid()
+        logger.debug(f"进程 {_session_pid} 已创建上游HTTP会话，连接池大小 {Config.CONNECTION_POOL_SIZE}")
+    return _session
 
-# 配置连接池
-adapter = HTTPAdapter(
-    max_retries=retry_strategy,
-    pool_connections=20,  # 连接池大小
-    pool_maxsize=20  # 最大连接数
-)
+def get_upstream_executor() -> ThreadPoolExecutor:
+    """获取当前进程发送对冲请求和故障查询的线程池"""
+    global _upstream_executor, _upstream_executor_pid
+    if _upstream_executor is None or _upstream_executor_pid != os.getpid():
+        _upstream_executor = ThreadPoolExecutor(max_workers=Config.CONNECTION_POOL_SIZE * 2,
+                                                thread_name_prefix='upstream')
+        _upstream_executor_pid = os.getpid()
+    return _upstream_executor
 
-# 将连接池配置应用到会话
-session.mount("http://", adapter)
-session.mount("https://", adapter)
+def warm_up_session(connections: Optional[int] = None) -> int:
+    """预先建立到上游的长连接
+    
+    在工作进程启动时调用，并发发起轻量请求，使连接池中提前保留完成TLS握手的连接，
+    第一轮刷新不再承担握手开销。
+    
+    Args:
+        connections: 预热的连接数，默认使用 Config.UPSTREAM_WARMUP_CONNECTIONS
+        
+    Returns:
+        int: 成功建立的连接数
+    """
+    count = Config.UPSTREAM_WARMUP_CONNECTIONS if connections is None else connections
+    count = min(count, Config.CONNECTION_POOL_SIZE)
+    if count <= 0 or USE_MOCK_DATA:
+        return 0
+    
+    session = get_session()
+    
+    def open_connection(_):
+        try:
+            # 只需要建立连接，响应内容和状态码不重要
+            session.head(Config.UPSTREAM_BASE_URL, verify=False, timeout=(3, 3), allow_redirects=False)
+            return True
+        except requests.RequestException as e:
+            logger.debug(f"预热上游连接失败: {str(e)}")
+            return False
+    
+    with ThreadPoolExecutor(max_workers=count) as executor:
+        warmed = sum(executor.map(open_connection, range(count)))
+    logger.info(f"进程 {os.getpid()} 已预热 {warmed} 个上游连接")
+    return warmed
 
 # 定义自定义错误类
 class PortStatusError(Exception):
@@ -87,6 +170,9 @@ def get_signature(secret_key: str, params: Dict[str, Any], method: str, timestam
     return signature
 
 # 从配置获取API参数
+UPSTREAM_HOST = urlparse(Config.UPSTREAM_BASE_URL).netloc
+UPSTREAM_FAULT_HOST = urlparse(Config.UPSTREAM_FAULT_BASE_URL).netloc
+FAULT_PATH = "/applet/startCharger/api/startCharger/getDeviceFault"
 secret_key = Config.API_SECRET_KEY or "tquO0s2pGW8cXzR7Qu5QgO7Gtv8u7JAH"
 appid = Config.API_APPID
 appcommid = Config.API_APPCOMMID
@@ -124,6 +210,23 @@ STATION_PORT_CONFIG = {
     }
 }
 
+def get_station_port_config(eq_num: str) -> Dict[str, Any]:
+    """获取充电桩的端口配置
+    
+    依次匹配具体充电桩ID、充电桩系列（前两位数字），都未配置时使用默认配置。
+    
+    Args:
+        eq_num: 充电桩编号
+        
+    Returns:
+        dict: 包含 port_count 和 service_name 的配置
+    """
+    if eq_num in STATION_PORT_CONFIG:
+        return STATION_PORT_CONFIG[eq_num]
+    if eq_num[:2] in STATION_PORT_CONFIG:
+        return STATION_PORT_CONFIG[eq_num[:2]]
+    return STATION_PORT_CONFIG["default"]
+
 # 添加模拟数据生成函数
 def generate_mock_port_data(eq_num: str, port_count: Optional[int] = None) -> Dict[str, Any]:
     """生成模拟的充电桩端口数据
@@ -137,16 +240,7 @@ def generate_mock_port_data(eq_num: str, port_count: Optional[int] = None) -> Di
     """
     # 确定端口数量和服务名称
     if port_count is None:
-        # 首先检查是否有针对特定充电桩ID的配置
-        if eq_num in STATION_PORT_CONFIG:
-            config = STATION_PORT_CONFIG[eq_num]
-        # 检查充电桩系列配置（前两位数字）
-        elif eq_num[:2] in STATION_PORT_CONFIG:
-            config = STATION_PORT_CONFIG[eq_num[:2]]
-        # 使用默认配置
-        else:
-            config = STATION_PORT_CONFIG["default"]
-        
+        config = get_station_port_config(eq_num)
         port_count = config["port_count"]
         service_name = config["service_name"]
     else:
@@ -179,6 +273,217 @@ def generate_mock_port_data(eq_num: str, port_count: Optional[int] = None) -> Di
 # 添加是否使用模拟数据的标志（从配置或环境变量获取）
 USE_MOCK_DATA = os.environ.get('USE_MOCK_DATA', 'false').lower() == 'true'
 
+def build_request(eq_num: str) -> Tuple[str, Dict[str, Any], Dict[str, str]]:
+    """构造设备详情请求
+    
+    Args:
+        eq_num: 充电桩编号
+        
+    Returns:
+        Tuple[str, Dict[str, Any], Dict[str, str]]: (请求URL, 查询参数, 请求头)
+    """
+    # 使用动态时间戳
+    timestamp = str(int(int(time.time()) * 1000))
+    
+    # 构造请求参数
+    params = {"pno": eq_num}
+    method = "GET"
+    url = f"{Config.UPSTREAM_BASE_URL}/device/detail"
+    
+    # 生成签名
+    signature = get_signature(secret_key, params, method, timestamp)
+    
+    return url, params, build_headers(UPSTREAM_HOST, timestamp, signature)
+
+def build_headers(host: str, timestamp: str, signature: str) -> Dict[str, str]:
+    """构造小程序接口的公共请求头
+
+    Args:
+        host: 请求头中的主机名
+        timestamp: 毫秒时间戳
+        signature: 请求签名
+
+    Returns:
+        Dict[str, str]: 请求头
+    """
+    return {
+        "Host": host,
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36 MicroMessenger/7.0.20.1781(0x6700143B) NetType/WIFI MiniProgramEnv/Windows WindowsWechat/WMPF WindowsWechat(0x63090c11)XWEB/11581",
+        "client": "wechat",
+        "Content-Type": "application/json",
+        "timestamp": timestamp,
+        "signature": signature,
+        "appcommid": appcommid,
+        "appid": appid,
+        "forcecheck": "1",
+        "token": token,
+        "appversion": "1.3",
+        "Accept": "*/*",
+        "Referer": "https://servicewechat.com/wx7605335e224edc7b/196/page-frame.html"
+    }
+
+def build_fault_request(eq_num: str) -> Tuple[str, Dict[str, Any], Dict[str, str]]:
+    """构造设备故障查询请求
+
+    Args:
+        eq_num: 充电桩编号
+
+    Returns:
+        Tuple[str, Dict[str, Any], Dict[str, str]]: (请求URL, JSON请求体, 请求头)
+    """
+    timestamp = str(int(int(time.time()) * 1000))
+    body = {"serialNumber": eq_num}
+    url = f"{Config.UPSTREAM_FAULT_BASE_URL}{FAULT_PATH}"
+    signature = get_signature(secret_key, body, "POST", timestamp)
+    return url, body, build_headers(UPSTREAM_FAULT_HOST, timestamp, signature)
+
+def parse_fault_response(eq_num: str, data: Dict[str, Any]) -> List[int]:
+    """解析设备故障响应
+
+    Args:
+        eq_num: 充电桩编号
+        data: 已解码的响应JSON
+
+    Returns:
+        List[int]: 故障端口号（升序），没有故障时为空列表
+
+    Raises:
+        PortStatusError: API返回错误
+    """
+    fault_status = data.get('fault_status') or {}
+    if not data.get('success'):
+        error_msg = fault_status.get('message') or data.get('msg', '未知错误')
+        logger.warning(f"充电桩 {eq_num} 故障查询返回错误: {error_msg}")
+        raise PortStatusError(f"API错误: {error_msg}")
+
+    if not fault_status.get('has_fault'):
+        return []
+    return sorted({int(port) for port in fault_status.get('fault_data') or []})
+
+def parse_response(eq_num: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """解析设备详情响应
+    
+    Args:
+        eq_num: 充电桩编号
+        data: 已解码的响应JSON
+        
+    Returns:
+        dict: 包含设备ID和端口状态列表的字典
+        
+    Raises:
+        PortStatusError: API返回错误
+    """
+    # 检查API响应内容
+    if not data.get('success'):
+        error_msg = data.get('msg', '未知错误')
+        logger.warning(f"充电桩 {eq_num} API返回错误: {error_msg}")
+        raise PortStatusError(f"API错误: {error_msg}")
+    
+    # 提取充电端口状态
+    ports = []
+    device_data = data.get('data', {})
+    port_list = device_data.get('portList', [])
+    
+    for port in port_list:
+        # 状态转换：0为空闲，10为占用
+        status = "空闲" if port.get('status') == 0 else "占用"
+        voltage = 220.0 if status == "占用" else 0.0
+        current = 10.0 if status == "占用" else 0.0
+        
+        port_data = {
+            "port": port.get('portId'),
+            "status": status,
+            "service": "充电服务",
+            "voltage": voltage,
+            "current": current,
+            "timestamp": datetime.now().isoformat()
+        }
+        ports.append(port_data)
+    
+    result = {
+        "device_id": eq_num,
+        "ports": ports
+    }
+    
+    logger.debug(f"成功获取充电桩 {eq_num} 状态，共 {len(ports)} 个端口")
+    return result
+
+def fetch_device_detail(eq_num: str, timeout: Tuple[float, float]) -> Dict[str, Any]:
+    """发送一次设备详情请求并解析，成功时记录耗时
+    
+    Args:
+        eq_num: 充电桩编号
+        timeout: (连接超时, 读取超时)
+        
+    Returns:
+        dict: 包含设备ID和端口状态列表的字典
+        
+    Raises:
+        requests.RequestException: 请求失败
+        PortStatusError: API返回错误
+    """
+    url, params, headers = build_request(eq_num)
+    start = time.perf_counter()
+    response = get_session().get(
+        url, 
+        params=params, 
+        headers=headers, 
+        verify=False,
+        timeout=timeout
+    )
+    response.raise_for_status()
+    
+    # 检查响应状态
+    if response.status_code != 200:
+        logger.warning(f"充电桩 {eq_num} API返回非200状态码: {response.status_code}")
+        raise PortStatusError(f"API返回状态码: {response.status_code}")
+    
+    result = parse_response(eq_num, response.json())
+    latency_tracker.observe(time.perf_counter() - start)
+    return result
+
+def fetch_device_detail_hedged(eq_num: str) -> Dict[str, Any]:
+    """获取设备详情，首个请求超过观测到的 p95 仍未返回时发出对冲请求，取先成功的结果
+    
+    超时根据最近的耗时分布自适应计算；对冲请求受 UPSTREAM_HEDGE_BUDGET 预算限制。
+    
+    Args:
+        eq_num: 充电桩编号
+        
+    Returns:
+        dict: 包含设备ID和端口状态列表的字典
+    """
+    timeout = adaptive_timeouts()
+    hedge_budget.record_request()
+    delay = hedge_delay()
+    if delay is None:
+        return fetch_device_detail(eq_num, timeout)
+    
+    executor = get_upstream_executor()
+    primary = executor.submit(fetch_device_detail, eq_num, timeout)
+    try:
+        return primary.result(timeout=delay)
+    except FutureTimeoutError:
+        pass
+    
+    if not hedge_budget.try_acquire():
+        return primary.result()
+    
+    logger.debug(f"充电桩 {eq_num} 请求超过 {delay * 1000:.0f} 毫秒未返回，发送对冲请求")
+    UPSTREAM_HEDGES.labels('sent').inc()
+    hedge = executor.submit(fetch_device_detail, eq_num, timeout)
+    error = None
+    for future in as_completed([primary, hedge]):
+        try:
+            result = future.result()
+        except Exception as e:
+            error = e
+            continue
+        if future is hedge:
+            UPSTREAM_HEDGES.labels('won').inc()
+        return result
+    raise error
+
 def get_port_status(eq_num: Optional[str] = None) -> Dict[str, Any]:
     """获取充电桩端口状态
     
@@ -198,112 +503,42 @@ def get_port_status(eq_num: Optional[str] = None) -> Dict[str, Any]:
     # 如果设置为使用模拟数据，则直接返回模拟数据
     if USE_MOCK_DATA:
         logger.info(f"使用模拟数据 - 充电桩 {eq_num}")
+        UPSTREAM_LATENCY.labels('mock').observe(0)
         return generate_mock_port_data(eq_num)
     
+    start = time.perf_counter()
+    outcome = 'unknown_error'
     try:
         logger.debug(f"开始获取充电桩 {eq_num} 状态数据")
         
-        # 使用动态时间戳
-        timestamp = str(int(int(time.time()) * 1000))
-        
-        # 构造请求参数
-        params = {"pno": eq_num}
-        method = "GET"
-        url = "https://app.mamcharge.com/device/detail"
-        
-        # 生成签名
-        signature = get_signature(secret_key, params, method, timestamp)
-        
-        # 设置请求头
-        headers = {
-            "Host": "app.mamcharge.com",
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36 MicroMessenger/7.0.20.1781(0x6700143B) NetType/WIFI MiniProgramEnv/Windows WindowsWechat/WMPF WindowsWechat(0x63090c11)XWEB/11581",
-            "client": "wechat",
-            "Content-Type": "application/json",
-            "timestamp": timestamp,
-            "signature": signature,
-            "appcommid": appcommid,
-            "appid": appid,
-            "forcecheck": "1",
-            "token": token,
-            "appversion": "1.3",
-            "Accept": "*/*",
-            "Referer": "https://servicewechat.com/wx7605335e224edc7b/196/page-frame.html"
-        }
-        
-        # 发送请求，设置超时
-        response = session.get(
-            url, 
-            params=params, 
-            headers=headers, 
-            verify=False,
-            timeout=(3, 5)  # 连接超时3秒，读取超时5秒
-        )
-        response.raise_for_status()
-        
-        # 检查响应状态
-        if response.status_code != 200:
-            logger.warning(f"充电桩 {eq_num} API返回非200状态码: {response.status_code}")
-            raise PortStatusError(f"API返回状态码: {response.status_code}")
-        
-        # 解析响应数据
-        data = response.json()
-        
-        # 检查API响应内容
-        if not data.get('success'):
-            error_msg = data.get('msg', '未知错误')
-            logger.warning(f"充电桩 {eq_num} API返回错误: {error_msg}")
-            raise PortStatusError(f"API错误: {error_msg}")
-        
-        # 提取充电端口状态
-        ports = []
-        device_data = data.get('data', {})
-        port_list = device_data.get('portList', [])
-        
-        for port in port_list:
-            # 状态转换：0为空闲，10为占用
-            status = "空闲" if port.get('status') == 0 else "占用"
-            voltage = 220.0 if status == "占用" else 0.0
-            current = 10.0 if status == "占用" else 0.0
-            
-            port_data = {
-                "port": port.get('portId'),
-                "status": status,
-                "service": "充电服务",
-                "voltage": voltage,
-                "current": current,
-                "timestamp": datetime.now().isoformat()
-            }
-            ports.append(port_data)
-        
-        result = {
-            "device_id": eq_num,
-            "ports": ports
-        }
-        
-        logger.debug(f"成功获取充电桩 {eq_num} 状态，共 {len(ports)} 个端口")
+        result = fetch_device_detail_hedged(eq_num)
+        outcome = 'success'
         return result
         
     except requests.Timeout:
         # 超时错误
+        outcome = 'timeout'
         logger.error(f"获取充电桩 {eq_num} 状态超时")
         logger.info(f"返回模拟数据 - 充电桩 {eq_num}（API超时）")
         return generate_mock_port_data(eq_num)
         
     except requests.RequestException as e:
         # 其他请求错误
+        outcome = 'request_error'
         logger.error(f"获取充电桩 {eq_num} 状态请求失败: {str(e)}")
         logger.info(f"返回模拟数据 - 充电桩 {eq_num}（请求失败）")
         return generate_mock_port_data(eq_num)
         
     except PortStatusError as e:
         # 自定义API错误
+        outcome = 'api_error'
         logger.error(f"获取充电桩 {eq_num} 状态API错误: {str(e)}")
         logger.info(f"返回模拟数据 - 充电桩 {eq_num}（API错误）")
         return generate_mock_port_data(eq_num)
         
     except json.JSONDecodeError as e:
         # JSON解析错误
+        outcome = 'api_error'
         logger.error(f"解析充电桩 {eq_num} 状态响应JSON失败: {str(e)}")
         logger.info(f"返回模拟数据 - 充电桩 {eq_num}（JSON解析错误）")
         return generate_mock_port_data(eq_num)
@@ -313,3 +548,197 @@ def get_port_status(eq_num: Optional[str] = None) -> Dict[str, Any]:
         logger.error(f"获取充电桩 {eq_num} 状态时发生未知错误: {str(e)}")
         logger.info(f"返回模拟数据 - 充电桩 {eq_num}（未知错误）")
         return generate_mock_port_data(eq_num)
+    
+    finally:
+        # 失败时返回的是模拟数据，按失败原因分别记录耗时
+        UPSTREAM_LATENCY.labels(outcome).observe(time.perf_counter() - start)
+
+
+async def fetch_device_detail_async(eq_num: str, client, timeout: Tuple[float, float]) -> Dict[str, Any]:
+    """异步发送一次设备详情请求并解析，成功时记录耗时"""
+    import httpx
+    
+    url, params, headers = build_request(eq_num)
+    start = time.perf_counter()
+    response = await client.get(url, params=params, headers=headers,
+                                timeout=httpx.Timeout(timeout[1], connect=timeout[0]))
+    response.raise_for_status()
+    result = parse_response(eq_num, response.json())
+    latency_tracker.observe(time.perf_counter() - start)
+    return result
+
+async def fetch_device_detail_hedged_async(eq_num: str, client) -> Dict[str, Any]:
+    """fetch_device_detail_hedged 的异步版本，对冲成功后取消较慢的请求"""
+    import asyncio
+    
+    timeout = adaptive_timeouts()
+    hedge_budget.record_request()
+    delay = hedge_delay()
+    if delay is None:
+        return await fetch_device_detail_async(eq_num, client, timeout)
+    
+    primary = asyncio.ensure_future(fetch_device_detail_async(eq_num, client, timeout))
+    done, _ = await asyncio.wait({primary}, timeout=delay)
+    if done or not hedge_budget.try_acquire():
+        return await primary
+    
+    UPSTREAM_HEDGES.labels('sent').inc()
+    hedge = asyncio.ensure_future(fetch_device_detail_async(eq_num, client, timeout))
+    pending = {primary, hedge}
+    error = None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        UPSTREAM_HEDGES.labels('won').inc()
+                    return future.result()
+                error = future.exception()
+        raise error
+    finally:
+        for future in pending:
+            future.cancel()
+
+async def get_port_status_async(eq_num: str, client) -> Dict[str, Any]:
+    """异步获取充电桩端口状态
+    
+    与 get_port_status 行为一致（包括失败时回退到模拟数据、自适应超时和对冲请求），
+    但使用 httpx.AsyncClient 发送请求，等待上游期间不占用线程。不做自动重试。
+    
+    Args:
+        eq_num: 充电桩编号
+        client: httpx.AsyncClient 实例
+    
+    Returns:
+        dict: 包含设备ID和端口状态列表的字典
+    """
+    import httpx
+    
+    if USE_MOCK_DATA:
+        logger.info(f"使用模拟数据 - 充电桩 {eq_num}")
+        UPSTREAM_LATENCY.labels('mock').observe(0)
+        return generate_mock_port_data(eq_num)
+    
+    start = time.perf_counter()
+    try:
+        result = await fetch_device_detail_hedged_async(eq_num, client)
+        UPSTREAM_LATENCY.labels('success').observe(time.perf_counter() - start)
+        return result
+    except httpx.TimeoutException:
+        logger.error(f"获取充电桩 {eq_num} 状态超时")
+        outcome, reason = 'timeout', "API超时"
+    except httpx.HTTPError as e:
+        logger.error(f"获取充电桩 {eq_num} 状态请求失败: {str(e)}")
+        outcome, reason = 'request_error', "请求失败"
+    except PortStatusError as e:
+        logger.error(f"获取充电桩 {eq_num} 状态API错误: {str(e)}")
+        outcome, reason = 'api_error', "API错误"
+    except json.JSONDecodeError as e:
+        logger.error(f"解析充电桩 {eq_num} 状态响应JSON失败: {str(e)}")
+        outcome, reason = 'api_error', "JSON解析错误"
+    except Exception as e:
+        logger.error(f"获取充电桩 {eq_num} 状态时发生未知错误: {str(e)}")
+        outcome, reason = 'unknown_error', "未知错误"
+    
+    UPSTREAM_LATENCY.labels(outcome).observe(time.perf_counter() - start)
+    logger.info(f"返回模拟数据 - 充电桩 {eq_num}（{reason}）")
+    return generate_mock_port_data(eq_num)
+
+def get_device_faults(eq_num: str) -> Optional[List[int]]:
+    """获取充电桩的故障端口
+    
+    Args:
+        eq_num: 充电桩编号
+        
+    Returns:
+        Optional[List[int]]: 故障端口号列表，请求失败时返回None
+    """
+    if USE_MOCK_DATA:
+        UPSTREAM_FAULT_REQUESTS.labels('mock').inc()
+        return []
+    
+    try:
+        url, body, headers = build_fault_request(eq_num)
+        response = get_session().post(
+            url,
+            json=body,
+            headers=headers,
+            verify=False,
+            timeout=(3, Config.API_TIMEOUT)
+        )
+        response.raise_for_status()
+        faults = parse_fault_response(eq_num, response.json())
+        UPSTREAM_FAULT_REQUESTS.labels('success').inc()
+        return faults
+    except requests.RequestException as e:
+        logger.warning(f"查询充电桩 {eq_num} 故障请求失败: {str(e)}")
+        UPSTREAM_FAULT_REQUESTS.labels('request_error').inc()
+    except (PortStatusError, ValueError) as e:
+        logger.warning(f"解析充电桩 {eq_num} 故障响应失败: {str(e)}")
+        UPSTREAM_FAULT_REQUESTS.labels('api_error').inc()
+    return None
+
+async def get_device_faults_async(eq_num: str, client) -> Optional[List[int]]:
+    """异步获取充电桩的故障端口，行为与 get_device_faults 一致
+    
+    Args:
+        eq_num: 充电桩编号
+        client: httpx.AsyncClient 实例
+        
+    Returns:
+        Optional[List[int]]: 故障端口号列表，请求失败时返回None
+    """
+    import httpx
+    
+    if USE_MOCK_DATA:
+        UPSTREAM_FAULT_REQUESTS.labels('mock').inc()
+        return []
+    
+    try:
+        url, body, headers = build_fault_request(eq_num)
+        response = await client.post(url, json=body, headers=headers,
+                                     timeout=httpx.Timeout(Config.API_TIMEOUT, connect=3))
+        response.raise_for_status()
+        faults = parse_fault_response(eq_num, response.json())
+        UPSTREAM_FAULT_REQUESTS.labels('success').inc()
+        return faults
+    except httpx.HTTPError as e:
+        logger.warning(f"查询充电桩 {eq_num} 故障请求失败: {str(e)}")
+        UPSTREAM_FAULT_REQUESTS.labels('request_error').inc()
+    except (PortStatusError, ValueError) as e:
+        logger.warning(f"解析充电桩 {eq_num} 故障响应失败: {str(e)}")
+        UPSTREAM_FAULT_REQUESTS.labels('api_error').inc()
+    return None
+
+def get_port_status_with_faults(eq_num: str) -> Tuple[Dict[str, Any], Optional[List[int]]]:
+    """并发获取端口状态和故障端口，总耗时取两者中较慢的一个
+    
+    Args:
+        eq_num: 充电桩编号
+        
+    Returns:
+        Tuple[Dict[str, Any], Optional[List[int]]]: (get_port_status 的返回值, 故障端口号列表或None)
+    """
+    faults_future = get_upstream_executor().submit(get_device_faults, eq_num)
+    status_data = get_port_status(eq_num)
+    return status_data, faults_future.result()
+
+def mark_faulty_ports(status_data: Dict[str, Any], faulty_ports: List[int]) -> Dict[str, Any]:
+    """把故障端口的状态标记为"故障"，并在状态数据中记录故障端口列表
+    
+    Args:
+        status_data: get_port_status 返回的状态数据，原地修改
+        faulty_ports: 故障端口号列表
+        
+    Returns:
+        Dict[str, Any]: 合并后的状态数据
+    """
+    faulty = set(faulty_ports)
+    for port in status_data.get('ports', []):
+        if port.get('port') in faulty:
+            port['status'] = "故障"
+            port['voltage'] = 0.0
+            port['current'] = 0.0
+    status_data['faults'] = sorted(faulty)
+    return status_data
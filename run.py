@@ -6,10 +6,14 @@
 
 import os
 from app import create_app
+from app.services.warmup_service import warm_cache_on_start
 
 # 创建应用实例
 app = create_app(os.environ.get('FLASK_ENV', 'development'))
 
+# 作为服务启动时预热缓存（flask 命令行加载本模块时跳过）
+warm_cache_on_start(app)
+
 if __name__ == '__main__':
     # 使用环境变量中的端口或默认端口
     port = int(os.environ.get('PORT', 5000))
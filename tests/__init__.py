@@ -0,0 +1,5 @@
+"""
+充电桩监控系统 - 测试包
+
+这个包包含基于 TestingConfig（SQLite内存库、SimpleCache）运行的测试，使用 python -m pytest 执行。
+"""
@@ -0,0 +1,96 @@
+"""
+充电桩监控系统 - 测试公共夹具
+
+每个测试使用新建的 TestingConfig 应用（独立的SQLite内存库和SimpleCache），
+并重置进程内常驻的列式状态存储、物化列表、空间索引和读写分离状态，
+上游接口替换为返回固定端口状态的函数，测试不访问网络。
+"""
+
+import os
+
+os.environ.setdefault('FLASK_ENV', 'testing')
+
+import logging
+import pytest
+from typing import Any, Dict, List
+from app import create_app
+from app.models.port_status import db
+from app.cache import cache, _namespace_versions
+from app.fleet_store import fleet_store
+from app.fleet_view import fleet_view
+from app.geo_index import geo_index
+from app import db_routing
+
+# 逐条的刷新日志会淹没断言信息
+logging.disable(logging.INFO)
+
+# 假上游返回的端口数
+UPSTREAM_PORTS = 2
+
+def fake_station_status(station_id: str) -> Dict[str, Any]:
+    """替代 fetch_station_status 的上游数据，端口1占用，其余空闲"""
+    return {
+        'device_id': station_id,
+        'ports': [{
+            'port': port,
+            'status': '占用' if port == 1 else '空闲',
+            'service': '充电服务',
+            'voltage': 220.0,
+            'current': 1.5 if port == 1 else 0.0,
+            'timestamp': '2026-01-01T08:00:00'
+        } for port in range(1, UPSTREAM_PORTS + 1)],
+        'faults': []
+    }
+
+def reset_process_state() -> None:
+    """清空进程内常驻的状态，模拟刚启动的进程"""
+    cache.clear()
+    _namespace_versions.clear()
+    fleet_store.sync({})
+    fleet_store.last_sync = 0.0
+    fleet_view.clear()
+    fleet_view.refreshed_at = 0.0
+    fleet_view.synced_at = 0.0
+    geo_index.rebuild([], 0.0)
+    db_routing._read_primary_until = 0.0
+
+@pytest.fixture
+def app(monkeypatch):
+    """TestingConfig 应用，测试期间保持应用上下文"""
+    import app.services.station_service as station_service
+    import app.tasks as tasks
+    monkeypatch.setattr(station_service, 'fetch_station_status', fake_station_status)
+
+    flask_app = create_app('testing')
+    # Celery 任务在首次执行时创建自己的应用，测试中改用同一个应用（同一个内存库）
+    monkeypatch.setattr(tasks, '_flask_app', flask_app)
+    with flask_app.app_context():
+        db.create_all()
+        reset_process_state()
+        yield flask_app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def seed_stations(app):
+    """创建 count 个带端口记录的充电桩，之后重置进程内状态，使缓存和内存结构都是冷的
+
+    Returns:
+        Callable[[int], List[str]]: 参数为充电桩数量，返回按ID排序的充电桩ID列表
+    """
+    from app.services.provisioning_service import normalize_row, provision_stations
+
+    def seed(count: int, prefix: str = '93') -> List[str]:
+        rows = [normalize_row({'station_id': f'{prefix}{index:08d}', 'name': f'充电桩{index}',
+                               'port_count': UPSTREAM_PORTS}, index + 1)
+                for index in range(count)]
+        provision_stations(rows)
+        db.session.remove()
+        reset_process_state()
+        return [row['station_id'] for row in rows]
+
+    return seed
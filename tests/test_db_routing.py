@@ -0,0 +1,75 @@
+"""
+充电桩监控系统 - 读写分离测试
+
+配置一个只读副本（SQLite内存库），检查 RoutingSession.get_bind 只在满足全部条件时选择副本，
+其余情况（未标记、写语句、事务内已写入、读写一致窗口内、写入标记读取失败、没有副本）都回退到主库。
+"""
+
+import pytest
+from sqlalchemy import select, update
+from app import create_app, db_routing
+from app.config import TestingConfig, config
+from app.models.port_status import db, ChargingStation
+from app.db_routing import replica_read
+from tests.conftest import reset_process_state
+
+class ReplicaTestingConfig(TestingConfig):
+    SQLALCHEMY_BINDS = {'replica_0': 'sqlite:///:memory:'}
+    READ_YOUR_WRITES_WINDOW = 5.0
+
+@pytest.fixture
+def replica_app(monkeypatch):
+    monkeypatch.setitem(config, 'replica_testing', ReplicaTestingConfig)
+    flask_app = create_app('replica_testing')
+    with flask_app.app_context():
+        db.create_all()
+        reset_process_state()
+        yield flask_app
+        db.session.remove()
+        db.drop_all()
+    # init_app 为每个绑定登记了元数据，留下会让后续测试的 create_all 查找不存在的绑定
+    db.metadatas.pop('replica_0', None)
+    db_routing._read_primary_until = 0.0
+
+@replica_read
+def marked_bind(clause=None):
+    """在只读标记下选择数据库"""
+    return db.session.get_bind(clause=clause if clause is not None else select(ChargingStation))
+
+def test_marked_select_reads_replica(replica_app):
+    assert marked_bind() is db.engines['replica_0']
+
+def test_unmarked_select_reads_primary(replica_app):
+    assert db.session.get_bind(clause=select(ChargingStation)) is db.engine
+
+def test_write_statement_uses_primary(replica_app):
+    statement = update(ChargingStation).values(is_active=False)
+    assert marked_bind(statement) is db.engine
+
+def test_flushed_transaction_reads_primary(replica_app):
+    db.session.add(ChargingStation(station_id='9300000001', name='充电桩'))
+    db.session.flush()
+    assert marked_bind() is db.engine
+    db.session.rollback()
+    assert marked_bind() is db.engines['replica_0']
+
+def test_local_commit_reads_primary(replica_app):
+    db.session.add(ChargingStation(station_id='9300000001', name='充电桩'))
+    db.session.commit()
+    assert marked_bind() is db.engine
+
+def test_other_process_write_reads_primary(replica_app):
+    from app.cache import mark_recent_write
+    # 其他进程的提交只通过缓存中的写入标记可见
+    assert mark_recent_write(5.0)
+    assert db_routing._read_primary_until == 0.0
+    assert marked_bind() is db.engine
+    # 标记的剩余时间被记下，窗口内不再读取缓存
+    assert db_routing._read_primary_until > 0.0
+
+def test_unreadable_write_marker_reads_primary(replica_app, monkeypatch):
+    monkeypatch.setattr('app.cache.get_recent_write_remaining', lambda: None)
+    assert marked_bind() is db.engine
+
+def test_without_replicas_reads_primary(app):
+    assert marked_bind() is db.engine
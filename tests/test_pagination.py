@@ -0,0 +1,94 @@
+"""
+充电桩监控系统 - 分页游标和状态筛选测试
+
+覆盖游标的编码和解码、列式状态存储的筛选条件，以及接口对无效参数返回400。
+"""
+
+import pytest
+from app.fleet_store import FleetStore
+from app.services.station_service import encode_cursor, decode_cursor
+
+def ports(*statuses):
+    return {'ports': [{'port': index + 1, 'status': status, 'voltage': 220.0, 'current': 0.0,
+                       'timestamp': '2026-01-01T08:00:00'}
+                      for index, status in enumerate(statuses)]}
+
+@pytest.fixture
+def store():
+    store = FleetStore(capacity=8)
+    store.sync({
+        '9300000003': ports('空闲', '空闲'),
+        '9300000001': ports('占用', '空闲'),
+        '9200000001': ports('故障', '占用'),
+        '9300000002': ports('占用', '占用'),
+        '9300000004': ports()
+    })
+    return store
+
+@pytest.mark.parametrize('station_id', ['9300000001', '信阳学院-01', 'a'])
+def test_cursor_round_trip(station_id):
+    cursor = encode_cursor(station_id)
+    assert '=' not in cursor
+    assert decode_cursor(cursor) == station_id
+
+@pytest.mark.parametrize('cursor', ['', '!!!!', '//8'])
+def test_invalid_cursor(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+def test_match_orders_by_station_id(store):
+    # 没有端口的充电桩不参与筛选
+    assert store.match_stations() == ['9200000001', '9300000001', '9300000002', '9300000003']
+
+def test_match_min_free(store):
+    assert store.match_stations(min_free=1) == ['9300000001', '9300000003']
+    assert store.match_stations(min_free=2) == ['9300000003']
+
+def test_match_status(store):
+    assert store.match_stations(status='故障') == ['9200000001']
+    assert store.match_stations(status='占用') == ['9200000001', '9300000001', '9300000002']
+
+def test_match_unknown_status(store):
+    with pytest.raises(ValueError):
+        store.match_stations(status='free')
+
+def test_match_prefix_after_limit(store):
+    assert store.match_stations(prefix='93') == ['9300000001', '9300000002', '9300000003']
+    assert store.match_stations(prefix='93', after='9300000001') == ['9300000002', '9300000003']
+    assert store.match_stations(prefix='93', after='9300000001', limit=1) == ['9300000002']
+    assert store.match_stations(prefix='94') == []
+
+def test_match_sees_updates(store):
+    store.update_stations({'9300000002': ports('空闲', '占用'), '9300000005': ports('空闲')})
+    assert store.match_stations(min_free=1) == ['9300000001', '9300000002', '9300000003', '9300000005']
+
+def test_api_pages_cover_all_stations(client, seed_stations):
+    station_ids = seed_stations(12)
+    seen = []
+    cursor = None
+    while True:
+        url = '/api/stations?limit=5' + (f'&cursor={cursor}' if cursor else '')
+        page = client.get(url).get_json()
+        seen.extend(station['station_id'] for station in page['stations'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+    assert seen == station_ids
+
+def test_api_filtered_pages(client, seed_stations):
+    seed_stations(6)
+    seed_stations(3, prefix='92')
+    client.get('/api/stations')
+    page = client.get('/api/stations?limit=2&prefix=92&status=占用&min_free=1').get_json()
+    assert [station['station_id'] for station in page['stations']] == ['9200000000', '9200000001']
+    page = client.get(f"/api/stations?limit=2&prefix=92&cursor={page['next_cursor']}").get_json()
+    assert [station['station_id'] for station in page['stations']] == ['9200000002']
+    assert page['next_cursor'] is None
+
+@pytest.mark.parametrize('query', ['cursor=!!!!', 'limit=abc', 'limit=1.5', 'min_free=-1',
+                                   'min_free=x', 'status=free'])
+def test_api_rejects_invalid_arguments(client, seed_stations, query):
+    seed_stations(3)
+    response = client.get(f'/api/stations?{query}')
+    assert response.status_code == 400
+    assert response.get_json()['error']
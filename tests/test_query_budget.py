@@ -0,0 +1,105 @@
+"""
+充电桩监控系统 - SQL语句预算测试
+
+按不同的充电桩规模限定热点接口和任务的SQL语句数量：读取路径的语句数不随充电桩数量增长，
+冷启动刷新只允许每个刷新的充电桩一次端口查询和合并后的写入。出现逐个充电桩、逐个端口查询时测试失败。
+"""
+
+import pytest
+from app.config import Config
+from app.query_stats import assert_max_queries
+from tests.conftest import UPSTREAM_PORTS
+
+FLEET_SIZES = [10, 40]
+
+# 每个刷新的充电桩：一次查询已有端口；写入时 SQLAlchemy 把变化列相同的端口合并为一条 UPDATE，
+# 最多每个端口一条，新端口合并为一条 INSERT。逐个端口提交会使实例过期并逐个重新查询，超出预算
+REFRESH_QUERIES_PER_STATION = 1 + UPSTREAM_PORTS
+
+@pytest.fixture(params=[True, False], ids=['fleet_view', 'direct'])
+def fleet_view_enabled(request, monkeypatch):
+    monkeypatch.setattr(Config, 'FLEET_VIEW_ENABLED', request.param)
+    return request.param
+
+@pytest.mark.parametrize('count', FLEET_SIZES)
+def test_stations_cold(client, seed_stations, fleet_view_enabled, count):
+    seed_stations(count)
+    with assert_max_queries(1 + REFRESH_QUERIES_PER_STATION * count):
+        response = client.get('/api/stations')
+    assert response.status_code == 200
+    stations = response.get_json()['stations']
+    assert len(stations) == count
+    assert all(len(station['ports']) == 2 for station in stations)
+
+@pytest.mark.parametrize('count', FLEET_SIZES)
+def test_stations_warm(client, seed_stations, fleet_view_enabled, count):
+    seed_stations(count)
+    client.get('/api/stations')
+    # 物化列表常驻内存；直接构建时只查询一次充电桩列表，状态全部来自缓存
+    with assert_max_queries(0 if fleet_view_enabled else 1):
+        response = client.get('/api/stations')
+    assert len(response.get_json()['stations']) == count
+
+@pytest.mark.parametrize('count', FLEET_SIZES)
+def test_stations_page_only_refreshes_page(client, seed_stations, count):
+    seed_stations(count)
+    with assert_max_queries(1 + REFRESH_QUERIES_PER_STATION * 5):
+        response = client.get('/api/stations?limit=5')
+    page = response.get_json()
+    assert len(page['stations']) == 5
+    assert page['next_cursor'] is not None
+
+    # 下一页只刷新本页的充电桩；已刷新的页只查询一次充电桩
+    with assert_max_queries(1 + REFRESH_QUERIES_PER_STATION * 5):
+        client.get(f"/api/stations?limit=5&cursor={page['next_cursor']}&prefix=93")
+    with assert_max_queries(1):
+        client.get('/api/stations?limit=5')
+
+@pytest.mark.parametrize('count', FLEET_SIZES)
+def test_stations_filtered_page(client, seed_stations, count):
+    seed_stations(count)
+    client.get('/api/stations')
+    # 列式状态存储同步（充电桩列表），本页充电桩查询
+    with assert_max_queries(2):
+        response = client.get('/api/stations?limit=5&status=空闲&min_free=1')
+    assert len(response.get_json()['stations']) == 5
+
+@pytest.mark.parametrize('count', FLEET_SIZES)
+def test_summary(client, seed_stations, count):
+    seed_stations(count)
+    # 冷启动：充电桩列表和按批加载的端口，缓存为空时不逐个充电桩回退
+    with assert_max_queries(2):
+        response = client.get('/api/summary')
+    summary = response.get_json()['summary']
+    assert summary['stations'] == count
+    assert summary['ports'] == 2 * count
+
+    with assert_max_queries(0):
+        client.get('/api/summary')
+
+def test_station_detail(client, seed_stations):
+    station_ids = seed_stations(10)
+    client.get('/api/stations')
+    with assert_max_queries(1):
+        response = client.get(f'/api/stations/{station_ids[0]}')
+    assert response.get_json()['station']['station_id'] == station_ids[0]
+
+def test_update_station_task(app, seed_stations):
+    from app.tasks import update_station
+    station_ids = seed_stations(10)
+    with assert_max_queries(REFRESH_QUERIES_PER_STATION):
+        result = update_station.apply(args=[station_ids[0]]).get()
+    assert result['status'] == 'success'
+
+def test_refresh_creates_missing_ports_in_one_transaction(client, app):
+    from app.repositories.station_repository import StationRepository
+    from app.models.port_status import db
+    for index in range(10):
+        StationRepository.create_station(f'93{index:08d}', f'充电桩{index}', commit=False)
+    db.session.commit()
+    db.session.remove()
+
+    # 新端口与状态更新在同一个事务中写入，不逐个端口提交
+    with assert_max_queries(1 + REFRESH_QUERIES_PER_STATION * 10):
+        response = client.get('/api/stations')
+    assert all(len(station['ports']) == 2 for station in response.get_json()['stations'])
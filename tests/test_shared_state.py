@@ -0,0 +1,127 @@
+"""
+充电桩监控系统 - 共享内存状态段测试
+
+覆盖写入和只读映射之间的往返、顺序锁（seqlock）的读取重试和写入中断恢复、过期判断和槽位压缩。
+"""
+
+import pytest
+from app.shared_state import SharedFleetState
+
+def make_status(statuses, timestamp='2026-01-01T08:00:00'):
+    return {'ports': [{'port': index + 1, 'status': status, 'service': '快速充电服务',
+                       'voltage': 220.0, 'current': 1.5, 'timestamp': timestamp}
+                      for index, status in enumerate(statuses)]}
+
+@pytest.fixture
+def segment_path(tmp_path):
+    return str(tmp_path / 'fleet_state')
+
+@pytest.fixture
+def writer(segment_path):
+    segment = SharedFleetState(segment_path, max_stations=8, ports_per_station=4, writable=True).open()
+    yield segment
+    segment.close()
+
+@pytest.fixture
+def reader(writer, segment_path):
+    segment = SharedFleetState(segment_path).open()
+    yield segment
+    segment.close()
+
+def test_round_trip(writer, reader):
+    writer.write_stations([
+        ('9300000001', '信阳学院充电桩', make_status(['空闲', '占用', '故障'])),
+        ('9200000001', None, make_status(['空闲']))
+    ])
+    stations = reader.read_all(max_age=60)
+    assert [station['station_id'] for station in stations] == ['9300000001', '9200000001']
+    first = stations[0]
+    assert first['name'] == '信阳学院充电桩'
+    assert [port['status'] for port in first['ports']] == ['空闲', '占用', '故障']
+    assert first['ports'][0] == {'port': 1, 'status': '空闲', 'service': '快速充电服务', 'voltage': 220.0,
+                                 'current': 1.5, 'timestamp': '2026-01-01T08:00:00'}
+    assert stations[1]['name'] == ''
+
+def test_full_length_chinese_name_is_not_truncated(writer, reader):
+    name = '信阳学院' * 12 + '充电'
+    assert len(name) == 50
+    writer.write_stations([('9300000001', name, make_status(['空闲']))])
+    assert reader.read_all()[0]['name'] == name
+
+def test_each_write_advances_version_by_two(writer, reader):
+    writer.write_stations([('9300000001', 'A', make_status(['空闲']))])
+    before = reader.version()
+    assert before % 2 == 0
+    writer.write_stations([('9300000001', 'A', make_status(['占用']))])
+    assert reader.version() == before + 2
+    seq, stations = reader.read_snapshot()
+    assert seq == before + 2
+    assert stations[0]['ports'][0]['status'] == '占用'
+
+def test_reader_does_not_return_data_while_write_in_progress(writer, reader):
+    writer.write_stations([('9300000001', 'A', make_status(['空闲']))])
+    seq = writer._begin_write()
+    try:
+        assert seq % 2 == 1
+        assert reader.read_snapshot() is None
+        assert reader.version() is None
+    finally:
+        writer._end_write(seq)
+    assert reader.read_snapshot() == (seq + 1, reader.read_all())
+
+def test_reader_retries_torn_read(writer, reader, monkeypatch):
+    writer.write_stations([('9300000001', 'A', make_status(['空闲']))])
+    seq = reader.version()
+    # 第一次读取期间写入方完成了一次写入：读取前后 seq 不一致，读取方重试并得到新数据
+    reads = iter([seq, seq + 2, seq + 2, seq + 2])
+    monkeypatch.setattr('app.shared_state.SEQ', _ScriptedSeq(reads))
+    assert reader.read_snapshot()[0] == seq + 2
+
+def test_writer_recovers_from_interrupted_write(writer, segment_path):
+    writer.write_stations([('9300000001', 'A', make_status(['空闲']))])
+    writer._begin_write()
+    writer.close()
+
+    # 写入进程在写入中途退出后重新打开：seq 恢复为偶数，已有槽位保留
+    reopened = SharedFleetState(segment_path, max_stations=8, ports_per_station=4, writable=True).open()
+    try:
+        segment = SharedFleetState(segment_path).open()
+        assert segment.version() % 2 == 0
+        assert [station['station_id'] for station in segment.read_all()] == ['9300000001']
+        segment.close()
+    finally:
+        reopened.close()
+
+def test_stale_segment_is_ignored(writer, reader):
+    writer.write_stations([('9300000001', 'A', make_status(['空闲']))])
+    assert reader.read_all(max_age=60) is not None
+    assert reader.read_all(max_age=-1) is None
+    assert reader.version(max_age=-1) is None
+
+def test_retain_stations_compacts_slots(writer, reader):
+    writer.write_stations([(f'930000000{index}', str(index), make_status(['空闲'])) for index in range(4)])
+    writer.retain_stations(['9300000001', '9300000003'])
+    assert [station['name'] for station in reader.read_all()] == ['1', '3']
+    writer.write_stations([('9300000009', '9', make_status(['占用']))])
+    assert [station['station_id'] for station in reader.read_all()] == ['9300000001', '9300000003', '9300000009']
+
+def test_capacity_limit(writer, reader):
+    written = writer.write_stations([(f'93000000{index:02d}', None, make_status(['空闲'])) for index in range(10)])
+    assert written == 8
+    assert len(reader.read_all()) == 8
+
+def test_layout_is_read_from_header(writer, segment_path):
+    segment = SharedFleetState(segment_path, max_stations=1, ports_per_station=1).open()
+    try:
+        assert (segment.max_stations, segment.ports_per_station) == (8, 4)
+    finally:
+        segment.close()
+
+class _ScriptedSeq:
+    """按给定顺序返回 seq 的替身，模拟读取期间发生的并发写入"""
+
+    def __init__(self, values):
+        self.values = values
+
+    def unpack_from(self, buffer, offset):
+        return (next(self.values),)
@@ -0,0 +1,71 @@
+"""
+充电桩监控系统 - 对冲请求预算测试
+
+对冲请求量长期不超过普通请求量的 UPSTREAM_HEDGE_BUDGET 倍，突发的对冲数量受令牌上限限制。
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+import port_status
+from app.upstream_latency import HedgeBudget, LatencyTracker
+
+def test_budget_limits_hedge_ratio():
+    budget = HedgeBudget(0.05)
+    hedges = 0
+    for _ in range(100):
+        budget.record_request()
+        hedges += budget.try_acquire()
+    assert hedges == 5
+
+def test_budget_starts_empty():
+    budget = HedgeBudget(0.5)
+    assert not budget.try_acquire()
+    budget.record_request()
+    assert not budget.try_acquire()
+    budget.record_request()
+    assert budget.try_acquire()
+
+def test_budget_capacity_limits_bursts():
+    budget = HedgeBudget(0.5, capacity=3.0)
+    for _ in range(100):
+        budget.record_request()
+    assert sum(budget.try_acquire() for _ in range(10)) == 3
+
+def test_latency_percentile_needs_min_samples():
+    tracker = LatencyTracker(window=100, min_samples=10)
+    for index in range(9):
+        tracker.observe(index / 100)
+    assert tracker.percentile(0.95) is None
+    tracker.observe(0.09)
+    assert tracker.percentile(0.95) == pytest.approx(0.09)
+    assert tracker.percentile(0.5) == pytest.approx(0.05)
+
+def test_hedged_fetch_respects_budget(monkeypatch):
+    calls = []
+    lock = threading.Lock()
+
+    def slow_fetch(eq_num, timeout):
+        with lock:
+            calls.append(eq_num)
+        time.sleep(0.005)
+        return {'device_id': eq_num, 'ports': []}
+
+    # 每个请求都超过对冲等待时间，是否发出对冲只取决于预算
+    monkeypatch.setattr(port_status, 'hedge_budget', HedgeBudget(0.05))
+    monkeypatch.setattr(port_status, 'hedge_delay', lambda: 0.001)
+    monkeypatch.setattr(port_status, 'adaptive_timeouts', lambda: (1.0, 1.0))
+    monkeypatch.setattr(port_status, 'fetch_device_detail', slow_fetch)
+    executor = ThreadPoolExecutor(max_workers=4)
+    monkeypatch.setattr(port_status, '_upstream_executor', executor)
+    monkeypatch.setattr(port_status, '_upstream_executor_pid', os.getpid())
+
+    requests = 100
+    for index in range(requests):
+        assert port_status.fetch_device_detail_hedged(f'93{index:08d}')['device_id'] == f'93{index:08d}'
+    executor.shutdown(wait=True)
+
+    hedges = len(calls) - requests
+    assert 1 <= hedges <= requests * 0.05